@@ -0,0 +1,56 @@
+"""Maintenance commands for the quality control database.
+
+    python db_admin.py --url postgresql://... partition --grain year
+    python db_admin.py --url postgresql://... archive --year 2022 --archive-dir archive
+    python db_admin.py --url postgresql://... snapshot
+
+`partition` converts the jobs table to a production_date range-partitioned table
+(one-off; blocks writes while rows are copied). `archive` moves a closed year of
+jobs to compressed Parquet, keeping per-day totals in Postgres for aggregates.
+Take a backup before running either against production.
+
+`snapshot` precomputes the All Customers Overview aggregates for the default
+range (the last 90 days) so the morning rush reads them instead of running
+them. Schedule it nightly, e.g. from cron:
+
+    15 5 * * * cd /srv/qc && python db_admin.py --url postgresql://... snapshot
+"""
+
+import argparse
+import json
+from datetime import date
+
+import qc_core as qc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of the Postgres database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    partition = commands.add_parser("partition", help="range-partition jobs on production_date")
+    partition.add_argument("--grain", choices=qc.PARTITION_GRAINS, default="year")
+
+    archive = commands.add_parser("archive", help="move a closed year of jobs to Parquet")
+    archive.add_argument("--year", type=int, required=True)
+    archive.add_argument("--archive-dir", default=qc.ARCHIVE_DIR, help="directory the app can read Parquet files from")
+
+    snapshot = commands.add_parser("snapshot", help="precompute the overview aggregates for the default range")
+    snapshot.add_argument("--date", type=date.fromisoformat, help="build for this day instead of today (YYYY-MM-DD)")
+
+    args = parser.parse_args()
+
+    qc.use_engine(qc.create_pooled_engine(args.url, "default", pool_size=1, max_overflow=0))
+    qc.init_db()
+
+    if args.command == "partition":
+        result = qc.partition_jobs_table(args.grain)
+    elif args.command == "archive":
+        result = qc.archive_year(args.year, args.archive_dir)
+    else:
+        result = qc.build_snapshots(args.date)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold import time of the core data layer.
+
+Imports `qc_core` and each of its modules in a fresh interpreter, several times,
+and reports the median cumulative import time from `python -X importtime`. It
+fails (exit 1) when an import goes over budget or pulls in a UI library, so it
+can gate a CI job next to the query plan checks.
+
+    python import_budget.py
+    python import_budget.py --runs 9 --package-budget-ms 20 --module-budget-ms 1200
+
+The bare package resolves names lazily and should cost almost nothing; modules
+are dominated by pandas and SQLAlchemy, which every data-layer caller needs anyway.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+import pandas as pd
+
+MODULES = (
+    "qc_core",
+    "qc_core.cache",
+    "qc_core.db",
+    "qc_core.metrics",
+    "qc_core.schema",
+    "qc_core.customers",
+    "qc_core.jobs",
+    "qc_core.archive",
+    "qc_core.snapshots",
+    "qc_core.queries",
+    "qc_core.store",
+    "qc_core.reports",
+)
+# Never imported by the core; the app and report builds load them themselves
+FORBIDDEN = ("streamlit", "plotly", "xlsxwriter")
+
+
+def _import_once(module: str) -> tuple:
+    """(cumulative import microseconds per module, forbidden modules loaded) for one fresh interpreter."""
+    probe = f"import sys, {module}; print(','.join(m for m in {FORBIDDEN!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=True
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if cum_us.isdigit():
+            cumulative[name] = int(cum_us)
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative, loaded
+
+
+def measure(module: str, runs: int) -> dict:
+    times, loaded, last = [], set(), {}
+    for _ in range(runs):
+        last, forbidden = _import_once(module)
+        times.append(last.get(module, 0) / 1000.0)
+        loaded.update(forbidden)
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(times), 1),
+        "max_ms": round(max(times), 1),
+        "forbidden": ", ".join(sorted(loaded)),
+        "_breakdown": last,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--package-budget-ms", type=float, default=25.0, help="budget for a bare `import qc_core`")
+    parser.add_argument("--module-budget-ms", type=float, default=1500.0, help="budget for each qc_core module")
+    parser.add_argument("--top", type=int, default=10, help="show this many slowest imports of the heaviest module")
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in MODULES]
+    failed = False
+    for result in results:
+        budget = args.package_budget_ms if result["module"] == "qc_core" else args.module_budget_ms
+        result["budget_ms"] = budget
+        result["status"] = "ok"
+        if result["forbidden"]:
+            result["status"] = "UI IMPORT"
+        elif result["median_ms"] > budget:
+            result["status"] = "OVER BUDGET"
+        failed |= result["status"] != "ok"
+
+    report = pd.DataFrame([{k: v for k, v in r.items() if not k.startswith("_")} for r in results])
+    print(report.set_index("module").to_string())
+
+    heaviest = max(results, key=lambda r: r["median_ms"])
+    top = sorted(heaviest["_breakdown"].items(), key=lambda item: item[1], reverse=True)
+    # Nested imports repeat their parents' time; top-level packages are what a budget can act on
+    top = [(name, us) for name, us in top if "." not in name and name != heaviest["module"]][: args.top]
+    print(f"\nSlowest top-level imports under {heaviest['module']}:")
+    for name, us in top:
+        print(f"  {name:<24} {us / 1000.0:8.1f} ms")
+
+    if failed:
+        print("\nImport budget exceeded or a UI library was imported.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""Headless HTTP ingestion service for machine-fed job data.
+
+Press controllers POST jobs as JSON; they are checked with the submission form's
+rules and written through the app's pooled engine. Submissions that arrive close
+together are micro-batched into one upsert, so a burst of controllers costs a
+handful of transactions instead of one per request.
+
+    python ingest_server.py --url postgresql://qc:qc@localhost/qc --port 8080
+
+    POST /jobs      one job object, a list of them, or {"jobs": [...]}
+    GET  /metrics   request latency percentiles, batch sizes and pool health
+    GET  /healthz   200 when the database answers
+
+A job looks like the form: customer (name) or customer_id, job_number,
+production_date (YYYY-MM-DD), total_pieces, total_impressions, total_damages,
+and optional notes and idempotency_key. Jobs are upserted by customer and job
+number, so controllers can safely resend. Rejected requests get a 422 with one
+{"row", "field", "message"} object per problem; "row" is null for problems with
+the request as a whole.
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+import qc_core as qc
+
+JOB_FIELDS = (
+    "customer_id",
+    "job_number",
+    "production_date",
+    "total_pieces",
+    "total_impressions",
+    "total_damages",
+    "notes",
+    "idempotency_key",
+)
+
+# Unknown customer names trigger a directory reload, but not more often than this
+DIRECTORY_REFRESH_SECONDS = 30
+
+
+# ----------------------------------------------------------------------------
+# Micro-batching writer
+# ----------------------------------------------------------------------------
+class _Ticket:
+    """One request's rows waiting for the writer thread."""
+
+    def __init__(self, jobs: pd.DataFrame):
+        self.jobs = jobs
+        self.queued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.write_started = None
+        self.batch_rows = 0
+        self.error = None
+        self.rejected = []
+
+    def finish(self, batch_rows: int, write_started: float, error: str = None, rejected: list = ()) -> None:
+        self.batch_rows = batch_rows
+        self.write_started = write_started
+        self.error = error
+        self.rejected = list(rejected)
+        self.done.set()
+
+
+class MicroBatcher:
+    """Collects submissions for up to max_wait_ms (or max_rows) and writes them as one upsert.
+
+    If the combined batch is rejected, each request is retried in its own transaction
+    so one bad submission only fails its own caller.
+    """
+
+    def __init__(self, max_rows: int, max_wait_ms: int):
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = deque(maxlen=2000)
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="qc-ingest-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, jobs: pd.DataFrame, timeout: float = 30.0) -> _Ticket:
+        ticket = _Ticket(jobs)
+        self._pending.put(ticket)
+        if not ticket.done.wait(timeout):
+            ticket.error = "Timed out waiting for the database"
+        return ticket
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            rows = len(batch[0].jobs)
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    ticket = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(ticket)
+                rows += len(ticket.jobs)
+            self._write(batch, rows)
+
+    def _write(self, batch: list, rows: int) -> None:
+        started = time.perf_counter()
+        self.batch_sizes.append(rows)
+        try:
+            with qc.get_engine().begin() as conn:
+                qc.upsert_job_rows(conn, pd.concat([t.jobs for t in batch], ignore_index=True))
+        except (IntegrityError, DataError, qc.JobValidationError):
+            for ticket in batch:
+                try:
+                    with qc.get_engine().begin() as conn:
+                        qc.upsert_job_rows(conn, ticket.jobs)
+                except qc.JobValidationError as e:
+                    ticket.finish(len(ticket.jobs), started, rejected=e.errors)
+                except (IntegrityError, DataError) as e:
+                    ticket.finish(len(ticket.jobs), started, str(getattr(e, "orig", e)).strip())
+                else:
+                    ticket.finish(len(ticket.jobs), started)
+            return
+        except Exception as e:
+            for ticket in batch:
+                ticket.finish(rows, started, f"Database unavailable: {e.__class__.__name__}")
+            return
+
+        for ticket in batch:
+            ticket.finish(rows, started)
+
+
+# ----------------------------------------------------------------------------
+# Request parsing
+# ----------------------------------------------------------------------------
+class CustomerResolver:
+    """Customer names and ids checked against the shared directory, reloaded on a miss."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refreshed_at = time.monotonic()
+
+    def _directory(self, missed: bool):
+        if missed:
+            with self._lock:
+                if time.monotonic() - self._refreshed_at > DIRECTORY_REFRESH_SECONDS:
+                    qc.get_customer_directory.clear()
+                    self._refreshed_at = time.monotonic()
+        return qc.get_customer_directory()
+
+    def resolve(self, jobs: pd.DataFrame) -> list:
+        """Fill customer_id from customer names in place; returns JobRowErrors."""
+        names = jobs["customer"] if "customer" in jobs.columns else pd.Series(None, index=jobs.index, dtype=object)
+        given = jobs["customer_id"].where(jobs["customer_id"].notna(), names)
+        for missed in (False, True):
+            directory = self._directory(missed)
+            ids = pd.to_numeric(jobs["customer_id"], errors="coerce").fillna(names.map(directory.name_to_id))
+            unknown = given.notna() & ~ids.isin(list(directory.id_to_target))
+            if not unknown.any():
+                break
+
+        jobs["customer_id"] = ids
+        rows = unknown.to_numpy().nonzero()[0]
+        return [qc.JobRowError(i + 1, "customer_id", f"Unknown customer '{given.iat[i]}'") for i in rows]
+
+
+def parse_jobs(payload, resolver: CustomerResolver):
+    """Turn a request body into a jobs frame plus the errors that reject it."""
+    if isinstance(payload, dict) and "jobs" in payload:
+        payload = payload["jobs"]
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list) or not all(isinstance(job, dict) for job in payload):
+        message = "Body must be a job object, a list of job objects, or {\"jobs\": [...]}"
+        return None, [qc.JobRowError(None, None, message)]
+
+    jobs = pd.DataFrame(payload)
+    if jobs.empty:
+        return None, [qc.JobRowError(None, None, "No rows to save.")]
+    if "customer_id" not in jobs.columns:
+        jobs["customer_id"] = None
+
+    errors = resolver.resolve(jobs)
+    jobs = jobs.reindex(columns=list(JOB_FIELDS))
+    errors = sorted(errors + qc.validate_job_rows(jobs), key=lambda e: e.row or 0)
+    if errors:
+        return None, errors
+
+    for col in ("customer_id", "total_pieces", "total_impressions", "total_damages"):
+        jobs[col] = pd.to_numeric(jobs[col]).astype(int)
+    jobs["notes"] = jobs["notes"].fillna("").astype(str)
+    return jobs, []
+
+
+def _error_body(errors: list) -> list:
+    return [dataclasses.asdict(e) for e in errors]
+
+
+# ----------------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------------
+def _percentiles(values) -> dict:
+    if not values:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    series = pd.Series(list(values))
+    return {
+        "p50_ms": round(float(series.quantile(0.5)), 2),
+        "p90_ms": round(float(series.quantile(0.9)), 2),
+        "p99_ms": round(float(series.quantile(0.99)), 2),
+        "max_ms": round(float(series.max()), 2),
+    }
+
+
+class IngestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.statuses = Counter()
+        self.rows_saved = 0
+        self.latency_ms = deque(maxlen=5000)
+        self.queue_ms = deque(maxlen=5000)
+        self.write_ms = deque(maxlen=5000)
+
+    def record(self, status: int, total_ms: float, queue_ms: float = None, write_ms: float = None, rows: int = 0):
+        with self._lock:
+            self.statuses[status] += 1
+            self.rows_saved += rows
+            self.latency_ms.append(total_ms)
+            if queue_ms is not None:
+                self.queue_ms.append(queue_ms)
+                self.write_ms.append(write_ms)
+
+    def snapshot(self, batcher: MicroBatcher) -> dict:
+        with self._lock:
+            sizes = list(batcher.batch_sizes)
+            return {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "requests": dict(sorted((str(k), v) for k, v in self.statuses.items())),
+                "rows_saved": self.rows_saved,
+                "latency": _percentiles(self.latency_ms),
+                "queue_wait": _percentiles(self.queue_ms),
+                "write": _percentiles(self.write_ms),
+                "batch_rows": {
+                    "recent_batches": len(sizes),
+                    "mean": round(sum(sizes) / len(sizes), 1) if sizes else None,
+                    "max": max(sizes, default=None),
+                },
+                "pools": {name: qc.get_engine(name).pool.metrics() for name in qc.POOL_SETTINGS},
+            }
+
+
+# ----------------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------------
+class IngestHandler(BaseHTTPRequestHandler):
+    server_version = "QCIngest/1.0"
+
+    # Set by serve()
+    batcher = None
+    resolver = None
+    metrics = None
+    token = None
+    max_body = 1_000_000
+    quiet = False
+
+    def _send(self, status: int, body: dict, timing: str = None) -> None:
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if timing:
+            self.send_header("Server-Timing", timing)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_request(self, code="-", size="-"):
+        # Replaced by the per-request line with latency in do_POST
+        pass
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            try:
+                with qc.get_engine().connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception as e:
+                self._send(503, {"status": "unavailable", "error": e.__class__.__name__})
+            else:
+                self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send(200, self.metrics.snapshot(self.batcher))
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        status, body, timing = self._handle_post()
+        total_ms = (time.perf_counter() - started) * 1000.0
+        body["latency_ms"] = {**body.get("latency_ms", {}), "total": round(total_ms, 2)}
+        timing = ", ".join(filter(None, [timing, f"total;dur={total_ms:.2f}"]))
+        self._send(status, body, timing)
+
+        latency = body["latency_ms"]
+        self.metrics.record(status, total_ms, latency.get("queue"), latency.get("write"), body.get("saved", 0))
+        if not self.quiet:
+            self.log_message('"%s" %d %d rows %.1fms', self.requestline, status, body.get("saved", 0), total_ms)
+
+    def _handle_post(self):
+        if self.path != "/jobs":
+            return 404, {"error": "Not found"}, None
+        if self.token and self.headers.get("Authorization") != f"Bearer {self.token}":
+            return 401, {"error": "Missing or invalid bearer token"}, None
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.max_body:
+            return 413, {"error": f"Body larger than {self.max_body:,} bytes; split the batch"}, None
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return 400, {"error": "Body is not valid JSON"}, None
+
+        jobs, errors = parse_jobs(payload, self.resolver)
+        if errors:
+            return 422, {"errors": _error_body(errors)}, None
+
+        ticket = self.batcher.submit(jobs)
+        finished = time.perf_counter()
+        write_started = ticket.write_started or finished
+        queue_ms = (write_started - ticket.queued_at) * 1000.0
+        write_ms = (finished - write_started) * 1000.0
+        timing = f"queue;dur={queue_ms:.2f}, write;dur={write_ms:.2f}"
+        latency = {"queue": round(queue_ms, 2), "write": round(write_ms, 2)}
+
+        if ticket.rejected:
+            return 422, {"errors": _error_body(ticket.rejected), "latency_ms": latency}, timing
+        if ticket.error:
+            status = 503 if ticket.error.startswith(("Database unavailable", "Timed out")) else 422
+            errors = _error_body([qc.JobRowError(None, None, ticket.error)])
+            return status, {"errors": errors, "latency_ms": latency}, timing
+        return 200, {"saved": len(jobs), "batch_rows": ticket.batch_rows, "latency_ms": latency}, timing
+
+
+def serve(host: str, port: int, batcher: MicroBatcher, token: str = None, max_body: int = 1_000_000, quiet=False):
+    IngestHandler.batcher = batcher
+    IngestHandler.resolver = CustomerResolver()
+    IngestHandler.metrics = IngestMetrics()
+    IngestHandler.token = token
+    IngestHandler.max_body = max_body
+    IngestHandler.quiet = quiet
+
+    server = ThreadingHTTPServer((host, port), IngestHandler)
+    server.daemon_threads = True
+    print(f"Listening on http://{host}:{port} (POST /jobs, GET /metrics, GET /healthz)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of the Postgres database")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-rows", type=int, default=500, help="write a batch once it holds this many rows")
+    parser.add_argument("--batch-wait-ms", type=int, default=20, help="longest a submission waits for others to join")
+    parser.add_argument("--max-body", type=int, default=1_000_000, help="largest accepted request body in bytes")
+    parser.add_argument("--pool-size", type=int, help="default pool size (app setting if omitted)")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("QC_INGEST_TOKEN"),
+        help="require 'Authorization: Bearer <token>' (default: $QC_INGEST_TOKEN)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="no per-request log lines")
+    args = parser.parse_args()
+
+    overrides = {"pool_size": args.pool_size} if args.pool_size else {}
+    qc.use_engine(qc.create_pooled_engine(args.url, "default", **overrides))
+    qc.init_db()
+
+    batcher = MicroBatcher(args.batch_rows, args.batch_wait_ms)
+    serve(args.host, args.port, batcher, args.token, args.max_body, args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Concurrent-session load test for the dashboard's data layer.
+
+Simulates N browser sessions hitting a local Postgres at once, each running a
+weighted mix of the page data paths (submission, customer analytics, overview,
+view all jobs), and reports throughput, latency percentiles and connection
+pool health (checkouts, waits, timeouts, wait percentiles) for both the
+default and the analytics pool.
+
+    python load_harness.py --url postgresql://qc:qc@localhost/qc_load --seed-jobs 50000
+    python load_harness.py --url postgresql://qc:qc@localhost/qc_load --sessions 40 --duration 60
+
+Seeding only adds rows to an empty database; point it at a throwaway database,
+never at production.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+import qc_core as qc
+
+
+# ----------------------------------------------------------------------------
+# Page data paths
+# ----------------------------------------------------------------------------
+def _uncached(func):
+    """The function behind a qc_core cache wrapper, so every call reaches the database."""
+    return getattr(func, "__wrapped__", func)
+
+
+class Workload:
+    """The data-layer calls each page makes on a rerun."""
+
+    def __init__(self, customer_ids: list, use_app_caches: bool):
+        self.customer_ids = customer_ids
+        self.cached = use_app_caches
+        self.today = date.today()
+
+    def _call(self, func, *args):
+        return (func if self.cached else _uncached(func))(*args)
+
+    def submission(self, rng: random.Random) -> None:
+        pieces = rng.randint(12, 5000)
+        qc.upsert_jobs(
+            pd.DataFrame(
+                [
+                    {
+                        "customer_id": rng.choice(self.customer_ids),
+                        "job_number": f"LOAD-{rng.getrandbits(48):012x}",
+                        "production_date": self.today - timedelta(days=rng.randint(0, 30)),
+                        "total_pieces": pieces,
+                        "total_impressions": pieces * rng.randint(1, 4),
+                        "total_damages": rng.randint(0, max(pieces // 40, 1)),
+                        "notes": "load test",
+                    }
+                ]
+            )
+        )
+
+    def analytics(self, rng: random.Random) -> None:
+        customer_id = rng.choice(self.customer_ids)
+        start = self.today - timedelta(days=30)
+        qc.get_jobs_by_customer(customer_id, start, self.today)
+        self._call(qc.get_period_comparison, start, self.today)
+        self._call(qc.get_rollup, customer_id, "Day", start, self.today)
+        self._call(qc.get_damage_distribution, start, self.today)
+
+    def overview(self, rng: random.Random) -> None:
+        start = self.today - timedelta(days=90)
+        qc.get_customer_stats()
+        qc.get_jobs_by_date_range(start, self.today)
+        self._call(qc.get_rollup, None, "Week", start, self.today)
+        self._call(qc.get_damage_distribution, start, self.today)
+        self._call(qc.get_customer_ranking, start, self.today)
+        self._call(qc.get_customer_ranking, start, self.today, "impressions", True)
+        self._call(qc.get_customer_month_matrix, start, self.today)
+        qc.get_customer_forecast()
+
+    def view_all(self, rng: random.Random) -> None:
+        qc.get_all_jobs()
+
+
+PAGE_MIX = {
+    "submission": 40,
+    "analytics": 30,
+    "overview": 20,
+    "view_all": 10,
+}
+
+
+# ----------------------------------------------------------------------------
+# Seeding
+# ----------------------------------------------------------------------------
+def seed(n_jobs: int, years: int, rng: random.Random) -> None:
+    qc.init_db()
+    qc.load_default_customers()
+    customer_ids = qc.get_all_customers()["id"].astype(int).tolist()
+
+    with qc.get_engine().connect() as conn:
+        existing = int(conn.execute(text("SELECT COUNT(*) FROM jobs")).scalar_one())
+    if existing:
+        print(f"Database already has {existing:,} jobs; skipping seed.")
+        return
+
+    print(f"Seeding {n_jobs:,} jobs across {len(customer_ids)} customers...")
+    # A few large customers carry most of the volume, like the real floor
+    weights = [1.0 / (rank + 1) for rank in range(len(customer_ids))]
+    span_days = 365 * years
+    batch = []
+    for i in range(n_jobs):
+        pieces = rng.randint(12, 5000)
+        batch.append(
+            {
+                "customer_id": rng.choices(customer_ids, weights)[0],
+                "job_number": f"SEED-{i:08d}",
+                "production_date": date.today() - timedelta(days=rng.randint(0, span_days)),
+                "total_pieces": pieces,
+                "total_impressions": pieces * rng.randint(1, 4),
+                "total_damages": rng.randint(0, max(pieces // 40, 1)),
+                "notes": "",
+            }
+        )
+        if len(batch) == 1000:
+            qc.add_jobs(pd.DataFrame(batch))
+            batch = []
+    if batch:
+        qc.add_jobs(pd.DataFrame(batch))
+
+
+# ----------------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------------
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    series = pd.Series(values) * 1000.0
+    return {
+        "p50_ms": round(float(series.quantile(0.5)), 2),
+        "p90_ms": round(float(series.quantile(0.9)), 2),
+        "p99_ms": round(float(series.quantile(0.99)), 2),
+        "max_ms": round(float(series.max()), 2),
+    }
+
+
+def run(workload: Workload, sessions: int, duration: float, think_ms: int, seed_value: int) -> dict:
+    latencies = {page: [] for page in PAGE_MIX}
+    errors = {page: 0 for page in PAGE_MIX}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    pages, weights = list(PAGE_MIX), list(PAGE_MIX.values())
+
+    def session(session_no: int) -> None:
+        rng = random.Random(seed_value + session_no)
+        while time.perf_counter() < deadline:
+            page = rng.choices(pages, weights)[0]
+            started = time.perf_counter()
+            try:
+                getattr(workload, page)(rng)
+                ok = True
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies[page].append(elapsed)
+                else:
+                    errors[page] += 1
+            if think_ms:
+                time.sleep(rng.uniform(0, think_ms * 2) / 1000.0)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(n,), daemon=True) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    completed = sum(len(v) for v in latencies.values())
+    pools = {}
+    for name in qc.POOL_SETTINGS:
+        pool = qc.get_engine(name).pool
+        pools[name] = {
+            **pool.metrics(),
+            **{f"recent_wait_{k}": v for k, v in _percentiles(list(pool.recent_waits)).items()},
+        }
+
+    return {
+        "sessions": sessions,
+        "duration_s": round(elapsed, 2),
+        "operations": completed,
+        "errors": sum(errors.values()),
+        "throughput_ops_s": round(completed / elapsed, 2) if elapsed else 0.0,
+        "pages": {
+            page: {"count": len(latencies[page]), "errors": errors[page], **_percentiles(latencies[page])}
+            for page in PAGE_MIX
+        },
+        "pools": pools,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{report['sessions']} sessions for {report['duration_s']}s: "
+        f"{report['operations']:,} operations, {report['errors']} errors, "
+        f"{report['throughput_ops_s']} ops/s\n"
+    )
+    print(pd.DataFrame(report["pages"]).T.to_string())
+    print("\nConnection pools:")
+    print(pd.DataFrame(report["pools"]).to_string())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of a local Postgres test database")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent simulated sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--think-ms", type=int, default=250, help="mean pause between page loads per session")
+    parser.add_argument("--pool-size", type=int, help="default pool size (app setting if omitted)")
+    parser.add_argument("--max-overflow", type=int, help="default pool overflow (app setting if omitted)")
+    parser.add_argument("--analytics-pool-size", type=int, help="analytics pool size (app setting if omitted)")
+    parser.add_argument("--single-pool", action="store_true", help="run analytics reads on the default pool")
+    parser.add_argument("--seed-jobs", type=int, default=0, help="seed this many jobs into an empty database first")
+    parser.add_argument("--seed-years", type=int, default=3)
+    parser.add_argument("--use-app-caches", action="store_true", help="let cached aggregates absorb repeat queries")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    overrides = {"pool_size": args.pool_size, "max_overflow": args.max_overflow}
+    engine = qc.create_pooled_engine(args.url, "default", **{k: v for k, v in overrides.items() if v is not None})
+    analytics_engine = None
+    if not args.single_pool:
+        analytics_overrides = {"pool_size": args.analytics_pool_size} if args.analytics_pool_size else {}
+        analytics_engine = qc.create_pooled_engine(args.url, "analytics", **analytics_overrides)
+    qc.use_engine(engine, analytics_engine)
+
+    rng = random.Random(args.random_seed)
+    if args.seed_jobs:
+        seed(args.seed_jobs, args.seed_years, rng)
+    else:
+        qc.init_db()
+
+    customer_ids = qc.get_all_customers()["id"].astype(int).tolist()
+    if not customer_ids:
+        raise SystemExit("No customers found; run once with --seed-jobs to create test data.")
+
+    # Seeding and setup went through the pools too; only measure the run itself
+    for pool in {engine.pool, qc.get_engine("analytics").pool}:
+        pool.recent_waits.clear()
+    report = run(Workload(customer_ids, args.use_app_caches), args.sessions, args.duration, args.think_ms, args.random_seed)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Data layer of the QC dashboard: schema, queries and metrics, with no UI imports.
+
+Scripts, benchmarks and batch jobs use it directly:
+
+    import qc_core as qc
+
+    qc.configure("postgresql://...")
+    qc.init_db()
+    stats = qc.get_customer_stats()
+
+Names below resolve lazily, so `import qc_core` stays cheap and a script only
+pays for the submodules it touches. `python import_budget.py` measures it.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "cache": ("CACHE_BUDGET_BYTES", "RESULT_STORE", "cache_stats", "frame_fingerprint", "invalidate_job_caches"),
+    "db": (
+        "POOL_SETTINGS",
+        "MeteredQueuePool",
+        "configure",
+        "create_pooled_engine",
+        "get_engine",
+        "pool_metrics",
+        "use_engine",
+    ),
+    "metrics": ("ewma_rate_forecast", "fmt_mmddyyyy", "safe_rate"),
+    "schema": (
+        "JOB_CHANGE_RETENTION_DAYS",
+        "JOB_UNDO_WINDOW_HOURS",
+        "PARTITION_GRAINS",
+        "bootstrap_db",
+        "ensure_job_partitions",
+        "init_db",
+        "jobs_partitioned",
+        "load_default_customers",
+        "partition_jobs_table",
+        "purge_deleted_jobs",
+    ),
+    "customers": (
+        "MERGE_DELETE_BATCH_PREFIX",
+        "CustomerDirectory",
+        "add_customer",
+        "get_all_customers",
+        "get_customer_directory",
+        "get_customer_merges",
+        "get_inactive_customers",
+        "merge_customers",
+        "set_customer_active",
+        "update_customer_target",
+    ),
+    "jobs": (
+        "EXISTING_JOBS_SQL",
+        "JOB_CORRECTABLE_COLUMNS",
+        "JOB_INSERT_COLUMNS",
+        "JobFilter",
+        "JobRowError",
+        "JobValidationError",
+        "MOVE_RESENT_JOBS_SQL",
+        "add_job",
+        "add_jobs",
+        "check_job_rows",
+        "correct_jobs",
+        "delete_job",
+        "get_recent_deletions",
+        "insert_job_rows",
+        "preview_job_filter",
+        "restore_jobs",
+        "soft_delete_jobs",
+        "upsert_job_rows",
+        "upsert_jobs",
+        "validate_job_rows",
+    ),
+    "archive": ("ARCHIVE_DIR", "archive_year", "get_archive_manifest", "read_archived_jobs"),
+    "queries": (
+        "ALL_JOBS_SQL",
+        "CUSTOMER_MONTH_MATRIX_SQL",
+        "CUSTOMER_RANKING_SQL",
+        "CUSTOMER_STATS_SQL",
+        "DAMAGE_DISTRIBUTION_SQL",
+        "FORECAST_ALPHA",
+        "FORECAST_HISTORY_MONTHS",
+        "FORECAST_HISTORY_SQL",
+        "JOBS_BY_CUSTOMER_RANGE_SQL",
+        "JOBS_BY_CUSTOMER_SQL",
+        "JOBS_BY_DATE_RANGE_SQL",
+        "JOB_DATA_VERSION_SQL",
+        "JOB_FACTS_SQL",
+        "MATRIX_OTHER_LABEL",
+        "MATRIX_TOP_K",
+        "PERIOD_COMPARISON_SQL",
+        "RANKING_BASES",
+        "RANKING_MIN_VOLUME",
+        "RANKING_PRIOR_WEIGHT",
+        "ROLLUP_SQL",
+        "TIME_GRAINS",
+        "get_all_jobs",
+        "get_customer_forecast",
+        "get_customer_month_matrix",
+        "get_customer_ranking",
+        "get_customer_stats",
+        "get_damage_distribution",
+        "get_jobs_by_customer",
+        "get_jobs_by_date_range",
+        "get_period_comparison",
+        "get_rollup",
+    ),
+    "snapshots": (
+        "OVERVIEW_DEFAULT_DAYS",
+        "SNAPSHOT_VERSION_SQL",
+        "build_snapshots",
+        "current_data_version",
+        "default_overview_range",
+    ),
+    "store": (
+        "JOB_CHANGES_SQL",
+        "JOB_STORE_READ_SQL",
+        "JOB_STORE_RESULT_TTL_SECONDS",
+        "JOB_SYNC_MIN_INTERVAL_SECONDS",
+        "JOB_SYNC_OVERLAP",
+        "WRITE_QUEUE_BATCH_SIZE",
+        "WRITE_QUEUE_MAX_ATTEMPTS",
+        "WRITE_QUEUE_PATH",
+        "JobStore",
+        "WriteBehindQueue",
+        "get_job_store",
+        "get_write_queue",
+        "job_payload",
+    ),
+    "reports": ("build_job_workbook",),
+}
+
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
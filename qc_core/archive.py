@@ -0,0 +1,138 @@
+"""Cold archive: closed years moved to Parquet, with per-day totals kept in Postgres."""
+
+import os
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+
+from .cache import cache_data, invalidate_job_caches
+from .customers import get_customer_merges
+from .db import get_engine
+from .schema import _is_partitioned, _partition_bounds, _partition_grain
+
+
+ARCHIVE_DIR = os.environ.get("QC_ARCHIVE_DIR", "archive")
+
+
+def archive_year(year: int, archive_dir: str = ARCHIVE_DIR) -> dict:
+    """Move a closed year of jobs to compressed Parquet and drop it from Postgres.
+
+    Per-day totals are kept in jobs_archive_daily so stats, rollups and comparisons
+    still cover the year; job-level reads load the Parquet file transparently.
+    """
+    year = int(year)
+    if year >= date.today().year:
+        raise ValueError("Only closed (past) years can be archived")
+
+    start, end = date(year, 1, 1), date(year, 12, 31)
+    path = os.path.join(archive_dir, f"jobs_{year}.parquet")
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM jobs_archive WHERE year = :y"), {"y": year}).fetchone():
+            raise RuntimeError(f"{year} is already archived")
+
+        # Block writes to the year between export and removal
+        conn.execute(text("LOCK TABLE jobs IN SHARE ROW EXCLUSIVE MODE"))
+        jobs = pd.read_sql(
+            text(
+                """
+                SELECT j.*, c.customer_name
+                FROM live_jobs j
+                JOIN customers c ON j.customer_id = c.id
+                WHERE j.production_date BETWEEN :sd AND :ed
+                """
+            ),
+            conn,
+            params={"sd": start, "ed": end},
+        )
+        if jobs.empty:
+            raise ValueError(f"No jobs found for {year}")
+
+        jobs = jobs.drop(columns=["deleted_at", "delete_batch"])
+        jobs["production_date"] = pd.to_datetime(jobs["production_date"])
+        os.makedirs(archive_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        jobs.to_parquet(tmp_path, compression="zstd", index=False)
+        os.replace(tmp_path, path)
+
+        params = {"sd": start, "ed": end}
+        conn.execute(
+            text(
+                """
+                INSERT INTO jobs_archive_daily
+                    (customer_id, production_date, jobs, total_pieces, total_impressions, total_damages)
+                SELECT customer_id, production_date, COUNT(*), SUM(total_pieces), SUM(total_impressions), SUM(total_damages)
+                FROM live_jobs
+                WHERE production_date BETWEEN :sd AND :ed
+                GROUP BY customer_id, production_date
+                """
+            ),
+            params,
+        )
+
+        # Dropping partitions skips the change-log trigger, so log the removals explicitly
+        dropped = []
+        if _is_partitioned(conn):
+            grain = _partition_grain(conn)
+            for name, _, _ in _partition_bounds(grain, year):
+                if conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar_one():
+                    conn.execute(text(f"INSERT INTO job_changes (job_id, op) SELECT id, 'D' FROM {name}"))
+                    conn.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+
+        # Rows outside dropped partitions (default partition, or an unpartitioned table)
+        conn.execute(text("DELETE FROM jobs WHERE production_date BETWEEN :sd AND :ed"), params)
+        conn.execute(
+            text("INSERT INTO jobs_archive (year, path, row_count) VALUES (:y, :p, :n)"),
+            {"y": year, "p": path, "n": len(jobs)},
+        )
+
+    invalidate_job_caches()
+    return {"year": year, "path": path, "rows": len(jobs), "dropped_partitions": dropped}
+
+
+@cache_data(ttl=3600, job_data=True)
+def get_archive_manifest() -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        return pd.read_sql(text("SELECT year, path, row_count, archived_at FROM jobs_archive ORDER BY year"), conn)
+
+
+@cache_data(ttl=3600, job_data=True)
+def read_archived_jobs(start_date=None, end_date=None, customer_id=None) -> pd.DataFrame:
+    """Job rows from archived years overlapping the range (all archived years if no range).
+
+    Rows of customers merged since archiving are reported under the surviving customer.
+    """
+    merges = get_customer_merges()
+    frames = []
+    for row in get_archive_manifest().itertuples(index=False):
+        if start_date and end_date and not (start_date.year <= row.year <= end_date.year):
+            continue
+
+        filters = []
+        if start_date and end_date:
+            filters += [
+                ("production_date", ">=", pd.Timestamp(start_date)),
+                ("production_date", "<=", pd.Timestamp(end_date)),
+            ]
+        if customer_id is not None:
+            merged_in = merges.loc[merges["target_id"] == int(customer_id), "source_id"].astype(int).tolist()
+            filters.append(("customer_id", "in", [int(customer_id)] + merged_in))
+        # The manifest path is where the archive was written; the app may mount it elsewhere
+        path = row.path if os.path.exists(row.path) else os.path.join(ARCHIVE_DIR, os.path.basename(row.path))
+        frames.append(pd.read_parquet(path, filters=filters or None))
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    if not merges.empty:
+        merged = merges.set_index("source_id")
+        moved = df["customer_id"].isin(merged.index)
+        df.loc[moved, "customer_name"] = df.loc[moved, "customer_id"].map(merged["target_name"])
+        df.loc[moved, "customer_id"] = df.loc[moved, "customer_id"].map(merged["target_id"])
+    return df
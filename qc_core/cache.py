@@ -0,0 +1,235 @@
+"""Process-wide memo caches for the core, with no UI framework behind them.
+
+`cache_resource` keeps one shared object per argument tuple (engines, stores,
+queues). `cache_data` keeps query results for `ttl` seconds in one shared store
+with a memory budget (QC_CACHE_BUDGET_MB); the least recently used results are
+evicted first when it fills up. Identical calls from every session get the same
+result: frames are handed out as shallow views of it, so sharing costs no memory.
+A caller may add or replace columns (`df[col] = ...` never writes into the shared
+arrays) but must not write values in place (`.loc[...] = `, `inplace=True`) unless
+copy-on-write is on: always on pandas 3, and turned on by the app on pandas 2.
+Importing this module leaves pandas options alone. Both expose `.clear()` and
+`__wrapped__`, like Streamlit's caches did.
+"""
+
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+CACHE_BUDGET_BYTES = int(float(os.environ.get("QC_CACHE_BUDGET_MB", "512")) * 1024 * 1024)
+
+# Caches over job rows; invalidate_job_caches() drops them after any job write
+_JOB_DATA_CACHES = []
+
+
+def _cache_key(args: tuple, kwargs: dict):
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return sys.getsizeof(value)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame: values, index, column names and dtypes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _shared_view(value):
+    """What a caller gets: frames as shallow views, plain containers as shallow copies."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    return value.copy() if isinstance(value, (dict, list, set)) else value
+
+
+class _ResourceCache:
+    """One shared value per argument tuple, built once even under concurrent first calls."""
+
+    def __init__(self, func):
+        functools.update_wrapper(self, func)
+        self._func = func
+        # Re-entrant: get_engine("analytics") builds on get_engine("default")
+        self._lock = threading.RLock()
+        self._values = {}
+
+    def __call__(self, *args, **kwargs):
+        key = _cache_key(args, kwargs)
+        if key is None:
+            return self._func(*args, **kwargs)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._func(*args, **kwargs)
+            return self._values[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class ResultStore:
+    """Results of every data cache in one LRU, held under a byte budget."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # (cache, key) -> (stored_at, value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, cache, key):
+        """The live entry, or None; counts the hit or miss and drops an expired entry."""
+        with self._lock:
+            entry = self._entries.get((cache, key))
+            if entry is not None and time.monotonic() - entry[0] >= cache.ttl:
+                self._drop((cache, key))
+                entry = None
+            if entry is None:
+                cache.misses += 1
+                return None
+            cache.hits += 1
+            self._entries.move_to_end((cache, key))
+            return entry
+
+    def put(self, cache, key, value, nbytes: int = None, generation: int = None) -> None:
+        """Store `value`, unless `cache` was cleared since `generation` (computed before it)."""
+        nbytes = _nbytes(value) if nbytes is None else int(nbytes)
+        with self._lock:
+            if generation is not None and generation != cache.generation:
+                return
+            if (cache, key) in self._entries:
+                self._drop((cache, key))
+            if nbytes > self.budget_bytes:
+                cache.oversized += 1
+                return
+            self._entries[(cache, key)] = (time.monotonic(), value, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.budget_bytes:
+                oldest = next(iter(self._entries))
+                oldest[0].evictions += 1
+                self._drop(oldest)
+
+    def clear(self, cache=None) -> None:
+        with self._lock:
+            for entry_key in [k for k in self._entries if cache is None or k[0] is cache]:
+                self._drop(entry_key)
+
+    def _drop(self, entry_key) -> None:
+        _, _, nbytes = self._entries.pop(entry_key)
+        self.total_bytes -= nbytes
+
+    def usage(self) -> dict:
+        """cache -> (entries, bytes) for what is held right now."""
+        with self._lock:
+            usage = {}
+            for (cache, _), (_, _, nbytes) in self._entries.items():
+                entries, total = usage.get(cache, (0, 0))
+                usage[cache] = (entries + 1, total + nbytes)
+            return usage
+
+
+RESULT_STORE = ResultStore(CACHE_BUDGET_BYTES)
+_DATA_CACHES = []
+
+
+class _DataCache:
+    """Results kept for `ttl` seconds in RESULT_STORE; computed outside its lock, so slow reads do not queue."""
+
+    def __init__(self, func, ttl: float, name: str = None, key=None, size=None):
+        functools.update_wrapper(self, func)
+        self._func = func
+        self._key = key
+        self._size = size
+        self.ttl = ttl
+        self.name = name or func.__qualname__
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+        # Bumped by clear(); a result computed across a clear may predate the change behind it
+        self.generation = 0
+
+    def __call__(self, *args, **kwargs):
+        key = self._key(*args, **kwargs) if self._key else _cache_key(args, kwargs)
+        if key is None:
+            return self._func(*args, **kwargs)
+
+        entry = RESULT_STORE.get(self, key)
+        if entry is not None:
+            return _shared_view(entry[1])
+
+        generation = self.generation
+        value = self._func(*args, **kwargs)
+        RESULT_STORE.put(self, key, value, self._size(value) if self._size else None, generation)
+        return _shared_view(value)
+
+    def clear(self) -> None:
+        self.generation += 1
+        RESULT_STORE.clear(self)
+
+
+def cache_resource(func):
+    """Share one instance per argument tuple across the whole process."""
+    return _ResourceCache(func)
+
+
+def cache_data(ttl: float = 300, job_data: bool = False, name: str = None, key=None, size=None):
+    """Cache results for `ttl` seconds; `job_data` caches are dropped by invalidate_job_caches().
+
+    `key(*args, **kwargs)` replaces the argument tuple as the cache key, for arguments
+    that are not hashable themselves (frames: see frame_fingerprint). `size(result)` gives
+    the bytes charged to the budget for results the store cannot measure itself.
+    """
+
+    def decorator(func):
+        cached = _DataCache(func, ttl, name, key, size)
+        _DATA_CACHES.append(cached)
+        if job_data:
+            _JOB_DATA_CACHES.append(cached)
+        return cached
+
+    return decorator
+
+
+def invalidate_job_caches() -> None:
+    """Drop cached aggregates after jobs changed."""
+    for cached in _JOB_DATA_CACHES:
+        cached.clear()
+
+
+def cache_stats() -> pd.DataFrame:
+    """One row per data cache: entries and memory held, hits, misses, hit rate, evictions."""
+    usage = RESULT_STORE.usage()
+    rows = []
+    for cached in _DATA_CACHES:
+        entries, nbytes = usage.get(cached, (0, 0))
+        calls = cached.hits + cached.misses
+        rows.append(
+            {
+                "cache": cached.name,
+                "entries": entries,
+                "size_mb": nbytes / (1024 * 1024),
+                "hits": cached.hits,
+                "misses": cached.misses,
+                "hit_rate": cached.hits / calls if calls else 0.0,
+                "evictions": cached.evictions,
+                "oversized": cached.oversized,
+            }
+        )
+    return pd.DataFrame(rows)
@@ -0,0 +1,252 @@
+"""Customer reads and writes, merges and the shared customer directory."""
+
+import uuid
+from bisect import bisect_left
+from dataclasses import dataclass
+
+import pandas as pd
+from sqlalchemy import text
+
+from .cache import cache_data, cache_resource, invalidate_job_caches
+from .db import get_engine
+
+# delete_batch prefix for jobs merge_customers soft-deletes; the job lives on under the
+# target customer, so these batches are not offered for undo
+MERGE_DELETE_BATCH_PREFIX = "merge-"
+
+
+def add_customer(customer_name: str) -> bool:
+    eng = get_engine()
+    customer_name = (customer_name or "").strip()
+    if not customer_name:
+        return False
+
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO customers (customer_name)
+                VALUES (:customer_name)
+                ON CONFLICT (customer_name) DO UPDATE SET active = 1
+                WHERE customers.id NOT IN (SELECT source_id FROM customer_merges)
+                """
+            ),
+            {"customer_name": customer_name},
+        )
+
+        exists = conn.execute(
+            text("SELECT 1 FROM customers WHERE customer_name = :customer_name"),
+            {"customer_name": customer_name},
+        ).fetchone()
+
+    get_customer_directory.clear()
+    return True
+
+
+def update_customer_target(customer_id: int, target_error_rate: float) -> None:
+    eng = get_engine()
+    with eng.begin() as conn:
+        conn.execute(
+            text("UPDATE customers SET target_error_rate = :t WHERE id = :id"),
+            {"t": float(target_error_rate), "id": int(customer_id)},
+        )
+
+    get_customer_directory.clear()
+
+
+def set_customer_active(customer_id: int, active: bool) -> None:
+    """Hide a customer from dropdowns and stats (or bring one back); its jobs are kept."""
+    eng = get_engine()
+    with eng.begin() as conn:
+        conn.execute(
+            text("UPDATE customers SET active = :active WHERE id = :id"),
+            {"active": int(bool(active)), "id": int(customer_id)},
+        )
+
+    get_customer_directory.clear()
+    invalidate_job_caches()
+
+
+def merge_customers(source_id: int, target_id: int) -> dict:
+    """Fold a duplicate customer into another in one transaction and deactivate it.
+
+    All of the source's jobs move to the target in a single UPDATE. Where both customers
+    hold the same live job number, the older row is soft-deleted first, the same rule the
+    job-number key uses everywhere else. Archived per-day totals are merged too, and
+    archived Parquet rows are remapped on read through customer_merges.
+    """
+    source_id, target_id = int(source_id), int(target_id)
+    if source_id == target_id:
+        raise ValueError("Pick two different customers to merge")
+
+    batch = f"{MERGE_DELETE_BATCH_PREFIX}{source_id}-{target_id}-{uuid.uuid4().hex[:8]}"
+    params = {"source": source_id, "target": target_id, "batch": batch}
+    eng = get_engine()
+    with eng.begin() as conn:
+        rows = conn.execute(
+            text("SELECT id, active FROM customers WHERE id IN (:source, :target) ORDER BY id FOR UPDATE"),
+            params,
+        ).all()
+        active = {row.id: row.active for row in rows}
+        if len(active) != 2:
+            raise ValueError("Customer not found")
+        if not active[target_id]:
+            raise ValueError("Cannot merge into an inactive customer")
+        if conn.execute(text("SELECT 1 FROM customer_merges WHERE source_id = :source"), params).fetchone():
+            raise ValueError("Customer was already merged")
+
+        duplicates = conn.execute(
+            text(
+                """
+                UPDATE jobs AS j
+                SET deleted_at = CURRENT_TIMESTAMP, delete_batch = :batch
+                FROM jobs AS other
+                WHERE j.customer_id IN (:source, :target)
+                  AND other.customer_id IN (:source, :target)
+                  AND j.customer_id <> other.customer_id
+                  AND j.job_number = other.job_number
+                  AND j.deleted_at IS NULL
+                  AND other.deleted_at IS NULL
+                  AND j.id < other.id
+                """
+            ),
+            params,
+        ).rowcount
+        moved = conn.execute(
+            text("UPDATE jobs SET customer_id = :target WHERE customer_id = :source"),
+            params,
+        ).rowcount
+
+        conn.execute(
+            text(
+                """
+                INSERT INTO jobs_archive_daily
+                    (customer_id, production_date, jobs, total_pieces, total_impressions, total_damages)
+                SELECT :target, production_date, jobs, total_pieces, total_impressions, total_damages
+                FROM jobs_archive_daily
+                WHERE customer_id = :source
+                ON CONFLICT (customer_id, production_date) DO UPDATE SET
+                    jobs = jobs_archive_daily.jobs + EXCLUDED.jobs,
+                    total_pieces = jobs_archive_daily.total_pieces + EXCLUDED.total_pieces,
+                    total_impressions = jobs_archive_daily.total_impressions + EXCLUDED.total_impressions,
+                    total_damages = jobs_archive_daily.total_damages + EXCLUDED.total_damages
+                """
+            ),
+            params,
+        )
+        conn.execute(text("DELETE FROM jobs_archive_daily WHERE customer_id = :source"), params)
+
+        # Earlier merges into the source now point straight at the target
+        conn.execute(text("UPDATE customer_merges SET target_id = :target WHERE target_id = :source"), params)
+        conn.execute(
+            text("INSERT INTO customer_merges (source_id, target_id, jobs_moved) VALUES (:source, :target, :moved)"),
+            {**params, "moved": int(moved or 0)},
+        )
+        conn.execute(text("UPDATE customers SET active = 0 WHERE id = :source"), params)
+
+    get_customer_directory.clear()
+    get_customer_merges.clear()
+    invalidate_job_caches()
+    return {"jobs_moved": int(moved or 0), "duplicates_deleted": int(duplicates or 0), "batch": batch}
+
+
+def get_inactive_customers() -> pd.DataFrame:
+    """Deactivated (not merged) customers that can be brought back."""
+    eng = get_engine()
+    with eng.connect() as conn:
+        return pd.read_sql(
+            text(
+                """
+                SELECT id, customer_name
+                FROM customers
+                WHERE active = 0
+                  AND id NOT IN (SELECT source_id FROM customer_merges)
+                ORDER BY customer_name
+                """
+            ),
+            conn,
+        )
+
+
+@cache_data(ttl=3600)
+def get_customer_merges() -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        return pd.read_sql(
+            text(
+                """
+                SELECT m.source_id, m.target_id, c.customer_name AS target_name
+                FROM customer_merges m
+                JOIN customers c ON c.id = m.target_id
+                """
+            ),
+            conn,
+        )
+
+
+def get_all_customers() -> pd.DataFrame:
+    eng = get_engine()
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(
+                """
+                SELECT id, customer_name, date_added, active, target_error_rate
+                FROM customers
+                WHERE active = 1
+                ORDER BY customer_name
+                """
+            ),
+            conn,
+        )
+    return df
+
+
+@dataclass(frozen=True)
+class CustomerDirectory:
+    """Read-only lookup maps over the active customer list."""
+
+    options: tuple
+    name_to_id: dict
+    id_to_target: dict
+    _search_keys: tuple
+    _search_names: tuple
+
+    def id_for(self, customer_name: str):
+        return self.name_to_id.get(customer_name)
+
+    def target_for(self, customer_id: int, default: float = 2.0) -> float:
+        target = self.id_to_target.get(int(customer_id))
+        return float(target) if target is not None else float(default)
+
+    def search(self, prefix: str, limit: int = 50) -> list:
+        """Customer names starting with `prefix` (case-insensitive), in display order."""
+        key = (prefix or "").strip().casefold()
+        if not key:
+            return list(self.options[:limit])
+
+        matches = []
+        i = bisect_left(self._search_keys, key)
+        while i < len(self._search_keys) and len(matches) < limit:
+            if not self._search_keys[i].startswith(key):
+                break
+            matches.append(self._search_names[i])
+            i += 1
+        return matches
+
+
+@cache_resource
+def get_customer_directory() -> CustomerDirectory:
+    """Shared process-wide; cleared by add_customer / update_customer_target."""
+    df = get_all_customers()
+    names = df["customer_name"].astype(str).tolist()
+    ids = df["id"].astype(int).tolist()
+    targets = df["target_error_rate"].fillna(2.0).astype(float).tolist()
+
+    keyed = sorted((n.casefold(), n) for n in names)
+    return CustomerDirectory(
+        options=tuple(names),
+        name_to_id=dict(zip(names, ids)),
+        id_to_target=dict(zip(ids, targets)),
+        _search_keys=tuple(k for k, _ in keyed),
+        _search_names=tuple(n for _, n in keyed),
+    )
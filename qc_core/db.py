@@ -0,0 +1,174 @@
+"""Engines and metered connection pools.
+
+Scripts call configure(url) or use_engine(engine); the Streamlit app configures the
+core from its secrets at startup. QC_DATABASE_URL works for anything else.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .cache import cache_resource
+
+
+# Pool settings per pool. Override any key through configure(); the app passes its
+# [qc_pool_default] / [qc_pool_analytics] secrets. Neon drops idle connections after about
+# 5 minutes, so connections are recycled before that and pinged on checkout.
+POOL_SETTINGS = {
+    "default": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 240,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 15000,
+    },
+    # Long aggregate reads get their own connections so they cannot starve form submissions
+    "analytics": {
+        "pool_size": 3,
+        "max_overflow": 2,
+        "pool_timeout": 30,
+        "pool_recycle": 240,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 120000,
+    },
+}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that counts checkouts, waits and timeouts for the pool health view."""
+
+    # Checkouts slower than this count as having waited for a connection
+    WAIT_THRESHOLD_SECONDS = 0.005
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.recent_waits = deque(maxlen=2000)
+        self._metrics_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.total_wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+            self.recent_waits.append(elapsed)
+            if elapsed > self.WAIT_THRESHOLD_SECONDS:
+                self.waits += 1
+        return conn
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "checked_in": self.checkedin(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait_seconds / self.checkouts * 1000.0) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000.0,
+            }
+
+
+def _pool_settings(pool: str, overrides: dict = None) -> dict:
+    settings = dict(POOL_SETTINGS[pool])
+    settings.update(_DATABASE["pools"].get(pool, {}))
+    settings.update(overrides or {})
+    return settings
+
+
+def _engine_kwargs(settings: dict) -> dict:
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": int(settings["pool_size"]),
+        "max_overflow": int(settings["max_overflow"]),
+        "pool_timeout": float(settings["pool_timeout"]),
+        "pool_recycle": int(settings["pool_recycle"]),
+        "pool_pre_ping": bool(settings["pool_pre_ping"]),
+    }
+
+
+def _install_statement_timeout(engine, timeout_ms) -> None:
+    if not timeout_ms:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_statement_timeout(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        cur.close()
+        # SET is transactional; commit so a later rollback does not undo it
+        dbapi_conn.commit()
+
+
+def create_pooled_engine(url, pool: str = "default", **overrides):
+    """Engine with the tuned, metered pool for `pool`."""
+    settings = _pool_settings(pool, overrides)
+    engine = create_engine(url, **_engine_kwargs(settings))
+    _install_statement_timeout(engine, settings["statement_timeout_ms"])
+    return engine
+
+
+_ENGINE_OVERRIDES = {}
+
+# Where get_engine() connects; set by configure(), or from the environment
+_DATABASE = {"url": os.environ.get("QC_DATABASE_URL"), "pools": {}}
+
+
+def configure(url, pool_settings: dict = None) -> None:
+    """Connect get_engine() to `url`, with optional per-pool overrides of POOL_SETTINGS."""
+    _DATABASE["url"] = url
+    _DATABASE["pools"] = {pool: dict(settings) for pool, settings in (pool_settings or {}).items()}
+    get_engine.clear()
+
+
+def use_engine(engine, analytics_engine=None) -> None:
+    """Point the data layer at explicit engines (load tests, scripts, batch jobs)."""
+    _ENGINE_OVERRIDES["default"] = engine
+    _ENGINE_OVERRIDES["analytics"] = analytics_engine or engine
+    get_engine.clear()
+
+
+@cache_resource
+def get_engine(pool: str = "default"):
+    """Engine for the "default" pool (writes, small reads) or the "analytics" pool."""
+    if pool in _ENGINE_OVERRIDES:
+        return _ENGINE_OVERRIDES[pool]
+
+    if pool != "default":
+        return create_pooled_engine(get_engine("default").url, pool)
+
+    if not _DATABASE["url"]:
+        raise RuntimeError("No database configured; call qc_core.configure(url) or set QC_DATABASE_URL.")
+    return create_pooled_engine(_DATABASE["url"], "default")
+
+
+def pool_metrics() -> pd.DataFrame:
+    """One row of pool health counters per pool."""
+    rows = []
+    for pool in POOL_SETTINGS:
+        engine_pool = get_engine(pool).pool
+        if isinstance(engine_pool, MeteredQueuePool):
+            rows.append({"pool": pool, **engine_pool.metrics()})
+    return pd.DataFrame(rows)
@@ -0,0 +1,548 @@
+"""Job writes: single and batch upserts, validation, bulk delete, restore and correction."""
+
+import uuid
+from dataclasses import dataclass
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+
+from .cache import invalidate_job_caches
+from .customers import MERGE_DELETE_BATCH_PREFIX
+from .db import get_engine
+from .schema import JOB_UNDO_WINDOW_HOURS, _job_key_sql
+
+
+def add_job(
+    customer_id: int,
+    job_number: str,
+    production_date,
+    total_pieces: int,
+    total_impressions: int,
+    total_damages: int,
+    notes: str = "",
+) -> None:
+    """Insert one job; raises JobValidationError if it breaks a rule or the job number is taken."""
+    add_jobs(
+        pd.DataFrame(
+            [
+                {
+                    "customer_id": customer_id,
+                    "job_number": job_number,
+                    "production_date": production_date,
+                    "total_pieces": total_pieces,
+                    "total_impressions": total_impressions,
+                    "total_damages": total_damages,
+                    "notes": notes,
+                }
+            ]
+        )
+    )
+
+
+JOB_INSERT_COLUMNS = (
+    "customer_id",
+    "job_number",
+    "production_date",
+    "total_pieces",
+    "total_impressions",
+    "total_damages",
+    "error_rate",
+    "notes",
+)
+
+
+@dataclass(frozen=True)
+class JobRowError:
+    """One rejected row: 1-based row number (None for the whole submission), column and message."""
+
+    row: int
+    field: str
+    message: str
+
+    def __str__(self) -> str:
+        return self.message if self.row is None else f"Row {self.row}: {self.message}"
+
+
+class JobValidationError(ValueError):
+    """Raised by the job write paths, before anything is written, with every rejected row."""
+
+    def __init__(self, errors: list):
+        super().__init__("; ".join(str(e) for e in errors))
+        self.errors = errors
+
+
+def _wall_clock(value):
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return pd.NaT
+    return ts if pd.isna(ts) or ts.tzinfo is None else ts.tz_localize(None)
+
+
+def _production_dates(values: pd.Series) -> pd.Series:
+    """Production dates as naive midnight timestamps, NaT where unreadable.
+
+    A UTC offset is dropped rather than applied, so "2024-05-01T23:30-07:00" stays
+    May 1, the day it was written for, which is also the date the write stores.
+    """
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        values = values.dt.tz_localize(None)
+    elif not pd.api.types.is_datetime64_dtype(values):
+        # Text may mix offsets, which no single datetime dtype can hold
+        values = pd.to_datetime(values.map(_wall_clock))
+    return values.dt.normalize()
+
+
+def validate_job_rows(jobs: pd.DataFrame, today: date = None, unique_job_numbers: bool = False) -> list:
+    """Apply the submission rules to every row at once; returns JobRowErrors in row order.
+
+    Pure: never touches the database, so forms can call it while the database is down.
+    `unique_job_numbers` also refuses a customer's job number repeated within `jobs`.
+    """
+    if jobs.empty:
+        return [JobRowError(None, None, "No rows to save.")]
+
+    job_numbers = jobs["job_number"].fillna("").astype(str).str.strip()
+    dates = _production_dates(jobs["production_date"])
+    pieces = pd.to_numeric(jobs["total_pieces"], errors="coerce").fillna(0)
+    impressions = pd.to_numeric(jobs["total_impressions"], errors="coerce").fillna(0)
+    damages = pd.to_numeric(jobs["total_damages"], errors="coerce")
+
+    rules = [
+        (jobs["customer_id"].isna(), "customer_id", "Customer is required"),
+        (job_numbers == "", "job_number", "Job Number is required"),
+        (dates.isna(), "production_date", "Production Date is required"),
+        (dates > pd.Timestamp(today or date.today()), "production_date", "Production Date cannot be in the future"),
+        (pieces <= 0, "total_pieces", "Total Pieces must be greater than 0"),
+        (impressions <= 0, "total_impressions", "Total Impressions must be greater than 0"),
+        (damages.isna() | (damages < 0), "total_damages", "Total Damages must be 0 or more"),
+        (damages > pieces, "total_damages", "Total Damages cannot be more than Total Pieces"),
+    ]
+    # Counts are stored as integers; reject fractions rather than truncate them on write
+    for column, label, values in (
+        ("total_pieces", "Total Pieces", pieces),
+        ("total_impressions", "Total Impressions", impressions),
+        ("total_damages", "Total Damages", damages),
+    ):
+        rules.append((values.notna() & (values != values.round()), column, f"{label} must be a whole number"))
+    if unique_job_numbers:
+        repeated = pd.DataFrame({"customer_id": jobs["customer_id"], "job_number": job_numbers}).duplicated()
+        rules.append(
+            (
+                repeated & jobs["customer_id"].notna() & (job_numbers != ""),
+                "job_number",
+                "Job Number appears more than once for this customer",
+            )
+        )
+
+    errors = []
+    for mask, field, message in rules:
+        for row_no in (mask.to_numpy().nonzero()[0] + 1).tolist():
+            errors.append(JobRowError(row_no, field, message))
+    return sorted(errors, key=lambda e: e.row)
+
+
+# Rows whose customer already has a live job with that number. Served by
+# jobs_customer_job_number_idx; a live row carrying the same idempotency key is
+# the same submission being retried, not a duplicate.
+EXISTING_JOBS_SQL = """
+    SELECT k.row_no, c.customer_name
+    FROM unnest(CAST(:customer_ids AS integer[]), CAST(:job_numbers AS text[]), CAST(:idempotency_keys AS text[]))
+        WITH ORDINALITY AS k(customer_id, job_number, idempotency_key, row_no)
+    JOIN customers c ON c.id = k.customer_id
+    WHERE EXISTS (
+        SELECT 1
+        FROM jobs j
+        WHERE j.customer_id = k.customer_id
+          AND j.job_number = k.job_number
+          AND j.deleted_at IS NULL
+          AND (k.idempotency_key IS NULL OR j.idempotency_key IS DISTINCT FROM k.idempotency_key)
+    )
+    ORDER BY k.row_no
+"""
+
+
+def _existing_job_errors(conn, jobs: pd.DataFrame) -> list:
+    job_numbers = jobs["job_number"].astype(str).str.strip()
+    keys = jobs["idempotency_key"] if "idempotency_key" in jobs.columns else pd.Series(None, index=jobs.index)
+    rows = conn.execute(
+        text(EXISTING_JOBS_SQL),
+        {
+            "customer_ids": pd.to_numeric(jobs["customer_id"]).astype(int).tolist(),
+            "job_numbers": job_numbers.tolist(),
+            "idempotency_keys": [None if pd.isna(k) else str(k) for k in keys],
+        },
+    ).fetchall()
+    return [
+        JobRowError(
+            int(row_no),
+            "job_number",
+            f"Job Number {job_numbers.iat[row_no - 1]} already exists for {customer_name}",
+        )
+        for row_no, customer_name in rows
+    ]
+
+
+def check_job_rows(conn, jobs: pd.DataFrame, replace_existing: bool = False) -> None:
+    """The write paths' validation stage, run on the write's own connection and transaction.
+
+    Rules first; unless `replace_existing`, also repeated job numbers and one indexed lookup
+    for job numbers already taken, which only runs once every row has passed the rules.
+    Raises JobValidationError with every rejected row.
+    """
+    errors = validate_job_rows(jobs, unique_job_numbers=not replace_existing)
+    if not errors and not replace_existing:
+        errors = _existing_job_errors(conn, jobs)
+    if errors:
+        raise JobValidationError(errors)
+
+
+def _job_values_sql(jobs: pd.DataFrame):
+    """Build a multi-row VALUES clause and its bind params for the jobs table."""
+    rows = jobs.reset_index(drop=True)
+    dates = _production_dates(rows["production_date"]).dt.date
+    pieces = rows["total_pieces"].astype(int)
+    damages = rows["total_damages"].astype(int)
+    error_rate = (damages / pieces.where(pieces > 0) * 100).fillna(0.0)
+    notes = rows["notes"].fillna("").astype(str) if "notes" in rows.columns else pd.Series("", index=rows.index)
+    keys = rows["idempotency_key"] if "idempotency_key" in rows.columns else pd.Series(None, index=rows.index)
+    columns = JOB_INSERT_COLUMNS + ("idempotency_key",)
+
+    params = {}
+    values_sql = []
+    for i in range(len(rows)):
+        values_sql.append("(" + ", ".join(f":{col}_{i}" for col in columns) + ")")
+        params.update(
+            {
+                f"customer_id_{i}": int(rows.at[i, "customer_id"]),
+                f"job_number_{i}": str(rows.at[i, "job_number"]).strip(),
+                f"production_date_{i}": dates.iat[i],
+                f"total_pieces_{i}": int(pieces.iat[i]),
+                f"total_impressions_{i}": int(rows.at[i, "total_impressions"]),
+                f"total_damages_{i}": int(damages.iat[i]),
+                f"error_rate_{i}": float(error_rate.iat[i]),
+                f"notes_{i}": notes.iat[i],
+                f"idempotency_key_{i}": None if pd.isna(keys.iat[i]) else str(keys.iat[i]),
+            }
+        )
+
+    return ", ".join(columns), ", ".join(values_sql), params
+
+
+def insert_job_rows(conn, jobs: pd.DataFrame) -> int:
+    """Single multi-row INSERT on an open connection; rows with a seen idempotency key are skipped.
+
+    Raises JobValidationError, before inserting anything, if a row breaks a rule or its job
+    number is already taken.
+    """
+    if jobs.empty:
+        return 0
+
+    check_job_rows(conn, jobs, replace_existing=False)
+    columns_sql, values_sql, params = _job_values_sql(jobs)
+    result = conn.execute(
+        text(
+            f"""
+            INSERT INTO jobs ({columns_sql})
+            VALUES {values_sql}
+            ON CONFLICT ({_job_key_sql("idempotency_key")}) DO NOTHING
+            """
+        ),
+        params,
+    )
+    return int(result.rowcount or 0)
+
+
+# Partitioned tables only: their live key includes production_date, so a resend with a
+# corrected date would not conflict. Moving the live row to the new date first lets the
+# upsert below find it. Served by jobs_customer_job_number_idx.
+MOVE_RESENT_JOBS_SQL = """
+    UPDATE jobs AS j
+    SET production_date = k.production_date
+    FROM unnest(CAST(:customer_ids AS integer[]), CAST(:job_numbers AS text[]), CAST(:production_dates AS date[]))
+        AS k(customer_id, job_number, production_date)
+    WHERE j.customer_id = k.customer_id
+      AND j.job_number = k.job_number
+      AND j.deleted_at IS NULL
+      AND j.production_date <> k.production_date
+"""
+
+
+def upsert_job_rows(conn, jobs: pd.DataFrame, replace_existing: bool = True) -> int:
+    """Single INSERT ... ON CONFLICT (customer_id, job_number) DO UPDATE on an open connection.
+
+    Soft-deleted rows do not hold the key, so re-entering a deleted job inserts a new row.
+    Raises JobValidationError, before writing anything, if a row breaks a rule or, with
+    `replace_existing` off, would overwrite a job entered by another submission.
+
+    On a partitioned jobs table the unique key also includes production_date (see
+    partition_jobs_table); a job resent with another date still updates its live row,
+    which is first moved to the new date.
+    """
+    if jobs.empty:
+        return 0
+
+    check_job_rows(conn, jobs, replace_existing)
+    # Postgres refuses to update the same row twice in one statement, so the last copy wins
+    rows = jobs.assign(
+        job_number=jobs["job_number"].astype(str).str.strip(),
+        production_date=_production_dates(jobs["production_date"]).dt.date,
+    )
+    rows = rows.drop_duplicates(subset=["customer_id", "job_number"], keep="last")
+    key = _job_key_sql("customer_id", "job_number")
+    if key != "customer_id, job_number":
+        conn.execute(
+            text(MOVE_RESENT_JOBS_SQL),
+            {
+                "customer_ids": rows["customer_id"].astype(int).tolist(),
+                "job_numbers": rows["job_number"].tolist(),
+                "production_dates": rows["production_date"].tolist(),
+            },
+        )
+
+    columns_sql, values_sql, params = _job_values_sql(rows)
+    result = conn.execute(
+        text(
+            f"""
+            INSERT INTO jobs ({columns_sql})
+            VALUES {values_sql}
+            ON CONFLICT ({key}) WHERE deleted_at IS NULL DO UPDATE SET
+                production_date = EXCLUDED.production_date,
+                total_pieces = EXCLUDED.total_pieces,
+                total_impressions = EXCLUDED.total_impressions,
+                total_damages = EXCLUDED.total_damages,
+                error_rate = EXCLUDED.error_rate,
+                notes = EXCLUDED.notes,
+                idempotency_key = COALESCE(EXCLUDED.idempotency_key, jobs.idempotency_key)
+            """
+        ),
+        params,
+    )
+    return int(result.rowcount or 0)
+
+
+def upsert_jobs(jobs: pd.DataFrame) -> int:
+    """Insert or update many jobs keyed by (customer_id, job_number); safe to retry."""
+    eng = get_engine()
+    with eng.begin() as conn:
+        return upsert_job_rows(conn, jobs)
+
+
+def add_jobs(jobs: pd.DataFrame) -> int:
+    """Insert many jobs in one transaction using a single multi-row INSERT."""
+    eng = get_engine()
+    with eng.begin() as conn:
+        return insert_job_rows(conn, jobs)
+
+
+JOB_CORRECTABLE_COLUMNS = (
+    "customer_id",
+    "production_date",
+    "total_pieces",
+    "total_impressions",
+    "total_damages",
+    "notes",
+)
+
+
+@dataclass(frozen=True)
+class JobFilter:
+    """Which live jobs a bulk operation touches. A filter with no criteria matches nothing."""
+
+    customer_id: int = None
+    start_date: date = None
+    end_date: date = None
+    job_number_pattern: str = ""
+    ids: tuple = ()
+
+    def is_empty(self) -> bool:
+        return (
+            self.customer_id is None
+            and self.start_date is None
+            and self.end_date is None
+            and not self.job_number_pattern.strip()
+            and not self.ids
+        )
+
+    def where_sql(self):
+        """WHERE clause over alias `j` and its bind params."""
+        if self.is_empty():
+            raise ValueError("Pick at least one filter before running a bulk operation")
+
+        clauses, params = ["j.deleted_at IS NULL"], {}
+        if self.customer_id is not None:
+            clauses.append("j.customer_id = :f_customer_id")
+            params["f_customer_id"] = int(self.customer_id)
+        if self.start_date is not None:
+            clauses.append("j.production_date >= :f_start_date")
+            params["f_start_date"] = self.start_date
+        if self.end_date is not None:
+            clauses.append("j.production_date <= :f_end_date")
+            params["f_end_date"] = self.end_date
+        if self.job_number_pattern.strip():
+            # '*' is the only wildcard; LIKE metacharacters in job numbers match literally
+            pattern = self.job_number_pattern.strip()
+            for char in ("\\", "%", "_"):
+                pattern = pattern.replace(char, "\\" + char)
+            clauses.append("j.job_number ILIKE :f_job_number")
+            params["f_job_number"] = pattern.replace("*", "%")
+        if self.ids:
+            clauses.append("j.id = ANY(:f_ids)")
+            params["f_ids"] = [int(i) for i in self.ids]
+        return " AND ".join(clauses), params
+
+
+def preview_job_filter(job_filter: JobFilter, limit: int = 20):
+    """Dry run: the number of matching jobs and the most recent few of them."""
+    where_sql, params = job_filter.where_sql()
+    eng = get_engine()
+    with eng.connect() as conn:
+        count = conn.execute(text(f"SELECT COUNT(*) FROM jobs j WHERE {where_sql}"), params).scalar_one()
+        sample = pd.read_sql(
+            text(
+                f"""
+                SELECT j.id, c.customer_name, j.job_number, j.production_date,
+                       j.total_pieces, j.total_impressions, j.total_damages, j.error_rate
+                FROM jobs j
+                JOIN customers c ON j.customer_id = c.id
+                WHERE {where_sql}
+                ORDER BY j.production_date DESC, j.id DESC
+                LIMIT :limit
+                """
+            ),
+            conn,
+            params={**params, "limit": int(limit)},
+        )
+    return int(count), sample
+
+
+def soft_delete_jobs(job_filter: JobFilter) -> dict:
+    """Mark every matching job deleted in one statement; returns the undo batch id and count."""
+    where_sql, params = job_filter.where_sql()
+    batch = uuid.uuid4().hex
+    eng = get_engine()
+    with eng.begin() as conn:
+        result = conn.execute(
+            text(
+                f"""
+                UPDATE jobs AS j
+                SET deleted_at = CURRENT_TIMESTAMP, delete_batch = :batch
+                WHERE {where_sql}
+                """
+            ),
+            {**params, "batch": batch},
+        )
+    invalidate_job_caches()
+    return {"batch": batch, "deleted": int(result.rowcount or 0)}
+
+
+def delete_job(job_id: int) -> dict:
+    return soft_delete_jobs(JobFilter(ids=(int(job_id),)))
+
+
+def restore_jobs(batch: str) -> int:
+    """Undo a soft delete inside the undo window.
+
+    Jobs whose number was re-entered since the delete stay deleted, so the restore never
+    produces duplicates. Returns the number of jobs restored.
+    Raises ValueError for a batch deleted by merge_customers, which cannot be undone.
+    """
+    if batch.startswith(MERGE_DELETE_BATCH_PREFIX):
+        raise ValueError("Jobs set aside by a customer merge cannot be restored")
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        result = conn.execute(
+            text(
+                f"""
+                UPDATE jobs AS j
+                SET deleted_at = NULL, delete_batch = NULL
+                WHERE j.delete_batch = :batch
+                  AND j.deleted_at >= CURRENT_TIMESTAMP - INTERVAL '{JOB_UNDO_WINDOW_HOURS} hours'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM live_jobs l
+                      WHERE l.customer_id = j.customer_id AND l.job_number = j.job_number
+                  )
+                """
+            ),
+            {"batch": batch},
+        )
+    invalidate_job_caches()
+    return int(result.rowcount or 0)
+
+
+def get_recent_deletions() -> pd.DataFrame:
+    """Soft-delete batches that can still be undone, newest first; customer merges are left out."""
+    eng = get_engine()
+    with eng.connect() as conn:
+        return pd.read_sql(
+            text(
+                f"""
+                SELECT
+                    j.delete_batch AS batch,
+                    MAX(j.deleted_at) AS deleted_at,
+                    COUNT(*) AS jobs,
+                    STRING_AGG(DISTINCT c.customer_name, ', ') AS customers
+                FROM jobs j
+                JOIN customers c ON j.customer_id = c.id
+                WHERE j.deleted_at >= CURRENT_TIMESTAMP - INTERVAL '{JOB_UNDO_WINDOW_HOURS} hours'
+                  AND COALESCE(j.delete_batch, '') NOT LIKE :merge_batches
+                GROUP BY j.delete_batch
+                ORDER BY MAX(j.deleted_at) DESC
+                """
+            ),
+            conn,
+            params={"merge_batches": f"{MERGE_DELETE_BATCH_PREFIX}%"},
+        )
+
+
+def correct_jobs(job_filter: JobFilter, changes: dict) -> int:
+    """Set the given columns on every matching job in one statement; error_rate follows.
+
+    The corrected rows go through validate_job_rows in the same transaction, locked, before
+    the UPDATE; if any breaks a rule, JobValidationError names each job and nothing changes.
+    Raises IntegrityError if the change would give two live jobs the same job number.
+    """
+    unknown = set(changes) - set(JOB_CORRECTABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Cannot bulk-correct {', '.join(sorted(unknown))}")
+    if not changes:
+        return 0
+
+    where_sql, params = job_filter.where_sql()
+    set_sql = [f"{col} = :set_{col}" for col in changes]
+    params.update({f"set_{col}": value for col, value in changes.items()})
+
+    # SET expressions see the old row, so the new error rate uses the new values directly
+    pieces = ":set_total_pieces" if "total_pieces" in changes else "j.total_pieces"
+    damages = ":set_total_damages" if "total_damages" in changes else "j.total_damages"
+    if "total_pieces" in changes or "total_damages" in changes:
+        set_sql.append(f"error_rate = CASE WHEN {pieces} > 0 THEN {damages} * 100.0 / {pieces} ELSE 0 END")
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        current = pd.read_sql(
+            text(
+                f"""
+                SELECT j.customer_id, j.job_number, j.production_date,
+                       j.total_pieces, j.total_impressions, j.total_damages
+                FROM jobs j
+                WHERE {where_sql}
+                ORDER BY j.id
+                FOR UPDATE
+                """
+            ),
+            conn,
+            params=params,
+        )
+        corrected = current.assign(**{col: value for col, value in changes.items() if col in current.columns})
+        errors = validate_job_rows(corrected)
+        if errors and not current.empty:
+            job_numbers = current["job_number"]
+            raise JobValidationError(
+                [JobRowError(None, e.field, f"Job {job_numbers.iat[e.row - 1]}: {e.message}") for e in errors]
+            )
+        result = conn.execute(text(f"UPDATE jobs AS j SET {', '.join(set_sql)} WHERE {where_sql}"), params)
+    invalidate_job_caches()
+    return int(result.rowcount or 0)
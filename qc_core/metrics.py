@@ -0,0 +1,53 @@
+"""Rate, formatting and forecasting helpers shared by the data layer, the reports and the app."""
+
+import pandas as pd
+
+
+# ----------------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------------
+def fmt_mmddyyyy(val):
+    """Format a date/datetime/series to MM/DD/YYYY for UI display."""
+    try:
+        if isinstance(val, pd.Series):
+            return pd.to_datetime(val, errors="coerce").dt.strftime("%m/%d/%Y")
+        return pd.to_datetime(val, errors="coerce").strftime("%m/%d/%Y")
+    except Exception:
+        return ""
+
+def safe_rate(numerator, denominator, scale: float = 100.0) -> pd.Series:
+    """Vectorized numerator / denominator * scale; 0 where the denominator is not positive."""
+    num = pd.to_numeric(numerator, errors="coerce")
+    den = pd.to_numeric(denominator, errors="coerce")
+    return (num / den.where(den > 0) * scale).fillna(0.0)
+
+
+# ----------------------------------------------------------------------------
+# Forecasting
+# ----------------------------------------------------------------------------
+def ewma_rate_forecast(
+    damages: pd.DataFrame, volume: pd.DataFrame, alpha: float, scale: float = 100.0
+) -> pd.DataFrame:
+    """Next-period rate for every row at once from exponentially weighted period totals.
+
+    Rows are series (customers) and columns are periods, oldest first; both frames share
+    one shape. Damages and volume are weighted separately, so a thin month moves the
+    forecast less than a busy one. Each step is a matrix-vector product over all rows.
+    Returns projected_rate, previous_projection (the same forecast one period earlier)
+    and weighted_volume; rates are NaN where there is no weighted volume.
+    """
+
+    def level(d: pd.DataFrame, v: pd.DataFrame) -> tuple:
+        ages = pd.Series(range(d.shape[1] - 1, -1, -1), index=d.columns, dtype=float)
+        weights = alpha * (1.0 - alpha) ** ages
+        return d.dot(weights), v.dot(weights)
+
+    d_now, v_now = level(damages, volume)
+    d_prev, v_prev = level(damages.iloc[:, :-1], volume.iloc[:, :-1])
+    return pd.DataFrame(
+        {
+            "projected_rate": d_now / v_now.where(v_now > 0) * scale,
+            "previous_projection": d_prev / v_prev.where(v_prev > 0) * scale,
+            "weighted_volume": v_now,
+        }
+    )
@@ -0,0 +1,636 @@
+"""Read queries behind the pages: job lists, customer stats, rollups, comparisons, rankings, forecasts."""
+
+import json
+
+import pandas as pd
+from sqlalchemy import text
+
+from .archive import read_archived_jobs
+from .cache import cache_data
+from .customers import get_all_customers
+from .db import get_engine
+from .metrics import ewma_rate_forecast, safe_rate
+from .snapshots import serves_snapshot
+
+
+# Sum-based aggregates read live jobs plus the per-day totals kept for archived years.
+# Filters on production_date are pushed into both branches, so partitions still prune.
+JOB_FACTS_SQL = """
+    SELECT customer_id, production_date, 1 AS jobs, total_pieces, total_impressions, total_damages
+    FROM live_jobs
+    UNION ALL
+    SELECT customer_id, production_date, jobs, total_pieces, total_impressions, total_damages
+    FROM jobs_archive_daily
+"""
+
+ALL_JOBS_SQL = """
+    SELECT j.*, c.customer_name
+    FROM live_jobs j
+    JOIN customers c ON j.customer_id = c.id
+    ORDER BY j.production_date DESC, j.date_entered DESC
+"""
+
+
+def get_all_jobs() -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(ALL_JOBS_SQL),
+            conn,
+        )
+
+    if not df.empty and "production_date" in df.columns:
+        df["production_date"] = pd.to_datetime(df["production_date"])
+
+    archived = read_archived_jobs()
+    if not archived.empty:
+        df = pd.concat([df, archived], ignore_index=True).sort_values(
+            ["production_date", "date_entered"], ascending=False, ignore_index=True
+        )
+
+    return df
+
+
+JOBS_BY_CUSTOMER_SQL = """
+    SELECT j.*, c.customer_name
+    FROM live_jobs j
+    JOIN customers c ON j.customer_id = c.id
+    WHERE j.customer_id = :cid
+    ORDER BY j.production_date DESC
+"""
+
+JOBS_BY_CUSTOMER_RANGE_SQL = """
+    SELECT j.*, c.customer_name
+    FROM live_jobs j
+    JOIN customers c ON j.customer_id = c.id
+    WHERE j.customer_id = :cid AND j.production_date BETWEEN :sd AND :ed
+    ORDER BY j.production_date DESC
+"""
+
+
+def get_jobs_by_customer(customer_id: int, start_date=None, end_date=None) -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        if start_date and end_date:
+            df = pd.read_sql(
+                text(JOBS_BY_CUSTOMER_RANGE_SQL),
+                conn,
+                params={"cid": int(customer_id), "sd": start_date, "ed": end_date},
+            )
+        else:
+            df = pd.read_sql(
+                text(JOBS_BY_CUSTOMER_SQL),
+                conn,
+                params={"cid": int(customer_id)},
+            )
+
+    if not df.empty and "production_date" in df.columns:
+        df["production_date"] = pd.to_datetime(df["production_date"])
+
+    archived = read_archived_jobs(start_date, end_date, customer_id)
+    if not archived.empty:
+        df = pd.concat([df, archived], ignore_index=True).sort_values(
+            "production_date", ascending=False, ignore_index=True
+        )
+
+    return df
+
+
+JOBS_BY_DATE_RANGE_SQL = """
+    SELECT j.*, c.customer_name
+    FROM live_jobs j
+    JOIN customers c ON j.customer_id = c.id
+    WHERE j.production_date BETWEEN :sd AND :ed
+    ORDER BY j.production_date DESC
+"""
+
+
+def get_jobs_by_date_range(start_date, end_date) -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(JOBS_BY_DATE_RANGE_SQL),
+            conn,
+            params={"sd": start_date, "ed": end_date},
+        )
+
+    if not df.empty and "production_date" in df.columns:
+        df["production_date"] = pd.to_datetime(df["production_date"])
+
+    archived = read_archived_jobs(start_date, end_date)
+    if not archived.empty:
+        df = pd.concat([df, archived], ignore_index=True).sort_values(
+            "production_date", ascending=False, ignore_index=True
+        )
+
+    return df
+
+
+CUSTOMER_STATS_SQL = f"""
+    SELECT
+        c.customer_name,
+        c.target_error_rate,
+        COALESCE(SUM(j.jobs), 0) AS total_jobs,
+        COALESCE(SUM(j.total_pieces), 0) AS total_pieces,
+        COALESCE(SUM(j.total_impressions), 0) AS total_impressions,
+        COALESCE(SUM(j.total_damages), 0) AS total_damages,
+        CASE
+            WHEN COALESCE(SUM(j.total_pieces), 0) > 0
+            THEN (COALESCE(SUM(j.total_damages), 0) * 100.0 / COALESCE(SUM(j.total_pieces), 0))
+            ELSE 0
+        END AS error_rate,
+        CASE
+            WHEN COALESCE(SUM(j.total_impressions), 0) > 0
+            THEN (COALESCE(SUM(j.total_damages), 0) * 100.0 / COALESCE(SUM(j.total_impressions), 0))
+            ELSE 0
+        END AS error_rate_impressions
+    FROM customers c
+    LEFT JOIN ({JOB_FACTS_SQL}) j ON c.id = j.customer_id
+    WHERE c.active = 1
+    GROUP BY c.id, c.customer_name, c.target_error_rate
+    HAVING COALESCE(SUM(j.jobs), 0) > 0
+    ORDER BY error_rate DESC
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+@serves_snapshot()
+def get_customer_stats() -> pd.DataFrame:
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(CUSTOMER_STATS_SQL),
+            conn,
+        )
+    return df
+
+
+# Label -> (date_trunc unit, pandas period, plotly dtick, tick format)
+TIME_GRAINS = {
+    "Day": ("day", "D", None, "%b %d, %Y"),
+    "Week": ("week", "W-SUN", None, "%b %d, %Y"),
+    "Month": ("month", "M", "M1", "%b %Y"),
+    "Quarter": ("quarter", "Q", "M3", "Q%q %Y"),
+}
+
+
+ROLLUP_SQL = f"""
+    SELECT
+        date_trunc(:unit, j.production_date) AS period,
+        SUM(j.jobs)::bigint AS jobs,
+        SUM(j.total_pieces)::bigint AS total_pieces,
+        SUM(j.total_impressions)::bigint AS total_impressions,
+        SUM(j.total_damages)::bigint AS total_damages
+    FROM ({JOB_FACTS_SQL}) j
+    WHERE j.production_date BETWEEN :sd AND :ed
+      AND (CAST(:cid AS INTEGER) IS NULL OR j.customer_id = :cid)
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+@serves_snapshot(*({"customer_id": None, "grain": grain} for grain in TIME_GRAINS))
+def get_rollup(customer_id, grain: str, start_date, end_date) -> pd.DataFrame:
+    """Job totals and error rates per time bucket, aggregated in Postgres.
+
+    `grain` is a TIME_GRAINS label; `customer_id=None` rolls up all customers.
+    Cached per (customer, grain, range) so switching grains never refetches jobs.
+    """
+    unit = TIME_GRAINS[grain][0]
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(ROLLUP_SQL),
+            conn,
+            params={
+                "unit": unit,
+                "sd": start_date,
+                "ed": end_date,
+                "cid": None if customer_id is None else int(customer_id),
+            },
+        )
+
+    df["period"] = pd.to_datetime(df["period"])
+    df["error_rate"] = safe_rate(df["total_damages"], df["total_pieces"], 100.0)
+    df["error_rate_impressions"] = safe_rate(df["total_damages"], df["total_impressions"], 100.0)
+    df["good_pieces"] = (df["total_pieces"] - df["total_damages"]).clip(lower=0)
+    return df
+
+
+PERIOD_COMPARISON_SQL = f"""
+    WITH bounds AS (
+        SELECT
+            CAST(:sd AS DATE) AS sd,
+            CAST(:ed AS DATE) AS ed,
+            CAST(:ed AS DATE) - CAST(:sd AS DATE) + 1 AS span_days
+    ),
+    monthly AS (
+        SELECT
+            j.customer_id,
+            date_trunc('month', j.production_date) AS production_month,
+            CASE WHEN j.production_date >= b.sd THEN 1 ELSE 0 END AS is_current,
+            SUM(j.jobs) AS jobs,
+            SUM(j.total_pieces) AS total_pieces,
+            SUM(j.total_impressions) AS total_impressions,
+            SUM(j.total_damages) AS total_damages
+        FROM ({JOB_FACTS_SQL}) j
+        CROSS JOIN bounds b
+        -- bounds repeated as plain expressions so the planner can prune partitions
+        WHERE j.production_date
+            BETWEEN CAST(:sd AS DATE) - (CAST(:ed AS DATE) - CAST(:sd AS DATE) + 1) AND CAST(:ed AS DATE)
+        GROUP BY 1, 2, 3
+    ),
+    periods AS (
+        SELECT
+            customer_id,
+            is_current,
+            SUM(jobs)::bigint AS jobs,
+            SUM(total_pieces)::bigint AS total_pieces,
+            SUM(total_impressions)::bigint AS total_impressions,
+            SUM(total_damages)::bigint AS total_damages
+        FROM monthly
+        GROUP BY GROUPING SETS ((customer_id, is_current), (is_current))
+    ),
+    grid AS (
+        -- every customer (and the total) gets both periods, even with no jobs in one of them
+        SELECT k.customer_id, p.is_current
+        FROM (SELECT DISTINCT customer_id FROM periods) k
+        CROSS JOIN (VALUES (0), (1)) AS p(is_current)
+    ),
+    compared AS (
+        SELECT
+            g.customer_id,
+            g.is_current,
+            COALESCE(p.jobs, 0) AS jobs,
+            COALESCE(p.total_damages, 0) AS total_damages,
+            (p.total_damages * 100.0 / NULLIF(p.total_pieces, 0))::float8 AS error_rate,
+            (p.total_damages * 100.0 / NULLIF(p.total_impressions, 0))::float8 AS error_rate_impressions
+        FROM grid g
+        LEFT JOIN periods p
+            ON p.customer_id IS NOT DISTINCT FROM g.customer_id
+           AND p.is_current = g.is_current
+    ),
+    windowed AS (
+        SELECT
+            customer_id,
+            is_current,
+            jobs,
+            total_damages,
+            error_rate,
+            error_rate_impressions,
+            LAG(jobs) OVER w AS prev_jobs,
+            LAG(total_damages) OVER w AS prev_total_damages,
+            LAG(error_rate) OVER w AS prev_error_rate,
+            LAG(error_rate_impressions) OVER w AS prev_error_rate_impressions
+        FROM compared
+        WINDOW w AS (PARTITION BY customer_id ORDER BY is_current)
+    )
+    SELECT
+        w.customer_id,
+        COALESCE(c.customer_name, 'All Customers') AS customer_name,
+        w.jobs,
+        w.prev_jobs,
+        w.jobs - w.prev_jobs AS jobs_delta,
+        w.total_damages,
+        w.prev_total_damages,
+        w.total_damages - w.prev_total_damages AS total_damages_delta,
+        w.error_rate,
+        w.prev_error_rate,
+        w.error_rate - w.prev_error_rate AS error_rate_delta,
+        w.error_rate_impressions,
+        w.prev_error_rate_impressions,
+        w.error_rate_impressions - w.prev_error_rate_impressions AS error_rate_impressions_delta
+    FROM windowed w
+    LEFT JOIN customers c ON c.id = w.customer_id
+    WHERE w.is_current = 1
+      AND (w.customer_id IS NULL OR c.active = 1)
+    ORDER BY w.customer_id IS NOT NULL, customer_name
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+def get_period_comparison(start_date, end_date) -> pd.DataFrame:
+    """Current range vs the equally long range just before it, per customer plus an all-customers row.
+
+    Monthly aggregates are rolled into the two periods and compared with LAG() in one query.
+    The all-customers row has a null customer_id.
+    """
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(PERIOD_COMPARISON_SQL),
+            conn,
+            params={"sd": start_date, "ed": end_date},
+        )
+    return df
+
+
+# Rankings shrink each customer's rate toward the company rate by this much volume
+# (impressions or pieces): a customer with this much volume is weighted half and half.
+RANKING_PRIOR_WEIGHT = 5000
+RANKING_MIN_VOLUME = 2000
+RANKING_BASES = {"impressions": "total_impressions", "pieces": "total_pieces"}
+
+# {volume} and {direction} are filled from RANKING_BASES and the worst flag
+CUSTOMER_RANKING_SQL = f"""
+    WITH per_customer AS (
+        SELECT
+            j.customer_id,
+            SUM(j.jobs)::bigint AS jobs,
+            SUM(j.total_pieces)::bigint AS total_pieces,
+            SUM(j.total_impressions)::bigint AS total_impressions,
+            SUM(j.total_damages)::bigint AS total_damages
+        FROM ({JOB_FACTS_SQL}) j
+        WHERE j.production_date BETWEEN :sd AND :ed
+        GROUP BY j.customer_id
+    ),
+    prior AS (
+        SELECT SUM(total_damages)::float8 / NULLIF(SUM({{volume}}), 0) AS rate
+        FROM per_customer
+    )
+    SELECT
+        p.customer_id,
+        c.customer_name,
+        p.jobs,
+        p.total_pieces,
+        p.total_impressions,
+        p.total_damages,
+        (p.total_damages * 100.0 / NULLIF(p.total_pieces, 0))::float8 AS error_rate,
+        (p.total_damages * 100.0 / NULLIF(p.total_impressions, 0))::float8 AS error_rate_impressions,
+        ((p.total_damages + :weight * COALESCE(pr.rate, 0)) * 100.0 / (p.{{volume}} + :weight))::float8
+            AS smoothed_rate
+    FROM per_customer p
+    CROSS JOIN prior pr
+    JOIN customers c ON c.id = p.customer_id AND c.active = 1
+    WHERE p.{{volume}} >= :min_volume
+    ORDER BY smoothed_rate {{direction}}, c.customer_name
+    LIMIT :limit
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+@serves_snapshot(*({"basis": basis, "worst": worst} for basis in RANKING_BASES for worst in (False, True)))
+def get_customer_ranking(
+    start_date,
+    end_date,
+    basis: str = "impressions",
+    worst: bool = False,
+    limit: int = 10,
+    min_volume: int = RANKING_MIN_VOLUME,
+) -> pd.DataFrame:
+    """Best (or worst) active customers by Bayesian-smoothed error rate over a date range.
+
+    smoothed_rate = (damages + w * company_rate) / (volume + w) * 100, where volume is
+    impressions or pieces per `basis`. Small customers sit near the company rate instead
+    of topping the list on one clean job. Customers under `min_volume` are left out.
+    Only `limit` rows leave Postgres.
+    """
+    volume = RANKING_BASES[basis]
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(CUSTOMER_RANKING_SQL.format(volume=volume, direction="DESC" if worst else "ASC")),
+            conn,
+            params={
+                "sd": start_date,
+                "ed": end_date,
+                "weight": RANKING_PRIOR_WEIGHT,
+                "min_volume": int(min_volume),
+                "limit": int(limit),
+            },
+        )
+    return df
+
+
+# Customers past the top K by volume share one row in the customer x month matrix
+MATRIX_TOP_K = 25
+MATRIX_OTHER_LABEL = "All other customers"
+
+# {volume} is filled from RANKING_BASES. Each row's months pivot into one jsonb object of
+# "YYYY-MM" -> [damages, volume], so at most top_k + 1 rows leave Postgres.
+CUSTOMER_MONTH_MATRIX_SQL = f"""
+    WITH monthly AS (
+        SELECT
+            j.customer_id,
+            date_trunc('month', j.production_date) AS month,
+            SUM(j.total_damages)::bigint AS total_damages,
+            SUM(j.{{volume}})::bigint AS volume
+        FROM ({JOB_FACTS_SQL}) j
+        WHERE j.production_date BETWEEN :sd AND :ed
+        GROUP BY 1, 2
+    ),
+    ranked AS (
+        SELECT
+            m.customer_id,
+            c.customer_name,
+            ROW_NUMBER() OVER (ORDER BY SUM(m.volume) DESC, c.customer_name) AS volume_rank
+        FROM monthly m
+        JOIN customers c ON c.id = m.customer_id AND c.active = 1
+        GROUP BY m.customer_id, c.customer_name
+    ),
+    bucketed AS (
+        SELECT
+            LEAST(r.volume_rank, :top_k + 1) AS row_rank,
+            CASE WHEN r.volume_rank <= :top_k THEN r.customer_name ELSE :other END AS customer_name,
+            m.month,
+            SUM(m.total_damages)::bigint AS total_damages,
+            SUM(m.volume)::bigint AS volume
+        FROM monthly m
+        JOIN ranked r ON r.customer_id = m.customer_id
+        GROUP BY 1, 2, 3
+    )
+    SELECT
+        customer_name,
+        SUM(volume)::bigint AS volume,
+        jsonb_object_agg(to_char(month, 'YYYY-MM'), jsonb_build_array(total_damages, volume)) AS months
+    FROM bucketed
+    GROUP BY row_rank, customer_name
+    ORDER BY row_rank
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+@serves_snapshot(*({"basis": basis} for basis in RANKING_BASES))
+def get_customer_month_matrix(
+    start_date, end_date, basis: str = "impressions", top_k: int = MATRIX_TOP_K
+) -> pd.DataFrame:
+    """Error rate (%) per customer (rows) and production month (columns) over a date range.
+
+    Rows are the `top_k` active customers by impressions or pieces per `basis`, busiest
+    first, then one MATRIX_OTHER_LABEL row for everyone else. Postgres groups and pivots,
+    so the frame is built from a few thousand cells rather than job rows. Months without
+    jobs are NaN; the `volume` column holds each row's total for the range.
+    """
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(CUSTOMER_MONTH_MATRIX_SQL.format(volume=RANKING_BASES[basis])),
+            conn,
+            params={"sd": start_date, "ed": end_date, "top_k": int(top_k), "other": MATRIX_OTHER_LABEL},
+        )
+
+    months = pd.date_range(pd.Timestamp(start_date).replace(day=1), pd.Timestamp(end_date), freq="MS")
+    if df.empty:
+        return pd.DataFrame(columns=list(months) + ["volume"])
+
+    cells = pd.DataFrame(
+        [
+            (name, month, damages, volume)
+            for name, by_month in zip(df["customer_name"], df["months"])
+            for month, (damages, volume) in (json.loads(by_month) if isinstance(by_month, str) else by_month).items()
+        ],
+        columns=["customer_name", "month", "total_damages", "volume"],
+    )
+    cells["month"] = pd.to_datetime(cells["month"], format="%Y-%m")
+    totals = cells.pivot(index="customer_name", columns="month")
+    rates = totals["total_damages"] / totals["volume"].where(totals["volume"] > 0) * 100.0
+
+    matrix = rates.reindex(index=df["customer_name"], columns=months)
+    matrix.columns.name = None
+    matrix["volume"] = df["volume"].to_numpy()
+    return matrix
+
+
+# Next-month forecasts look back this many months; each month counts (1 - FORECAST_ALPHA)
+# times as much as the month after it
+FORECAST_HISTORY_MONTHS = 12
+FORECAST_ALPHA = 0.4
+
+# Moves on every job insert, edit, delete and archive, from any process: the jobs_log_change
+# and jobs_log_insert triggers write to job_changes in the writer's own transaction
+JOB_DATA_VERSION_SQL = "SELECT COALESCE(MAX(seq), 0) FROM job_changes"
+
+# {volume} is filled from RANKING_BASES
+FORECAST_HISTORY_SQL = f"""
+    SELECT
+        j.customer_id,
+        date_trunc('month', j.production_date)::date AS month,
+        SUM(j.total_damages)::bigint AS total_damages,
+        SUM(j.{{volume}})::bigint AS volume
+    FROM ({JOB_FACTS_SQL}) j
+    WHERE j.production_date >= :sd
+    GROUP BY 1, 2
+"""
+
+FORECAST_COLUMNS = [
+    "customer_id",
+    "projected_rate",
+    "previous_projection",
+    "weighted_volume",
+    "latest_month_rate",
+    "months_with_jobs",
+]
+
+
+@cache_data(ttl=86400, job_data=True)
+def _customer_forecast(version: int, basis: str, months: int, alpha: float) -> pd.DataFrame:
+    # `version` only keys the cache, so a new job anywhere recomputes the forecast
+    first_month = pd.Timestamp.today().normalize().replace(day=1) - pd.DateOffset(months=months - 1)
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        history = pd.read_sql(
+            text(FORECAST_HISTORY_SQL.format(volume=RANKING_BASES[basis])),
+            conn,
+            params={"sd": first_month.date()},
+        )
+    if history.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    history["month"] = pd.to_datetime(history["month"])
+    month_index = pd.date_range(first_month, periods=months, freq="MS")
+    damages, volume = (
+        history.pivot(index="customer_id", columns="month", values=column)
+        .reindex(columns=month_index)
+        .fillna(0)
+        for column in ("total_damages", "volume")
+    )
+
+    forecast = ewma_rate_forecast(damages, volume, alpha)
+    latest = volume.iloc[:, -1]
+    forecast["latest_month_rate"] = damages.iloc[:, -1] / latest.where(latest > 0) * 100.0
+    forecast["months_with_jobs"] = (volume > 0).sum(axis=1)
+    return forecast.rename_axis("customer_id").reset_index()[FORECAST_COLUMNS]
+
+
+def get_customer_forecast(
+    basis: str = "impressions", months: int = FORECAST_HISTORY_MONTHS, alpha: float = FORECAST_ALPHA
+) -> pd.DataFrame:
+    """Projected next-month error rate against target for every active customer.
+
+    The projection is an exponentially weighted average of the last `months` monthly
+    totals (see ewma_rate_forecast), fitted for all customers in one pass. It is cached
+    until the job change log moves, which any job write from any process does (the
+    ingest server's included), so reruns cost one indexed MAX(seq). Names and
+    targets are joined on every call, so a new target shows at once. Sorted by how far
+    the projection is over target; `gap` is in percentage points.
+    """
+    eng = get_engine()
+    with eng.connect() as conn:
+        version = int(conn.execute(text(JOB_DATA_VERSION_SQL)).scalar_one())
+    forecast = _customer_forecast(version, basis, int(months), float(alpha))
+
+    customers = get_all_customers()[["id", "customer_name", "target_error_rate"]]
+    df = customers.rename(columns={"id": "customer_id"}).merge(forecast, on="customer_id")
+    df["target_error_rate"] = df["target_error_rate"].fillna(2.0).astype(float)
+    df["gap"] = df["projected_rate"] - df["target_error_rate"]
+    df["likely_to_miss"] = df["gap"] > 0
+    return df.sort_values("gap", ascending=False, na_position="last", ignore_index=True)
+
+
+DAMAGE_DISTRIBUTION_SQL = """
+    WITH job_rates AS (
+        SELECT
+            customer_id,
+            total_damages * 1000.0 / total_impressions AS damages_per_1000
+        FROM live_jobs
+        WHERE production_date BETWEEN :sd AND :ed
+          AND total_impressions > 0
+    ),
+    dist AS (
+        SELECT
+            customer_id,
+            COUNT(*) AS jobs,
+            AVG(damages_per_1000)::float8 AS mean_damages_per_1000,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY damages_per_1000) AS p50_damages_per_1000,
+            percentile_cont(0.9) WITHIN GROUP (ORDER BY damages_per_1000) AS p90_damages_per_1000,
+            percentile_cont(0.99) WITHIN GROUP (ORDER BY damages_per_1000) AS p99_damages_per_1000,
+            VAR_SAMP(damages_per_1000)::float8 AS variance_damages_per_1000,
+            STDDEV_SAMP(damages_per_1000)::float8 AS stddev_damages_per_1000
+        FROM job_rates
+        GROUP BY GROUPING SETS ((customer_id), ())
+    )
+    SELECT
+        d.customer_id,
+        COALESCE(c.customer_name, 'All Customers') AS customer_name,
+        d.jobs,
+        d.mean_damages_per_1000,
+        d.p50_damages_per_1000,
+        d.p90_damages_per_1000,
+        d.p99_damages_per_1000,
+        d.variance_damages_per_1000,
+        d.stddev_damages_per_1000
+    FROM dist d
+    LEFT JOIN customers c ON c.id = d.customer_id
+    WHERE d.customer_id IS NULL OR c.active = 1
+    ORDER BY d.customer_id IS NOT NULL, d.p90_damages_per_1000 DESC
+"""
+
+
+@cache_data(ttl=300, job_data=True)
+@serves_snapshot()
+def get_damage_distribution(start_date, end_date) -> pd.DataFrame:
+    """Job-level spread of damages per 1,000 impressions, per customer plus a company-wide row.
+
+    Quantiles come from percentile_cont in Postgres, so jobs are never pulled into pandas.
+    The company-wide row has a null customer_id. Jobs with no impressions are excluded, and
+    so are archived years, whose job rows are no longer in Postgres.
+    """
+    eng = get_engine("analytics")
+    with eng.connect() as conn:
+        df = pd.read_sql(
+            text(DAMAGE_DISTRIBUTION_SQL),
+            conn,
+            params={"sd": start_date, "ed": end_date},
+        )
+    return df
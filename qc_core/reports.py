@@ -0,0 +1,181 @@
+"""Excel report workbooks."""
+
+from io import BytesIO
+
+import pandas as pd
+
+from .metrics import fmt_mmddyyyy
+
+
+def build_job_workbook(jobs: pd.DataFrame, title: str, start_date, end_date, target_rate: float) -> bytes:
+    """Summary, monthly rollup and job detail sheets with native charts, from one jobs frame.
+
+    Written with xlsxwriter's constant_memory mode, which flushes each row to disk as it
+    is written, so the workbook never holds a multi-year job list in memory twice.
+    """
+    import xlsxwriter  # only report builds pay for it, not every import of the core
+
+    jobs = jobs.sort_values("production_date", kind="stable")
+    pieces, impressions, damages = (
+        int(jobs["total_pieces"].sum()),
+        int(jobs["total_impressions"].sum()),
+        int(jobs["total_damages"].sum()),
+    )
+    monthly = (
+        jobs.groupby(jobs["production_date"].dt.to_period("M"))
+        .agg(
+            jobs=("id", "size"),
+            total_pieces=("total_pieces", "sum"),
+            total_impressions=("total_impressions", "sum"),
+            total_damages=("total_damages", "sum"),
+        )
+        .reset_index()
+    )
+    target = float(target_rate) / 100.0
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    bold = workbook.add_format({"bold": True})
+    heading = workbook.add_format({"bold": True, "font_size": 14})
+    header = workbook.add_format({"bold": True, "bg_color": "#DDEBF7", "border": 1})
+    count = workbook.add_format({"num_format": "#,##0"})
+    percent = workbook.add_format({"num_format": "0.00%"})
+    date_fmt = workbook.add_format({"num_format": "mm/dd/yyyy"})
+    month_fmt = workbook.add_format({"num_format": "mmm yyyy"})
+
+    # Sheets are created in tab order; rows go out strictly top to bottom within each one
+    summary = workbook.add_worksheet("Summary")
+    monthly_sheet = workbook.add_worksheet("Monthly")
+    detail = workbook.add_worksheet("Jobs")
+
+    error_rate = damages / pieces if pieces else 0.0
+    summary.set_column(0, 0, 28)
+    summary.set_column(1, 1, 18)
+    summary.write(0, 0, f"Quality Control Report - {title}", heading)
+    summary.write(1, 0, f"{fmt_mmddyyyy(start_date)} to {fmt_mmddyyyy(end_date)}")
+    summary_rows = [
+        ("Jobs", len(jobs), count),
+        ("Total Pieces", pieces, count),
+        ("Total Impressions", impressions, count),
+        ("Total Damages", damages, count),
+        ("Error Rate (pieces)", error_rate, percent),
+        ("Error Rate (impressions)", damages / impressions if impressions else 0.0, percent),
+        ("Target Error Rate", target, percent),
+        ("Status", "Within target" if error_rate <= target else "Above target", None),
+    ]
+    for row_no, (label, value, fmt) in enumerate(summary_rows, start=3):
+        summary.write(row_no, 0, label, bold)
+        summary.write(row_no, 1, value, fmt)
+
+    monthly_headers = [
+        "Month",
+        "Jobs",
+        "Total Pieces",
+        "Total Impressions",
+        "Total Damages",
+        "Good Pieces",
+        "Error Rate",
+        "Error Rate (Impressions)",
+        "Target",
+    ]
+    monthly_sheet.set_column(0, len(monthly_headers) - 1, 16)
+    monthly_sheet.write_row(0, 0, monthly_headers, header)
+    for row_no, row in enumerate(monthly.itertuples(index=False), start=1):
+        monthly_sheet.write_datetime(row_no, 0, row.production_date.to_timestamp().to_pydatetime(), month_fmt)
+        monthly_sheet.write_row(
+            row_no,
+            1,
+            [int(row.jobs), int(row.total_pieces), int(row.total_impressions), int(row.total_damages)],
+            count,
+        )
+        monthly_sheet.write(row_no, 5, int(row.total_pieces - row.total_damages), count)
+        monthly_sheet.write(row_no, 6, row.total_damages / row.total_pieces if row.total_pieces else 0.0, percent)
+        monthly_sheet.write(
+            row_no, 7, row.total_damages / row.total_impressions if row.total_impressions else 0.0, percent
+        )
+        monthly_sheet.write(row_no, 8, target, percent)
+
+    detail_columns = [
+        "customer_name",
+        "job_number",
+        "production_date",
+        "total_pieces",
+        "total_impressions",
+        "total_damages",
+        "notes",
+    ]
+    detail_headers = [
+        "Customer",
+        "Job Number",
+        "Production Date",
+        "Pieces",
+        "Impressions",
+        "Damages",
+        "Error Rate",
+        "Notes",
+    ]
+    detail.set_column(0, 1, 22)
+    detail.set_column(2, 6, 15)
+    detail.set_column(7, 7, 40)
+    detail.write_row(0, 0, detail_headers, header)
+    for row_no, row in enumerate(jobs[detail_columns].itertuples(index=False), start=1):
+        detail.write_string(row_no, 0, str(row.customer_name))
+        detail.write_string(row_no, 1, str(row.job_number))
+        if pd.isna(row.production_date):
+            detail.write_blank(row_no, 2, None, date_fmt)
+        else:
+            detail.write_datetime(row_no, 2, row.production_date.to_pydatetime(), date_fmt)
+        detail.write_row(row_no, 3, [int(row.total_pieces), int(row.total_impressions), int(row.total_damages)], count)
+        detail.write(row_no, 6, row.total_damages / row.total_pieces if row.total_pieces else 0.0, percent)
+        detail.write_string(row_no, 7, "" if pd.isna(row.notes) else str(row.notes))
+    if len(jobs):
+        detail.autofilter(0, 0, len(jobs), len(detail_headers) - 1)
+        detail.freeze_panes(1, 0)
+
+    if len(monthly):
+        last = len(monthly)
+        rate_chart = workbook.add_chart({"type": "line"})
+        rate_chart.add_series(
+            {
+                "name": "Error Rate",
+                "categories": ["Monthly", 1, 0, last, 0],
+                "values": ["Monthly", 1, 6, last, 6],
+                "marker": {"type": "circle"},
+            }
+        )
+        rate_chart.add_series(
+            {
+                "name": "Target",
+                "categories": ["Monthly", 1, 0, last, 0],
+                "values": ["Monthly", 1, 8, last, 8],
+                "line": {"color": "red", "dash_type": "dash"},
+            }
+        )
+        rate_chart.set_title({"name": "Error Rate by Month"})
+        rate_chart.set_y_axis({"num_format": "0.0%"})
+        rate_chart.set_legend({"position": "bottom"})
+        summary.insert_chart("D3", rate_chart, {"x_scale": 1.4, "y_scale": 1.1})
+
+        volume_chart = workbook.add_chart({"type": "column", "subtype": "stacked"})
+        volume_chart.add_series(
+            {
+                "name": "Good Pieces",
+                "categories": ["Monthly", 1, 0, last, 0],
+                "values": ["Monthly", 1, 5, last, 5],
+                "fill": {"color": "#1f77b4"},
+            }
+        )
+        volume_chart.add_series(
+            {
+                "name": "Damaged Pieces",
+                "categories": ["Monthly", 1, 0, last, 0],
+                "values": ["Monthly", 1, 4, last, 4],
+                "fill": {"color": "#d62728"},
+            }
+        )
+        volume_chart.set_title({"name": "Pieces by Month"})
+        volume_chart.set_legend({"position": "bottom"})
+        summary.insert_chart("D21", volume_chart, {"x_scale": 1.4, "y_scale": 1.1})
+
+    workbook.close()
+    return output.getvalue()
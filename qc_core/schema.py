@@ -0,0 +1,638 @@
+"""Schema creation and migrations: tables, indexes, triggers, default customers, partitions."""
+
+from datetime import date
+
+from sqlalchemy import text
+
+from .cache import cache_resource
+from .customers import get_customer_directory
+from .db import get_engine
+
+
+# Job stores older than this do a full reload, since the change log is pruned past it
+JOB_CHANGE_RETENTION_DAYS = 30
+
+# Row triggers log updates and deletes per job; inserts are logged once per statement,
+# which keeps bulk loads cheap while still moving the change log
+JOB_CHANGE_TRIGGERS = (
+    """
+    CREATE TRIGGER jobs_log_change
+    AFTER UPDATE OR DELETE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION log_job_change()
+    """,
+    """
+    CREATE TRIGGER jobs_log_insert
+    AFTER INSERT ON jobs
+    FOR EACH STATEMENT EXECUTE FUNCTION log_job_insert()
+    """,
+)
+
+
+def init_db():
+    """Initialize Postgres tables"""
+    eng = get_engine()
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS customers (
+                    id SERIAL PRIMARY KEY,
+                    customer_name TEXT UNIQUE NOT NULL,
+                    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    active INTEGER DEFAULT 1,
+                    target_error_rate REAL DEFAULT 2.0
+                );
+                """
+            )
+        )
+        # Dropdowns and stats only read active customers, in name order
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS customers_active_name_idx ON customers (customer_name) WHERE active = 1")
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS customer_merges (
+                    source_id INTEGER PRIMARY KEY REFERENCES customers(id),
+                    target_id INTEGER NOT NULL REFERENCES customers(id),
+                    jobs_moved INTEGER NOT NULL,
+                    merged_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+            )
+        )
+
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id SERIAL PRIMARY KEY,
+                    customer_id INTEGER NOT NULL REFERENCES customers(id),
+                    job_number TEXT NOT NULL,
+                    date_entered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    production_date DATE,
+                    total_pieces INTEGER NOT NULL,
+                    total_impressions INTEGER NOT NULL,
+                    total_damages INTEGER NOT NULL,
+                    error_rate REAL NOT NULL,
+                    notes TEXT
+                );
+                """
+            )
+        )
+
+        # Write-behind queue submissions carry a key so retried flushes never double-insert
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS idempotency_key TEXT"))
+        # Bulk deletes only mark rows; they are purged once the undo window has passed
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP"))
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS delete_batch TEXT"))
+        conn.execute(text("CREATE OR REPLACE VIEW live_jobs AS SELECT * FROM jobs WHERE deleted_at IS NULL"))
+
+        partitioned = _is_partitioned(conn)
+
+        # One live row per customer job number. Before the index first exists, collapse
+        # any duplicates to the most recently inserted row so the index can be built.
+        has_job_key = conn.execute(
+            text("SELECT to_regclass('jobs_live_job_number_uq') IS NOT NULL")
+        ).scalar_one()
+        if not has_job_key:
+            same_date = "AND older.production_date = newer.production_date" if partitioned else ""
+            conn.execute(
+                text(
+                    f"""
+                    DELETE FROM jobs older
+                    USING jobs newer
+                    WHERE older.customer_id = newer.customer_id
+                      AND older.job_number = newer.job_number
+                      {same_date}
+                      AND older.id < newer.id
+                      AND older.deleted_at IS NULL
+                      AND newer.deleted_at IS NULL
+                    """
+                )
+            )
+        _create_job_indexes(conn, partitioned)
+        conn.execute(text("DROP INDEX IF EXISTS jobs_customer_job_number_uq"))
+
+        # Change log for delta sync: updates and deletes of existing rows (new rows are found by id).
+        # Insert statements add one 'I' row each, so MAX(seq) moves on every write.
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS job_changes (
+                    seq BIGSERIAL PRIMARY KEY,
+                    job_id INTEGER NOT NULL,
+                    op CHAR(1) NOT NULL,
+                    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE OR REPLACE FUNCTION log_job_change() RETURNS trigger AS $$
+                BEGIN
+                    INSERT INTO job_changes (job_id, op) VALUES (OLD.id, LEFT(TG_OP, 1));
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE OR REPLACE FUNCTION log_job_insert() RETURNS trigger AS $$
+                BEGIN
+                    INSERT INTO job_changes (job_id, op) VALUES (0, 'I');
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                """
+            )
+        )
+        conn.execute(text("DROP TRIGGER IF EXISTS jobs_log_change ON jobs"))
+        conn.execute(text("DROP TRIGGER IF EXISTS jobs_log_insert ON jobs"))
+        for statement in JOB_CHANGE_TRIGGERS:
+            conn.execute(text(statement))
+        conn.execute(
+            text(
+                f"DELETE FROM job_changes WHERE changed_at < CURRENT_TIMESTAMP - INTERVAL '{JOB_CHANGE_RETENTION_DAYS} days'"
+            )
+        )
+
+        # Archived years: job rows live in Parquet, per-day totals stay here for aggregates
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS jobs_archive (
+                    year INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS jobs_archive_daily (
+                    customer_id INTEGER NOT NULL REFERENCES customers(id),
+                    production_date DATE NOT NULL,
+                    jobs INTEGER NOT NULL,
+                    total_pieces BIGINT NOT NULL,
+                    total_impressions BIGINT NOT NULL,
+                    total_damages BIGINT NOT NULL,
+                    PRIMARY KEY (customer_id, production_date)
+                );
+                """
+            )
+        )
+
+        # Overview aggregates precomputed by build_snapshots(); a JSON frame per call
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+                    snapshot_key TEXT PRIMARY KEY,
+                    data_version TEXT NOT NULL,
+                    built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    payload TEXT NOT NULL
+                );
+                """
+            )
+        )
+
+        if partitioned:
+            ensure_job_partitions(conn)
+
+        purge_deleted_jobs(conn)
+
+
+def _create_job_indexes(conn, partitioned: bool) -> None:
+    """Indexes on jobs; unique keys on a partitioned table must include production_date."""
+    suffix = ", production_date" if partitioned else ""
+    for statement in [
+        f"CREATE UNIQUE INDEX IF NOT EXISTS jobs_idempotency_key_uq ON jobs (idempotency_key{suffix})",
+        f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS jobs_live_job_number_uq ON jobs (customer_id, job_number{suffix})
+        WHERE deleted_at IS NULL
+        """,
+        "CREATE INDEX IF NOT EXISTS jobs_customer_job_number_idx ON jobs (customer_id, job_number)",
+        "CREATE INDEX IF NOT EXISTS jobs_production_date_idx ON jobs (production_date)",
+        "CREATE INDEX IF NOT EXISTS jobs_deleted_at_idx ON jobs (deleted_at) WHERE deleted_at IS NOT NULL",
+    ]:
+        conn.execute(text(statement))
+
+
+@cache_resource
+def bootstrap_db() -> bool:
+    """Create tables and seed customers once per process, not on every page load."""
+    init_db()
+    jobs_partitioned.clear()
+    load_default_customers()
+    return True
+
+
+def load_default_customers():
+    """Load default customer list if customers table is empty"""
+    default_customers = [
+        "2469 - The UPS Store",
+        "33.Black, LLC",
+        "4M Promotions",
+        "503 Network LLC",
+        "714 Creative",
+        "A4 Promotions",
+        "Abacus Products, Inc.",
+        "ACI Printing Services, Inc.",
+        "Adaptive Branding",
+        "Ad Stuff, Inc.",
+        "Albrecht (Branding by Beth)",
+        "Alpenglow Sports Inc",
+        "AMB3R LLC",
+        "American Solutions for Business",
+        "Anning Johnson Company",
+        "Aramark (Vestis)",
+        "Armstrong Print & Promotional",
+        "Badass Lass",
+        "Bimark, Inc.",
+        "Blackridge Branding",
+        "Blue Label Distribution (HiLife)",
+        "Bluelight Promotions",
+        "BPL Supplies Inc",
+        "Brand Original IPU",
+        "Bravo Promotional Marketing",
+        "Brent Binnall Enterprises",
+        "Bright Print Works",
+        "BSN Sports",
+        "Bulldog Creative Agency",
+        "B&W Wholesale",
+        "Calla Products, LLC",
+        "Care Youth Corporation",
+        "Cariloha",
+        "CDA Printing",
+        "Classic Awards & Promotions",
+        "Clayton AP Academy",
+        "CLNC Sports dba Secondslide",
+        "Clove and Twine",
+        "Club Colors",
+        "Clutch Creative",
+        "Cole Apparel",
+        "Color Graphics Screenprinting",
+        "Colossal Printing Company LLC",
+        "Cool Breeze Heating & Air Conditioning",
+        "Corporate Couture",
+        "Creative Marketing and Design AIA",
+        "CrossFreedom",
+        "Defero Swag",
+        "Del Sol",
+        "Deso Supply",
+        "DFS West",
+        "Divide Graphics",
+        "Divot Dawgs",
+        "Emblazeon",
+        "eRetailing Associates, LLC",
+        "Etched in Stone",
+        "Eureka Shirt Circuit",
+        "Evident Industries",
+        "Factory Design Group",
+        "Fastenal",
+        "Feature Graphix",
+        "Four Alarm Promotions IPU",
+        "Four Twigs LLC",
+        "Freedom USA (HiLife)",
+        "Fuel",
+        "GBrakes",
+        "GeekHead Printing and Apparel",
+        "Good News Collection",
+        "Great Basin Decoration",
+        "Gulf Coast Trades Center",
+        "HALO/AdSource",
+        "Happiscribble",
+        "High Desert Print Company",
+        "Home Means Nevada Co",
+        "Hooked on Swag",
+        "HSG Safety Supplies Inc.",
+        "HSM Enterprises",
+        "ICO Companies dba Red The Uniform Tailor",
+        "Ideal Printing, Promos & Wearables",
+        "Image Group",
+        "Image Source",
+        "Imagework Marketing",
+        "Initial Impression",
+        "Inkwell (Brandito)",
+        "Innovative Impressions IPU",
+        "Inproma LLC",
+        "International Minute Press",
+        "IZA Design Inc",
+        "Jen McFerrin Creative",
+        "Jetset Promotions LLC",
+        "J&J Printing",
+        "Johnson Promotions",
+        "J&R Gear",
+        "Kids Blanks",
+        "Knoblauch Advertising",
+        "Kug - Proforma",
+        "Lakeview Threads",
+        "Logo Boss",
+        "Lookout Promotions",
+        "LSK Branding",
+        "Luxury Branded Goods",
+        "Made to Order",
+        "Madhouz LLC",
+        "Makers NV",
+        "Marco Ideas Unlimited",
+        "Marco Polo Promotions LLC",
+        "Matrix Promotional Marketing IPU",
+        "Merch.com",
+        "Monitor Premiums, LLC",
+        "Montroy Signs & Graphics",
+        "Moondeck",
+        "Moore Promotions - Proforma",
+        "Mountain Freak Boutique",
+        "National Sports Apparel",
+        "NDS AIA",
+        "Needleworks Embroidery",
+        "No Quarter Co",
+        "North American Embroidery",
+        "Northwood Creations",
+        "Nothing Too Fancy",
+        "On-Line Printing & Graphics",
+        "Onyx Inc",
+        "Opal Promotions",
+        "Orangevale Copy Center",
+        "Ozio Lifestyles LLC",
+        "Paperworld Inc",
+        "Par 5 Promotions",
+        "Parle Enterprises, Inc",
+        "Pica Marketing Group",
+        "PIP Printing",
+        "Premium Custom Solutions",
+        "Print Head Inc",
+        "Print Promo Factory",
+        "Proforma Wine Country",
+        "Proforma Your Best Corp.",
+        "PromoCentric LLC",
+        "Promo Dog Inc",
+        "Promotional Edge",
+        "Purpose-Built PRO",
+        "Purpose-Built Retail",
+        "Qhik Moto",
+        "Quantum Graphics, Inc.",
+        "Radar Promotions",
+        "Rapt Clothing Inc",
+        "Red Thread Labs",
+        "Reno Motorsports Inc",
+        "Reno Print Labs",
+        "Reno Print Store",
+        "Reno Typographers",
+        "Rise Custom Apparel LLC",
+        "Rite of Passage ATCS",
+        "Rite of Passage Inc",
+        "Rockland Aramark",
+        "Round Up Creations LLC",
+        "Rush Advertising LLC",
+        "SanMar",
+        "Score International",
+        "SDG Promotions IPU",
+        "Sierra Air",
+        "Sierra Boat Company",
+        "Sierra Mountain Graphics",
+        "Signs by Van",
+        "Silkletter",
+        "Silkshop Screen Printing",
+        "Silver Peak Promotions",
+        "Silverscreen Decoration & Fulfillment",
+        "Silverscreen Direct",
+        "Skyward Corp dba Meridian Promotions",
+        "SOBO Concepts LLC",
+        "SpotFrog",
+        "Spot On Signs",
+        "Star Sports",
+        "Sticker Pack",
+        "Stock Roll Corp of America",
+        "Swagger",
+        "Swagoo Promotions",
+        "Swizzle",
+        "SynergyX1 LLC",
+        "Tahoe Basics",
+        "Tahoe LogoWear",
+        "Teamworks",
+        "Tee Shirt Bar",
+        "The Graphics Factory",
+        "The Hat Source",
+        "The Right Promotions",
+        "The Sourcing Group, LLC",
+        "The Sourcing Group Promo",
+        "Thunder House Productions LLC",
+        "TPG Trade Show & Events",
+        "Treasure Mountain",
+        "Triangle Design & Graphics LLC",
+        "TR Miller",
+        "TRSTY Media",
+        "Truly Gifted",
+        "Tugboat, Inc",
+        "University of Nevada Equipment Room",
+        "Unraveled Threads",
+        "Upper Park Clothing",
+        "UP Shirt Inc",
+        "Vail Dunlap",
+        "Washoe County",
+        "Washoe Schools",
+        "Way to Be Designs, LLC",
+        "WearyLand",
+        "Windy City Promos",
+        "Wolfgangs",
+        "W&T Graphix",
+        "Xcel",
+        "YanceyWorks LLC",
+        "Zazzle",
+    ]
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM customers")).scalar_one()
+
+        if int(count) == 0:
+            stmt = text(
+                """
+                INSERT INTO customers (customer_name)
+                VALUES (:customer_name)
+                ON CONFLICT (customer_name) DO NOTHING
+                """
+            )
+            for customer in default_customers:
+                conn.execute(stmt, {"customer_name": customer})
+
+    if int(count) == 0:
+        get_customer_directory.clear()
+
+
+# Soft-deleted jobs can be restored for this long, then purged at the next startup
+JOB_UNDO_WINDOW_HOURS = 24
+
+
+def purge_deleted_jobs(conn) -> int:
+    """Permanently remove soft-deleted jobs older than the undo window."""
+    result = conn.execute(
+        text(
+            f"""
+            DELETE FROM jobs
+            WHERE deleted_at < CURRENT_TIMESTAMP - INTERVAL '{JOB_UNDO_WINDOW_HOURS} hours'
+            """
+        )
+    )
+    return int(result.rowcount or 0)
+
+
+PARTITION_GRAINS = ("year", "quarter")
+
+
+def _is_partitioned(conn) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                """
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('jobs')
+                )
+                """
+            )
+        ).scalar_one()
+    )
+
+
+@cache_resource
+def jobs_partitioned() -> bool:
+    with get_engine().connect() as conn:
+        return _is_partitioned(conn)
+
+
+def _job_key_sql(*columns) -> str:
+    """Conflict target for a jobs unique key; partitioned tables must include the partition key."""
+    if jobs_partitioned():
+        columns = columns + ("production_date",)
+    return ", ".join(columns)
+
+
+def _partition_bounds(grain: str, year: int) -> list:
+    """(name, start, end) for each partition of `year`."""
+    if grain == "year":
+        return [(f"jobs_{year}", date(year, 1, 1), date(year + 1, 1, 1))]
+    bounds = []
+    for q in range(4):
+        start = date(year, 3 * q + 1, 1)
+        end = date(year + 1, 1, 1) if q == 3 else date(year, 3 * q + 4, 1)
+        bounds.append((f"jobs_{year}q{q + 1}", start, end))
+    return bounds
+
+
+def _partition_grain(conn) -> str:
+    names = conn.execute(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('jobs')
+            """
+        )
+    ).scalars().all()
+    return "quarter" if any(name[-2:-1] == "q" for name in names) else "year"
+
+
+def ensure_job_partitions(conn, grain: str = None, first_year: int = None, last_year: int = None) -> None:
+    """Create any missing partitions from first_year (default: this year) through last_year (default: next year)."""
+    grain = grain or _partition_grain(conn)
+    this_year = date.today().year
+    for year in range(first_year or this_year, (last_year or this_year + 1) + 1):
+        for name, start, end in _partition_bounds(grain, year):
+            conn.execute(
+                text(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {name} PARTITION OF jobs
+                    FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+                    """
+                )
+            )
+
+
+def partition_jobs_table(grain: str = "year") -> dict:
+    """Convert the jobs table to a table range-partitioned on production_date.
+
+    Runs in one transaction and blocks writes while rows are copied. Postgres requires
+    unique indexes on a partitioned table to include the partition key, so the live
+    job number key becomes (customer_id, job_number, production_date). A plain index
+    on (customer_id, job_number) remains for existence checks.
+    """
+    if grain not in PARTITION_GRAINS:
+        raise ValueError(f"grain must be one of {PARTITION_GRAINS}")
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        if _is_partitioned(conn):
+            raise RuntimeError("jobs is already partitioned")
+
+        conn.execute(text("LOCK TABLE jobs IN ACCESS EXCLUSIVE MODE"))
+        # The partition key must be NOT NULL to be part of the primary key
+        conn.execute(
+            text(
+                """
+                UPDATE jobs
+                SET production_date = COALESCE(date_entered::date, CURRENT_DATE)
+                WHERE production_date IS NULL
+                """
+            )
+        )
+        first_year, last_year = conn.execute(
+            text(
+                """
+                SELECT
+                    COALESCE(EXTRACT(YEAR FROM MIN(production_date)), EXTRACT(YEAR FROM CURRENT_DATE))::int,
+                    COALESCE(EXTRACT(YEAR FROM MAX(production_date)), EXTRACT(YEAR FROM CURRENT_DATE))::int
+                FROM jobs
+                """
+            )
+        ).one()
+
+        conn.execute(text("DROP VIEW live_jobs"))
+        conn.execute(text("DROP TRIGGER IF EXISTS jobs_log_change ON jobs"))
+        conn.execute(text("DROP TRIGGER IF EXISTS jobs_log_insert ON jobs"))
+        conn.execute(text("ALTER TABLE jobs RENAME TO jobs_unpartitioned"))
+        # Free the index names (the primary key's included) for the new table
+        index_names = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = 'jobs_unpartitioned'")
+        ).scalars().all()
+        for name in index_names:
+            conn.execute(text(f"ALTER INDEX {name} RENAME TO {name.replace('jobs_', 'jobs_unpartitioned_', 1)}"))
+
+        for statement in [
+            """
+            CREATE TABLE jobs (LIKE jobs_unpartitioned INCLUDING DEFAULTS)
+            PARTITION BY RANGE (production_date)
+            """,
+            "ALTER TABLE jobs ALTER COLUMN production_date SET NOT NULL",
+            "ALTER TABLE jobs ADD CONSTRAINT jobs_pkey PRIMARY KEY (id, production_date)",
+            "ALTER TABLE jobs ADD FOREIGN KEY (customer_id) REFERENCES customers(id)",
+            "CREATE TABLE jobs_default PARTITION OF jobs DEFAULT",
+        ]:
+            conn.execute(text(statement))
+
+        ensure_job_partitions(conn, grain, first_year, max(last_year, date.today().year) + 1)
+
+        for statement in [
+            "INSERT INTO jobs SELECT * FROM jobs_unpartitioned",
+            "ALTER SEQUENCE jobs_id_seq OWNED BY jobs.id",
+            "DROP TABLE jobs_unpartitioned",
+            "CREATE VIEW live_jobs AS SELECT * FROM jobs WHERE deleted_at IS NULL",
+            *JOB_CHANGE_TRIGGERS,
+        ]:
+            conn.execute(text(statement))
+        _create_job_indexes(conn, partitioned=True)
+
+        row_count = conn.execute(text("SELECT COUNT(*) FROM jobs")).scalar_one()
+
+    jobs_partitioned.clear()
+    return {"grain": grain, "first_year": first_year, "last_year": last_year, "rows": int(row_count)}
@@ -0,0 +1,172 @@
+"""Nightly snapshots of the overview aggregates for the default date range.
+
+Query functions opt in with @serves_snapshot, listing the argument sets worth
+precomputing. build_snapshots() (run from cron through `db_admin.py snapshot`)
+stores their results for the default overview range in dashboard_snapshots.
+A later call with exactly those arguments is answered from the snapshot, as
+long as no job or customer changed since it was built; anything else runs the
+live query.
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import time
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+import pandas as pd
+from sqlalchemy import text
+
+from .cache import cache_data
+from .db import get_engine
+
+# The overview page opens on this many days back from today; snapshots cover that range
+OVERVIEW_DEFAULT_DAYS = 90
+
+# Any job insert, edit or delete moves the change log; any customer edit changes the digest
+SNAPSHOT_VERSION_SQL = """
+    SELECT
+        (SELECT COALESCE(MAX(seq), 0) FROM job_changes)::text || ':' || (
+            SELECT md5(COALESCE(
+                string_agg(concat_ws('|', id, customer_name, active, target_error_rate), ',' ORDER BY id), ''
+            ))
+            FROM customers
+        )
+"""
+
+# function name -> (live function, argument sets to precompute)
+_SNAPSHOT_SOURCES = {}
+
+
+def default_overview_range(today: date = None) -> tuple:
+    end = today or date.today()
+    return end - timedelta(days=OVERVIEW_DEFAULT_DAYS), end
+
+
+def _key_value(value) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return repr(value)
+
+
+def snapshot_key(func, arguments: dict) -> str:
+    """Stable name for one call, like "get_rollup(customer_id=None, grain='Week', start_date=...)"."""
+    return f"{func.__name__}({', '.join(f'{name}={_key_value(value)}' for name, value in arguments.items())})"
+
+
+def _bind(func, args: tuple, kwargs: dict) -> dict:
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _encode(df: pd.DataFrame) -> str:
+    # Table JSON keeps dtypes; month columns (the customer x month matrix) travel as ISO strings
+    timestamp_columns = [str(c.date()) for c in df.columns if isinstance(c, pd.Timestamp)]
+    frame = df.set_axis([str(c.date()) if isinstance(c, pd.Timestamp) else c for c in df.columns], axis=1)
+    return json.dumps(
+        {"frame": frame.to_json(orient="table", date_format="iso"), "timestamp_columns": timestamp_columns}
+    )
+
+
+def _decode(payload: str) -> pd.DataFrame:
+    data = json.loads(payload)
+    df = pd.read_json(StringIO(data["frame"]), orient="table")
+    timestamps = set(data["timestamp_columns"])
+    return df.set_axis([pd.Timestamp(c) if c in timestamps else c for c in df.columns], axis=1)
+
+
+def current_data_version() -> str:
+    eng = get_engine()
+    with eng.connect() as conn:
+        return conn.execute(text(SNAPSHOT_VERSION_SQL)).scalar_one()
+
+
+@cache_data(ttl=60)
+def _snapshot_index() -> dict:
+    """snapshot key -> data version it was built at; small, so every process polls it."""
+    eng = get_engine()
+    with eng.connect() as conn:
+        rows = conn.execute(text("SELECT snapshot_key, data_version FROM dashboard_snapshots")).fetchall()
+    return {key: version for key, version in rows}
+
+
+def serves_snapshot(*argument_sets: dict):
+    """Answer calls matching a stored snapshot from it; `argument_sets` are the calls to precompute.
+
+    Range arguments (start_date, end_date) are filled in by build_snapshots(). Put it
+    under @cache_data, so the snapshot check only runs when the result is not cached.
+    """
+
+    def decorator(func):
+        _SNAPSHOT_SOURCES[func.__name__] = (func, argument_sets or ({},))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = snapshot_key(func, _bind(func, args, kwargs))
+            built_at_version = _snapshot_index().get(key)
+            if built_at_version is None or built_at_version != current_data_version():
+                return func(*args, **kwargs)
+
+            eng = get_engine()
+            with eng.connect() as conn:
+                payload = conn.execute(
+                    text("SELECT payload FROM dashboard_snapshots WHERE snapshot_key = :key AND data_version = :v"),
+                    {"key": key, "v": built_at_version},
+                ).scalar()
+            return func(*args, **kwargs) if payload is None else _decode(payload)
+
+        return wrapper
+
+    return decorator
+
+
+def build_snapshots(today: date = None) -> dict:
+    """Recompute every registered snapshot for the default overview range, replacing the old set."""
+    importlib.import_module(".queries", __package__)  # registers the snapshot sources
+
+    started = time.perf_counter()
+    start_date, end_date = default_overview_range(today)
+    # Read first: a write during the build leaves the snapshot stale, never wrong
+    version = current_data_version()
+
+    rows = []
+    for func, argument_sets in _SNAPSHOT_SOURCES.values():
+        takes_range = "start_date" in inspect.signature(func).parameters
+        for arguments in argument_sets:
+            if takes_range:
+                arguments = {**arguments, "start_date": start_date, "end_date": end_date}
+            rows.append(
+                {
+                    "key": snapshot_key(func, _bind(func, (), arguments)),
+                    "version": version,
+                    "payload": _encode(func(**arguments)),
+                }
+            )
+
+    eng = get_engine()
+    with eng.begin() as conn:
+        conn.execute(text("DELETE FROM dashboard_snapshots"))
+        conn.execute(
+            text(
+                """
+                INSERT INTO dashboard_snapshots (snapshot_key, data_version, payload)
+                VALUES (:key, :version, :payload)
+                """
+            ),
+            rows,
+        )
+    _snapshot_index.clear()
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "snapshots": len(rows),
+        "bytes": sum(len(row["payload"]) for row in rows),
+        "data_version": version,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,389 @@
+"""Process-wide job store (delta sync) and the write-behind submission queue."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .archive import read_archived_jobs
+from .cache import cache_data, cache_resource, invalidate_job_caches
+from .db import get_engine
+from .jobs import JobValidationError, upsert_job_rows
+from .schema import JOB_CHANGE_RETENTION_DAYS
+
+
+JOB_STORE_READ_SQL = """
+    SELECT j.*, c.customer_name
+    FROM live_jobs j
+    JOIN customers c ON j.customer_id = c.id
+    WHERE {where_sql}
+"""
+JOB_CHANGES_SQL = "SELECT seq, job_id, op FROM job_changes WHERE seq > :seq ORDER BY seq"
+
+# Ids and change-log sequence numbers are assigned before commit, so a slow transaction
+# can commit "behind" the high-water mark. Re-reading a small overlap catches those rows.
+JOB_SYNC_OVERLAP = 200
+JOB_SYNC_MIN_INTERVAL_SECONDS = 15
+# Shared job frames also leave the cache when a sync changes the store
+JOB_STORE_RESULT_TTL_SECONDS = 600
+
+
+class JobStore:
+    """Process-wide copy of all job rows, refreshed by fetching only what changed.
+
+    New rows are found by id above the last seen id; updates and deletions come
+    from the job_changes log. Query results are shared through the result cache:
+    every session asking for the same range between two syncs gets a shallow view
+    of one frame, so callers may add or replace columns but not edit values in place.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.last_id = 0
+        self.last_change_seq = 0
+        self.loaded_at = None
+        self.synced_at = None
+        # Bumped whenever _jobs changes; part of every shared result's key
+        self.version = 0
+        self._jobs = None
+        self._lock = threading.Lock()
+        self._results = cache_data(ttl=JOB_STORE_RESULT_TTL_SECONDS, job_data=True, name="JobStore results")(
+            self._query
+        )
+
+    def _read(self, conn, where_sql: str, params: dict) -> pd.DataFrame:
+        df = pd.read_sql(
+            text(JOB_STORE_READ_SQL.format(where_sql=where_sql)),
+            conn,
+            params=params,
+        )
+        df["production_date"] = pd.to_datetime(df["production_date"])
+        return df.set_index("id", drop=False)
+
+    def sync(self, force: bool = False) -> dict:
+        """Bring the store up to date; returns counts of new, changed and deleted rows."""
+        with self._lock:
+            now = time.time()
+            if not force and self.synced_at and now - self.synced_at < JOB_SYNC_MIN_INTERVAL_SECONDS:
+                return {"new": 0, "changed": 0, "deleted": 0}
+
+            if self._jobs is None or now - self.loaded_at > JOB_CHANGE_RETENTION_DAYS * 86400 / 2:
+                return self._full_load(now)
+
+            eng = self.engine
+            with eng.connect() as conn:
+                changes = pd.read_sql(
+                    text(JOB_CHANGES_SQL),
+                    conn,
+                    params={"seq": max(self.last_change_seq - JOB_SYNC_OVERLAP, 0)},
+                )
+                fresh = self._read(conn, "j.id > :last_id", {"last_id": max(self.last_id - JOB_SYNC_OVERLAP, 0)})
+
+                changed_ids = changes.loc[changes["op"].isin(["U", "D"]), "job_id"].unique().tolist()
+                changed_ids = [int(i) for i in changed_ids if int(i) not in fresh.index]
+                changed = (
+                    self._read(conn, "j.id = ANY(:ids)", {"ids": changed_ids})
+                    if changed_ids
+                    else fresh.iloc[0:0]
+                )
+
+            # Soft deletes are logged as updates, and a row moved to another partition as a
+            # delete although it is still live; whatever no longer comes back is gone
+            deleted_ids = pd.Index([i for i in changed_ids if i not in changed.index])
+            updates = pd.concat([fresh, changed])
+
+            # Overlap re-reads return rows we already hold; count only rows that really differ
+            known = updates.index.isin(self._jobs.index)
+            before = self._jobs.loc[updates.index[known], updates.columns]
+            after = updates[known]
+            same = (before == after) | (before.isna() & after.isna())
+            new_count = int((~known).sum())
+            changed_count = int((~same.all(axis=1)).sum())
+            deleted_count = int(self._jobs.index.isin(deleted_ids).sum())
+
+            if new_count or changed_count or deleted_count:
+                jobs = pd.concat([self._jobs.drop(index=updates.index, errors="ignore"), updates])
+                self._jobs = jobs.drop(index=deleted_ids, errors="ignore")
+                self.version += 1
+
+            if not fresh.empty:
+                self.last_id = max(self.last_id, int(fresh.index.max()))
+            if not changes.empty:
+                self.last_change_seq = max(self.last_change_seq, int(changes["seq"].max()))
+            self.synced_at = now
+
+        if new_count or changed_count or deleted_count:
+            invalidate_job_caches()
+        return {"new": new_count, "changed": changed_count, "deleted": deleted_count}
+
+    def _full_load(self, now: float) -> dict:
+        with self.engine.connect() as conn:
+            last_seq = conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM job_changes")).scalar_one()
+            jobs = self._read(conn, "TRUE", {})
+
+        self._jobs = jobs
+        self.version += 1
+        self.last_id = int(jobs.index.max()) if not jobs.empty else 0
+        self.last_change_seq = int(last_seq)
+        self.loaded_at = self.synced_at = now
+        invalidate_job_caches()
+        return {"new": len(jobs), "changed": 0, "deleted": 0}
+
+    @staticmethod
+    def _with_archive(live: pd.DataFrame, sort_by, start_date=None, end_date=None, customer_id=None) -> pd.DataFrame:
+        archived = read_archived_jobs(start_date, end_date, customer_id)
+        jobs = pd.concat([live, archived], ignore_index=True) if not archived.empty else live
+        return jobs.sort_values(sort_by, ascending=False).reset_index(drop=True)
+
+    def _query(self, version: int, method: str, *args) -> pd.DataFrame:
+        # `version` only keys the shared result, so a sync never serves frames from before it
+        return getattr(self, f"_{method}")(*args)
+
+    def all_jobs(self, include_archive: bool = True) -> pd.DataFrame:
+        return self._results(self.version, "all_jobs", include_archive)
+
+    def jobs_by_date_range(self, start_date, end_date) -> pd.DataFrame:
+        return self._results(self.version, "jobs_by_date_range", start_date, end_date)
+
+    def jobs_by_customer(self, customer_id: int, start_date=None, end_date=None) -> pd.DataFrame:
+        return self._results(self.version, "jobs_by_customer", int(customer_id), start_date, end_date)
+
+    def _all_jobs(self, include_archive: bool) -> pd.DataFrame:
+        if not include_archive:
+            return self._jobs.sort_values(["production_date", "date_entered"], ascending=False).reset_index(drop=True)
+        return self._with_archive(self._jobs, ["production_date", "date_entered"])
+
+    def _jobs_by_date_range(self, start_date, end_date) -> pd.DataFrame:
+        jobs = self._jobs
+        dates = jobs["production_date"]
+        mask = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+        return self._with_archive(jobs[mask], "production_date", start_date, end_date)
+
+    def _jobs_by_customer(self, customer_id: int, start_date, end_date) -> pd.DataFrame:
+        jobs = self._jobs
+        mask = jobs["customer_id"] == int(customer_id)
+        if start_date and end_date:
+            dates = jobs["production_date"]
+            mask &= (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+        return self._with_archive(jobs[mask], "production_date", start_date, end_date, customer_id)
+
+
+@cache_resource
+def get_job_store() -> JobStore:
+    return JobStore(get_engine("analytics"))
+
+
+# ============================================================================
+# WRITE-BEHIND QUEUE (local SQLite WAL -> Postgres)
+# ============================================================================
+
+WRITE_QUEUE_PATH = os.environ.get("QC_WRITE_QUEUE_PATH", "qc_write_queue.sqlite3")
+WRITE_QUEUE_BATCH_SIZE = 200
+WRITE_QUEUE_MAX_ATTEMPTS = 5
+
+
+class WriteBehindQueue:
+    """Durable local queue for job submissions, drained to Postgres by a background thread."""
+
+    def __init__(self, path: str, engine, batch_size: int = WRITE_QUEUE_BATCH_SIZE):
+        self.path = path
+        self.engine = engine
+        self.batch_size = int(batch_size)
+        self.last_flush_at = None
+        self.last_error = None
+        self._wake = threading.Event()
+
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pending_jobs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT UNIQUE NOT NULL,
+                    payload TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+                """
+            )
+
+        self._thread = threading.Thread(target=self._run, name="qc-write-behind", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA synchronous=FULL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def enqueue(self, jobs: list) -> list:
+        """Durably append job dicts and return their idempotency keys without touching Postgres."""
+        now = time.time()
+        keys = [str(uuid.uuid4()) for _ in jobs]
+        with self._db() as db:
+            db.executemany(
+                "INSERT INTO pending_jobs (idempotency_key, payload, enqueued_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(job, default=str), now) for key, job in zip(keys, jobs)],
+            )
+        self._wake.set()
+        return keys
+
+    def stats(self) -> dict:
+        with self._db() as db:
+            depth, oldest = db.execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM pending_jobs WHERE failed = 0"
+            ).fetchone()
+            failed = db.execute("SELECT COUNT(*) FROM pending_jobs WHERE failed = 1").fetchone()[0]
+
+        return {
+            "depth": int(depth),
+            "lag_seconds": (time.time() - oldest) if oldest else 0.0,
+            "failed": int(failed),
+            "last_flush_at": self.last_flush_at,
+            "last_error": self.last_error,
+        }
+
+    def parked(self) -> pd.DataFrame:
+        """Jobs the database refused, with the reason, oldest first."""
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT seq, payload, attempts, last_error FROM pending_jobs WHERE failed = 1 ORDER BY seq"
+            ).fetchall()
+
+        parked = pd.DataFrame([json.loads(payload) for _, payload, _, _ in rows])
+        parked.insert(0, "seq", [seq for seq, _, _, _ in rows])
+        parked["attempts"] = [attempts for _, _, attempts, _ in rows]
+        parked["last_error"] = [error for _, _, _, error in rows]
+        return parked
+
+    def retry(self, seqs) -> int:
+        """Put parked jobs back in line with a fresh set of attempts."""
+        with self._db() as db:
+            updated = db.executemany(
+                "UPDATE pending_jobs SET failed = 0, attempts = 0, last_error = NULL WHERE seq = ? AND failed = 1",
+                [(int(seq),) for seq in seqs],
+            ).rowcount
+        self._wake.set()
+        return updated
+
+    def discard(self, seqs) -> int:
+        """Drop parked jobs for good."""
+        with self._db() as db:
+            return db.executemany(
+                "DELETE FROM pending_jobs WHERE seq = ? AND failed = 1", [(int(seq),) for seq in seqs]
+            ).rowcount
+
+    def flush_once(self) -> int:
+        """Push the oldest batch to Postgres; returns how many queued rows were written."""
+        with self._db() as db:
+            rows = db.execute(
+                """
+                SELECT seq, idempotency_key, payload, attempts FROM pending_jobs
+                WHERE failed = 0 ORDER BY seq LIMIT ?
+                """,
+                (self.batch_size,),
+            ).fetchall()
+        if not rows:
+            return 0
+
+        # Rows that failed before are retried on their own, so they cannot sink the batch again
+        fresh = [row[:3] for row in rows if row[3] == 0]
+        retrying = [row[:3] for row in rows if row[3] > 0]
+        done = []
+        if fresh:
+            try:
+                with self.engine.begin() as conn:
+                    upsert_job_rows(conn, self._to_frame(fresh), replace_existing=False)
+                done = [seq for seq, _, _ in fresh]
+            except (IntegrityError, DataError, JobValidationError):
+                # One bad row would block the whole batch forever; retry rows one at a time instead
+                done = self._flush_individually(fresh)
+        done += self._flush_individually(retrying)
+
+        with self._db() as db:
+            db.executemany("DELETE FROM pending_jobs WHERE seq = ?", [(seq,) for seq in done])
+
+        self.last_flush_at = time.time()
+        return len(done)
+
+    def _flush_individually(self, pending: list) -> list:
+        done = []
+        for item in pending:
+            try:
+                with self.engine.begin() as conn:
+                    upsert_job_rows(conn, self._to_frame([item]), replace_existing=False)
+                done.append(item[0])
+            except JobValidationError as e:
+                # Retrying cannot fix a rejected row; park it with the reason straight away
+                with self._db() as db:
+                    db.execute(
+                        "UPDATE pending_jobs SET attempts = attempts + 1, failed = 1, last_error = ? WHERE seq = ?",
+                        (str(e), item[0]),
+                    )
+            except (IntegrityError, DataError) as e:
+                with self._db() as db:
+                    db.execute(
+                        """
+                        UPDATE pending_jobs
+                        SET attempts = attempts + 1,
+                            failed = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END,
+                            last_error = ?
+                        WHERE seq = ?
+                        """,
+                        (WRITE_QUEUE_MAX_ATTEMPTS, str(e.orig or e), item[0]),
+                    )
+        return done
+
+    @staticmethod
+    def _to_frame(pending: list) -> pd.DataFrame:
+        rows = pd.DataFrame([json.loads(payload) for _, _, payload in pending])
+        rows["idempotency_key"] = [key for _, key, _ in pending]
+        return rows
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            self._wake.wait(timeout=backoff if self.last_error else 5.0)
+            self._wake.clear()
+            try:
+                # Keep going only while whole batches go through; a row that failed waits for
+                # the next wake-up instead of spending its attempts within milliseconds
+                while self.flush_once() == self.batch_size:
+                    pass
+                self.last_error = None
+                backoff = 1.0
+            except Exception as e:
+                self.last_error = str(e)
+                backoff = min(backoff * 2, 60.0)
+
+
+@cache_resource
+def get_write_queue() -> WriteBehindQueue:
+    return WriteBehindQueue(WRITE_QUEUE_PATH, get_engine())
+
+
+def job_payload(
+    customer_id, job_number, production_date, total_pieces, total_impressions, total_damages, notes=""
+) -> dict:
+    return {
+        "customer_id": int(customer_id),
+        "job_number": str(job_number).strip(),
+        "production_date": pd.to_datetime(production_date).date().isoformat(),
+        "total_pieces": int(total_pieces),
+        "total_impressions": int(total_impressions),
+        "total_damages": int(total_damages),
+        "notes": str(notes or ""),
+    }
@@ -1,538 +1,370 @@
+from datetime import datetime, timedelta
+
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 from sqlalchemy import text
-
-# ----------------------------------------------------------------------------
-# Helpers
-# ----------------------------------------------------------------------------
-def _fmt_percent(x):
-    """Format numeric-like values as a percent string; return blank for null/invalid."""
-    try:
-        if pd.isna(x):
-            return ""
-        return f"{float(x):.2f}%"
-    except Exception:
-        return ""
-
-def _fmt_mmddyyyy(val):
-    """Format a date/datetime/series to MM/DD/YYYY for UI display."""
-    try:
-        if isinstance(val, pd.Series):
-            return pd.to_datetime(val, errors="coerce").dt.strftime("%m/%d/%Y")
-        return pd.to_datetime(val, errors="coerce").strftime("%m/%d/%Y")
-    except Exception:
-        return ""
-
+from sqlalchemy.exc import IntegrityError
+
+from qc_core.cache import RESULT_STORE, cache_data, cache_stats, frame_fingerprint
+from qc_core.customers import (
+    add_customer,
+    get_all_customers,
+    get_customer_directory,
+    get_inactive_customers,
+    merge_customers,
+    set_customer_active,
+    update_customer_target,
+)
+from qc_core.db import POOL_SETTINGS, configure, get_engine, pool_metrics
+from qc_core.jobs import (
+    JobFilter,
+    JobValidationError,
+    correct_jobs,
+    delete_job,
+    get_recent_deletions,
+    preview_job_filter,
+    restore_jobs,
+    soft_delete_jobs,
+    validate_job_rows,
+)
+from qc_core.metrics import fmt_mmddyyyy, safe_rate
+from qc_core.queries import (
+    FORECAST_HISTORY_MONTHS,
+    MATRIX_TOP_K,
+    RANKING_MIN_VOLUME,
+    RANKING_PRIOR_WEIGHT,
+    TIME_GRAINS,
+    get_customer_forecast,
+    get_customer_month_matrix,
+    get_customer_ranking,
+    get_customer_stats,
+    get_damage_distribution,
+    get_period_comparison,
+    get_rollup,
+)
+from qc_core.reports import build_job_workbook
+from qc_core.schema import JOB_UNDO_WINDOW_HOURS, bootstrap_db
+from qc_core.snapshots import OVERVIEW_DEFAULT_DAYS
+from qc_core.store import get_job_store, get_write_queue, job_payload
+
+# Cached frames are shared views across sessions; with copy-on-write even an
+# in-place edit on a page copies first instead of reaching the shared result.
+# pandas 3 always copies on write and warns that the option is deprecated
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # ============================================================================
 # DATABASE (NEON / POSTGRES via Streamlit Secrets)
 # ============================================================================
 
-@st.cache_resource
-def get_engine():
+@st.cache_resource(show_spinner=False)
+def _connect_core() -> bool:
+    """Point the core data layer at the app's connection, once per server process."""
     # Streamlit Secrets must include:
     # [connections.qc]
     # url="postgresql://...."
-    return st.connection("qc", type="sql").engine
-
-
-def init_db():
-    """Initialize Postgres tables"""
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS customers (
-                    id SERIAL PRIMARY KEY,
-                    customer_name TEXT UNIQUE NOT NULL,
-                    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    active INTEGER DEFAULT 1,
-                    target_error_rate REAL DEFAULT 2.0
-                );
-                """
-            )
-        )
-
-        conn.execute(
-            text(
-                """
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id SERIAL PRIMARY KEY,
-                    customer_id INTEGER NOT NULL REFERENCES customers(id),
-                    job_number TEXT NOT NULL,
-                    date_entered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    production_date DATE,
-                    total_pieces INTEGER NOT NULL,
-                    total_impressions INTEGER NOT NULL,
-                    total_damages INTEGER NOT NULL,
-                    error_rate REAL NOT NULL,
-                    notes TEXT
-                );
-                """
-            )
-        )
+    # and may tune pools under [qc_pool_default] / [qc_pool_analytics]
+    configure(
+        st.connection("qc", type="sql").engine.url,
+        {pool: dict(st.secrets.get(f"qc_pool_{pool}", {})) for pool in POOL_SETTINGS},
+    )
+    return True
 
 
-def load_default_customers():
-    """Load default customer list if customers table is empty"""
-    default_customers = [
-        "2469 - The UPS Store",
-        "33.Black, LLC",
-        "4M Promotions",
-        "503 Network LLC",
-        "714 Creative",
-        "A4 Promotions",
-        "Abacus Products, Inc.",
-        "ACI Printing Services, Inc.",
-        "Adaptive Branding",
-        "Ad Stuff, Inc.",
-        "Albrecht (Branding by Beth)",
-        "Alpenglow Sports Inc",
-        "AMB3R LLC",
-        "American Solutions for Business",
-        "Anning Johnson Company",
-        "Aramark (Vestis)",
-        "Armstrong Print & Promotional",
-        "Badass Lass",
-        "Bimark, Inc.",
-        "Blackridge Branding",
-        "Blue Label Distribution (HiLife)",
-        "Bluelight Promotions",
-        "BPL Supplies Inc",
-        "Brand Original IPU",
-        "Bravo Promotional Marketing",
-        "Brent Binnall Enterprises",
-        "Bright Print Works",
-        "BSN Sports",
-        "Bulldog Creative Agency",
-        "B&W Wholesale",
-        "Calla Products, LLC",
-        "Care Youth Corporation",
-        "Cariloha",
-        "CDA Printing",
-        "Classic Awards & Promotions",
-        "Clayton AP Academy",
-        "CLNC Sports dba Secondslide",
-        "Clove and Twine",
-        "Club Colors",
-        "Clutch Creative",
-        "Cole Apparel",
-        "Color Graphics Screenprinting",
-        "Colossal Printing Company LLC",
-        "Cool Breeze Heating & Air Conditioning",
-        "Corporate Couture",
-        "Creative Marketing and Design AIA",
-        "CrossFreedom",
-        "Defero Swag",
-        "Del Sol",
-        "Deso Supply",
-        "DFS West",
-        "Divide Graphics",
-        "Divot Dawgs",
-        "Emblazeon",
-        "eRetailing Associates, LLC",
-        "Etched in Stone",
-        "Eureka Shirt Circuit",
-        "Evident Industries",
-        "Factory Design Group",
-        "Fastenal",
-        "Feature Graphix",
-        "Four Alarm Promotions IPU",
-        "Four Twigs LLC",
-        "Freedom USA (HiLife)",
-        "Fuel",
-        "GBrakes",
-        "GeekHead Printing and Apparel",
-        "Good News Collection",
-        "Great Basin Decoration",
-        "Gulf Coast Trades Center",
-        "HALO/AdSource",
-        "Happiscribble",
-        "High Desert Print Company",
-        "Home Means Nevada Co",
-        "Hooked on Swag",
-        "HSG Safety Supplies Inc.",
-        "HSM Enterprises",
-        "ICO Companies dba Red The Uniform Tailor",
-        "Ideal Printing, Promos & Wearables",
-        "Image Group",
-        "Image Source",
-        "Imagework Marketing",
-        "Initial Impression",
-        "Inkwell (Brandito)",
-        "Innovative Impressions IPU",
-        "Inproma LLC",
-        "International Minute Press",
-        "IZA Design Inc",
-        "Jen McFerrin Creative",
-        "Jetset Promotions LLC",
-        "J&J Printing",
-        "Johnson Promotions",
-        "J&R Gear",
-        "Kids Blanks",
-        "Knoblauch Advertising",
-        "Kug - Proforma",
-        "Lakeview Threads",
-        "Logo Boss",
-        "Lookout Promotions",
-        "LSK Branding",
-        "Luxury Branded Goods",
-        "Made to Order",
-        "Madhouz LLC",
-        "Makers NV",
-        "Marco Ideas Unlimited",
-        "Marco Polo Promotions LLC",
-        "Matrix Promotional Marketing IPU",
-        "Merch.com",
-        "Monitor Premiums, LLC",
-        "Montroy Signs & Graphics",
-        "Moondeck",
-        "Moore Promotions - Proforma",
-        "Mountain Freak Boutique",
-        "National Sports Apparel",
-        "NDS AIA",
-        "Needleworks Embroidery",
-        "No Quarter Co",
-        "North American Embroidery",
-        "Northwood Creations",
-        "Nothing Too Fancy",
-        "On-Line Printing & Graphics",
-        "Onyx Inc",
-        "Opal Promotions",
-        "Orangevale Copy Center",
-        "Ozio Lifestyles LLC",
-        "Paperworld Inc",
-        "Par 5 Promotions",
-        "Parle Enterprises, Inc",
-        "Pica Marketing Group",
-        "PIP Printing",
-        "Premium Custom Solutions",
-        "Print Head Inc",
-        "Print Promo Factory",
-        "Proforma Wine Country",
-        "Proforma Your Best Corp.",
-        "PromoCentric LLC",
-        "Promo Dog Inc",
-        "Promotional Edge",
-        "Purpose-Built PRO",
-        "Purpose-Built Retail",
-        "Qhik Moto",
-        "Quantum Graphics, Inc.",
-        "Radar Promotions",
-        "Rapt Clothing Inc",
-        "Red Thread Labs",
-        "Reno Motorsports Inc",
-        "Reno Print Labs",
-        "Reno Print Store",
-        "Reno Typographers",
-        "Rise Custom Apparel LLC",
-        "Rite of Passage ATCS",
-        "Rite of Passage Inc",
-        "Rockland Aramark",
-        "Round Up Creations LLC",
-        "Rush Advertising LLC",
-        "SanMar",
-        "Score International",
-        "SDG Promotions IPU",
-        "Sierra Air",
-        "Sierra Boat Company",
-        "Sierra Mountain Graphics",
-        "Signs by Van",
-        "Silkletter",
-        "Silkshop Screen Printing",
-        "Silver Peak Promotions",
-        "Silverscreen Decoration & Fulfillment",
-        "Silverscreen Direct",
-        "Skyward Corp dba Meridian Promotions",
-        "SOBO Concepts LLC",
-        "SpotFrog",
-        "Spot On Signs",
-        "Star Sports",
-        "Sticker Pack",
-        "Stock Roll Corp of America",
-        "Swagger",
-        "Swagoo Promotions",
-        "Swizzle",
-        "SynergyX1 LLC",
-        "Tahoe Basics",
-        "Tahoe LogoWear",
-        "Teamworks",
-        "Tee Shirt Bar",
-        "The Graphics Factory",
-        "The Hat Source",
-        "The Right Promotions",
-        "The Sourcing Group, LLC",
-        "The Sourcing Group Promo",
-        "Thunder House Productions LLC",
-        "TPG Trade Show & Events",
-        "Treasure Mountain",
-        "Triangle Design & Graphics LLC",
-        "TR Miller",
-        "TRSTY Media",
-        "Truly Gifted",
-        "Tugboat, Inc",
-        "University of Nevada Equipment Room",
-        "Unraveled Threads",
-        "Upper Park Clothing",
-        "UP Shirt Inc",
-        "Vail Dunlap",
-        "Washoe County",
-        "Washoe Schools",
-        "Way to Be Designs, LLC",
-        "WearyLand",
-        "Windy City Promos",
-        "Wolfgangs",
-        "W&T Graphix",
-        "Xcel",
-        "YanceyWorks LLC",
-        "Zazzle",
-    ]
-
-    eng = get_engine()
-    with eng.begin() as conn:
-        count = conn.execute(text("SELECT COUNT(*) FROM customers")).scalar_one()
-
-        if int(count) == 0:
-            stmt = text(
-                """
-                INSERT INTO customers (customer_name)
-                VALUES (:customer_name)
-                ON CONFLICT (customer_name) DO NOTHING
-                """
-            )
-            for customer in default_customers:
-                conn.execute(stmt, {"customer_name": customer})
-
-
-def add_customer(customer_name: str) -> bool:
-    eng = get_engine()
-    customer_name = (customer_name or "").strip()
-    if not customer_name:
-        return False
-
-    with eng.begin() as conn:
-        conn.execute(
-            text(
-                """
-                INSERT INTO customers (customer_name)
-                VALUES (:customer_name)
-                ON CONFLICT (customer_name) DO NOTHING
-                """
-            ),
-            {"customer_name": customer_name},
+# ----------------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------------
+def _display_column_config(columns) -> dict:
+    """Render-time formats for known columns. Frames stay numeric, so grids sort correctly."""
+    formats = {
+        "error_rate": st.column_config.NumberColumn(format="%.2f%%"),
+        "error_rate_impressions": st.column_config.NumberColumn(format="%.2f%%"),
+        "target_error_rate": st.column_config.NumberColumn(format="%.1f%%"),
+        "total_jobs": st.column_config.NumberColumn(format="localized"),
+        "total_pieces": st.column_config.NumberColumn(format="localized"),
+        "total_impressions": st.column_config.NumberColumn(format="localized"),
+        "total_damages": st.column_config.NumberColumn(format="localized"),
+        "production_date": st.column_config.DateColumn(format="MM/DD/YYYY"),
+        "date_added": st.column_config.DateColumn(format="MM/DD/YYYY"),
+    }
+    return {col: formats[col] for col in columns if col in formats}
+
+
+# Rejected jobs listed when a bulk correction breaks the entry rules
+BULK_ERRORS_SHOWN = 10
+
+# Above this many customers, pickers show a search box instead of the full list
+CUSTOMER_PICKER_SEARCH_THRESHOLD = 500
+
+
+def _customer_picker(label: str, placeholder: str, key: str, help: str = None) -> str:
+    """Selectbox over the customer directory; switches to prefix search for large lists."""
+    directory = get_customer_directory()
+    options = list(directory.options)
+
+    if len(options) > CUSTOMER_PICKER_SEARCH_THRESHOLD:
+        prefix = st.text_input(
+            f"Search {label.rstrip(' *').lower()}",
+            placeholder="Type the first letters of the customer name...",
+            key=f"{key}_search",
         )
+        options = directory.search(prefix, limit=CUSTOMER_PICKER_SEARCH_THRESHOLD)
 
-        exists = conn.execute(
-            text("SELECT 1 FROM customers WHERE customer_name = :customer_name"),
-            {"customer_name": customer_name},
-        ).fetchone()
-
-    return True
-
+    return st.selectbox(label, [placeholder] + options, help=help, key=key)
 
-def update_customer_target(customer_id: int, target_error_rate: float) -> None:
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(
-            text("UPDATE customers SET target_error_rate = :t WHERE id = :id"),
-            {"t": float(target_error_rate), "id": int(customer_id)},
-        )
 
+def _parked_jobs_panel() -> None:
+    """Queued jobs the database refused, with the reason and retry/discard actions."""
+    queue = get_write_queue()
+    parked = queue.parked()
+    if parked.empty:
+        return
 
-def get_all_customers() -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as conn:
-        df = pd.read_sql(
-            text(
-                """
-                SELECT id, customer_name, date_added, active, target_error_rate
-                FROM customers
-                WHERE active = 1
-                ORDER BY customer_name
-                """
-            ),
-            conn,
-        )
-    return df
-
-
-def add_job(
-    customer_id: int,
-    job_number: str,
-    production_date,
-    total_pieces: int,
-    total_impressions: int,
-    total_damages: int,
-    notes: str = "",
-) -> None:
-    error_rate = (total_damages / total_pieces * 100) if total_pieces > 0 else 0.0
-
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(
-            text(
-                """
-                INSERT INTO jobs (
-                    customer_id,
-                    job_number,
-                    production_date,
-                    total_pieces,
-                    total_impressions,
-                    total_damages,
-                    error_rate,
-                    notes
-                )
-                VALUES (
-                    :customer_id,
-                    :job_number,
-                    :production_date,
-                    :total_pieces,
-                    :total_impressions,
-                    :total_damages,
-                    :error_rate,
-                    :notes
-                )
-                """
-            ),
-            {
-                "customer_id": int(customer_id),
-                "job_number": str(job_number),
-                "production_date": production_date,
-                "total_pieces": int(total_pieces),
-                "total_impressions": int(total_impressions),
-                "total_damages": int(total_damages),
-                "error_rate": float(error_rate),
-                "notes": str(notes or ""),
+    with st.expander(f"⚠️ {len(parked)} queued job(s) were not saved", expanded=True):
+        id_to_name = {i: name for name, i in get_customer_directory().name_to_id.items()}
+        view = parked.assign(customer=parked["customer_id"].map(id_to_name))
+        st.dataframe(
+            view[["seq", "customer", "job_number", "production_date", "total_pieces", "total_damages", "last_error"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "seq": "Queue #",
+                "customer": "Customer",
+                "job_number": "Job Number",
+                "production_date": "Production Date",
+                "total_pieces": "Pieces",
+                "total_damages": "Damages",
+                "last_error": "Reason",
             },
         )
+        chosen = st.multiselect("Queue # to act on", parked["seq"].tolist(), key="parked_jobs")
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("🔁 Retry", disabled=not chosen, use_container_width=True):
+                queue.retry(chosen)
+                st.rerun()
+        with c2:
+            if st.button("🗑️ Discard", disabled=not chosen, use_container_width=True):
+                queue.discard(chosen)
+                st.rerun()
 
 
-def get_all_jobs() -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as conn:
-        df = pd.read_sql(
-            text(
-                """
-                SELECT j.*, c.customer_name
-                FROM jobs j
-                JOIN customers c ON j.customer_id = c.id
-                ORDER BY j.production_date DESC, j.date_entered DESC
-                """
-            ),
-            conn,
-        )
+def _grain_selector(start_date, end_date, key: str) -> str:
+    """Time grain radio; the initial choice depends on how long the range is."""
+    span_days = (end_date - start_date).days + 1
+    if span_days <= 31:
+        default = "Day"
+    elif span_days <= 180:
+        default = "Week"
+    elif span_days <= 730:
+        default = "Month"
+    else:
+        default = "Quarter"
 
-    if not df.empty and "production_date" in df.columns:
-        df["production_date"] = pd.to_datetime(df["production_date"])
-
-    return df
-
-
-def get_jobs_by_customer(customer_id: int, start_date=None, end_date=None) -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as conn:
-        if start_date and end_date:
-            df = pd.read_sql(
-                text(
-                    """
-                    SELECT j.*, c.customer_name
-                    FROM jobs j
-                    JOIN customers c ON j.customer_id = c.id
-                    WHERE j.customer_id = :cid AND j.production_date BETWEEN :sd AND :ed
-                    ORDER BY j.production_date DESC
-                    """
-                ),
-                conn,
-                params={"cid": int(customer_id), "sd": start_date, "ed": end_date},
-            )
-        else:
-            df = pd.read_sql(
-                text(
-                    """
-                    SELECT j.*, c.customer_name
-                    FROM jobs j
-                    JOIN customers c ON j.customer_id = c.id
-                    WHERE j.customer_id = :cid
-                    ORDER BY j.production_date DESC
-                    """
-                ),
-                conn,
-                params={"cid": int(customer_id)},
-            )
+    grains = list(TIME_GRAINS)
+    return st.radio("Time grain", grains, index=grains.index(default), horizontal=True, key=key)
 
-    if not df.empty and "production_date" in df.columns:
-        df["production_date"] = pd.to_datetime(df["production_date"])
 
-    return df
+def _apply_grain_axis(fig, grain: str) -> None:
+    _, _, dtick, tickformat = TIME_GRAINS[grain]
+    if dtick:
+        fig.update_xaxes(dtick=dtick, tickformat=tickformat)
+    else:
+        fig.update_xaxes(tickformat=tickformat)
 
 
-def get_jobs_by_date_range(start_date, end_date) -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as conn:
-        df = pd.read_sql(
-            text(
-                """
-                SELECT j.*, c.customer_name
-                FROM jobs j
-                JOIN customers c ON j.customer_id = c.id
-                WHERE j.production_date BETWEEN :sd AND :ed
-                ORDER BY j.production_date DESC
-                """
-            ),
-            conn,
-            params={"sd": start_date, "ed": end_date},
+# ----------------------------------------------------------------------------
+# Figures
+# ----------------------------------------------------------------------------
+def _figure_key(build, data: pd.DataFrame, **options):
+    return build.__name__, frame_fingerprint(data), tuple(sorted(options.items()))
+
+
+def _figure_size(fig) -> int:
+    # The result store cannot see inside a Figure; its JSON is a fair measure of what it holds
+    return len(fig.to_json())
+
+
+@cache_data(ttl=3600, name="Plotly figures", key=_figure_key, size=_figure_size)
+def _figure(build, data: pd.DataFrame, **options):
+    """`build(data, **options)`, built once per data fingerprint and options and shared by all sessions.
+
+    Reruns that change nothing the chart depends on hand st.plotly_chart the Figure
+    already built, so neither plotly.express nor figure validation runs again. The
+    Figure is shared: draw it, never modify it.
+    """
+    return build(data, **options)
+
+
+def _trend_figure(rollup: pd.DataFrame, rate_col: str, rate_label: str, grain: str, target_rate=None):
+    fig = px.line(
+        rollup,
+        x="period",
+        y=rate_col,
+        markers=True,
+        title=None,
+        hover_data={
+            "jobs": True,
+            "total_pieces": True,
+            "total_impressions": True,
+            "total_damages": True,
+        },
+    )
+    fig.update_traces(marker=dict(size=10))
+    fig.update_layout(
+        xaxis_title=f"Production {grain}",
+        yaxis_title=rate_label,
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=10, b=10),
+    )
+    _apply_grain_axis(fig, grain)
+    if target_rate is not None:
+        fig.add_hline(
+            y=target_rate,
+            line_dash="dash",
+            annotation_text=f"Target {target_rate:.1f}%",
+            annotation_position="top left",
         )
+    return fig
 
-    if not df.empty and "production_date" in df.columns:
-        df["production_date"] = pd.to_datetime(df["production_date"])
-
-    return df
-
-
-def get_customer_stats() -> pd.DataFrame:
-    eng = get_engine()
-    with eng.connect() as conn:
-        df = pd.read_sql(
-            text(
-                """
-                SELECT
-                    c.customer_name,
-                    c.target_error_rate,
-                    COUNT(j.id) AS total_jobs,
-                    COALESCE(SUM(j.total_pieces), 0) AS total_pieces,
-                    COALESCE(SUM(j.total_impressions), 0) AS total_impressions,
-                    COALESCE(SUM(j.total_damages), 0) AS total_damages,
-                    CASE
-                        WHEN COALESCE(SUM(j.total_pieces), 0) > 0
-                        THEN (COALESCE(SUM(j.total_damages), 0) * 100.0 / COALESCE(SUM(j.total_pieces), 0))
-                        ELSE 0
-                    END AS error_rate,
-                    CASE
-                        WHEN COALESCE(SUM(j.total_impressions), 0) > 0
-                        THEN (COALESCE(SUM(j.total_damages), 0) * 100.0 / COALESCE(SUM(j.total_impressions), 0))
-                        ELSE 0
-                    END AS error_rate_impressions
-                FROM customers c
-                LEFT JOIN jobs j ON c.id = j.customer_id
-                WHERE c.active = 1
-                GROUP BY c.id, c.customer_name, c.target_error_rate
-                HAVING COUNT(j.id) > 0
-                ORDER BY error_rate DESC
-                """
-            ),
-            conn,
-        )
-    return df
 
+def _production_figure(rollup: pd.DataFrame, grain: str):
+    fig = go.Figure()
+
+    # Bottom: Damages (Red)
+    fig.add_bar(
+        x=rollup["period"],
+        y=rollup["total_damages"],
+        name="Damaged Pieces",
+        marker_color="#d62728",
+        hovertemplate="%{y:,} damaged<extra></extra>",
+    )
+
+    # Top: Good pieces (Blue)
+    fig.add_bar(
+        x=rollup["period"],
+        y=rollup["good_pieces"],
+        name="Good Pieces",
+        marker_color="#1f77b4",
+        hovertemplate="%{y:,} good<extra></extra>",
+    )
 
-def delete_job(job_id: int) -> None:
-    eng = get_engine()
-    with eng.begin() as conn:
-        conn.execute(text("DELETE FROM jobs WHERE id = :id"), {"id": int(job_id)})
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title=f"Production {grain}",
+        yaxis_title="Total Pieces",
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=10, b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    _apply_grain_axis(fig, grain)
+    return fig
+
+
+SCATTER_COLUMNS = [
+    "production_period",
+    "damages_per_1000_impressions",
+    "job_number",
+    "customer_name",
+    "total_pieces",
+    "total_impressions",
+    "total_damages",
+    "production_date",
+]
+
+
+def _scatter_figure(jobs: pd.DataFrame, grain: str):
+    fig = px.scatter(
+        jobs.sort_values("production_date"),
+        x="production_period",
+        y="damages_per_1000_impressions",
+        hover_name="job_number",
+        hover_data={
+            "customer_name": True,
+            "total_pieces": True,
+            "total_impressions": True,
+            "total_damages": True,
+            "production_date": True,  # hover formatting is Plotly; leaving raw is fine
+        },
+        title=None,
+    )
+    fig.update_traces(marker=dict(size=10, opacity=0.85))
+    fig.update_layout(
+        xaxis_title=f"Production {grain}",
+        yaxis_title="Damages per 1,000 Impressions",
+        margin=dict(l=10, r=10, t=10, b=10),
+    )
+    _apply_grain_axis(fig, grain)
+    return fig
+
+
+def _heatmap_figure(matrix: pd.DataFrame, rate_title: str):
+    rates = matrix.drop(columns="volume")
+    fig = px.imshow(
+        rates.to_numpy(dtype=float),
+        x=[month.strftime("%b %Y") for month in rates.columns],
+        y=[f"{name} ({volume:,.0f})" for name, volume in zip(rates.index, matrix["volume"])],
+        color_continuous_scale="RdYlGn_r",
+        # One bad month should not wash out the rest of the scale
+        zmin=0,
+        zmax=max(float(rates.stack().quantile(0.95)), 0.01),
+        aspect="auto",
+        labels={"x": "Production Month", "y": "Customer", "color": rate_title},
+    )
+    fig.update_layout(height=max(320, 24 * len(rates) + 120), margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+
+def _ranking_figure(ranked: pd.DataFrame, basis: str, rate_col: str, rate_title: str):
+    ranking_hover = {"jobs": True, f"total_{basis}": True, "total_damages": True, rate_col: ":.2f"}
+    fig = px.bar(ranked, x="customer_name", y="smoothed_rate", hover_data=ranking_hover, title=None)
+    fig.update_layout(
+        xaxis_title="Customer",
+        yaxis_title=f"Smoothed {rate_title}",
+        showlegend=False,
+        margin=dict(l=10, r=10, t=10, b=10),
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+
+DISTRIBUTION_COLUMN_CONFIG = {
+    "customer_name": st.column_config.TextColumn("Customer"),
+    "jobs": st.column_config.NumberColumn("Jobs", format="localized"),
+    "mean_damages_per_1000": st.column_config.NumberColumn("Mean", format="%.2f"),
+    "p50_damages_per_1000": st.column_config.NumberColumn("P50", format="%.2f"),
+    "p90_damages_per_1000": st.column_config.NumberColumn("P90", format="%.2f"),
+    "p99_damages_per_1000": st.column_config.NumberColumn("P99", format="%.2f"),
+    "variance_damages_per_1000": st.column_config.NumberColumn("Variance", format="%.2f"),
+    "stddev_damages_per_1000": st.column_config.NumberColumn("Std Dev", format="%.2f"),
+}
+
+
+FORECAST_COLUMN_CONFIG = {
+    "customer_name": st.column_config.TextColumn("Customer"),
+    "target_error_rate": st.column_config.NumberColumn("Target", format="%.2f%%"),
+    "projected_rate": st.column_config.NumberColumn("Projected", format="%.2f%%"),
+    "gap": st.column_config.NumberColumn("Over Target (pts)", format="%+.2f"),
+    "previous_projection": st.column_config.NumberColumn("Projected Last Month", format="%.2f%%"),
+    "latest_month_rate": st.column_config.NumberColumn("This Month So Far", format="%.2f%%"),
+    "months_with_jobs": st.column_config.NumberColumn("Months With Jobs"),
+}
+
+
+def _distribution_metrics(row) -> None:
+    """P50/P90/P99/std-dev metric row for one line of get_damage_distribution()."""
+    d1, d2, d3, d4 = st.columns(4)
+    with d1:
+        st.metric("Median (P50)", f"{row['p50_damages_per_1000']:.2f}")
+    with d2:
+        st.metric("P90", f"{row['p90_damages_per_1000']:.2f}")
+    with d3:
+        st.metric("P99", f"{row['p99_damages_per_1000']:.2f}")
+    with d4:
+        std = row["stddev_damages_per_1000"]
+        st.metric("Std Dev", "—" if pd.isna(std) else f"{std:.2f}")
 
 
 # ============================================================================
@@ -564,18 +396,21 @@ def main():
         unsafe_allow_html=True,
     )
 
-    # Quick connection check
+    # Quick connection check; submissions keep working through the local queue while offline
+    db_online = True
     try:
+        _connect_core()
         eng = get_engine()
         with eng.connect() as conn:
             conn.execute(text("SELECT 1"))
     except Exception as e:
-        st.error("❌ Database NOT connected")
-        st.exception(e)
-        return
+        db_online = False
+        st.warning("⚠️ Database unreachable — new job submissions are queued locally and will sync automatically.")
+        with st.expander("Connection error details"):
+            st.exception(e)
 
-    init_db()
-    load_default_customers()
+    if db_online:
+        bootstrap_db()
 
     with st.sidebar:
         try:
@@ -599,6 +434,42 @@ def main():
             label_visibility="collapsed",
         )
 
+        queue_stats = get_write_queue().stats()
+        st.markdown("---")
+        st.markdown("### Sync Queue")
+        q1, q2 = st.columns(2)
+        with q1:
+            st.metric("Pending", queue_stats["depth"])
+        with q2:
+            st.metric("Lag", f"{queue_stats['lag_seconds']:.0f}s")
+        if queue_stats["failed"]:
+            st.error(
+                f"❌ {queue_stats['failed']} queued job(s) were rejected by the database. "
+                "Review them under Job Data Submission."
+            )
+        if queue_stats["last_error"]:
+            st.caption(f"Last sync error: {queue_stats['last_error']}")
+
+        pools = pool_metrics() if db_online else pd.DataFrame()
+        if not pools.empty:
+            with st.expander("🔌 Connection Pools"):
+                st.dataframe(pools.set_index("pool").T, use_container_width=True)
+
+        with st.expander("🧠 Result Cache"):
+            caches = cache_stats()
+            st.caption(
+                f"{RESULT_STORE.total_bytes / 1024 ** 2:,.1f} MB of "
+                f"{RESULT_STORE.budget_bytes / 1024 ** 2:,.0f} MB budget, shared by all sessions"
+            )
+            st.dataframe(
+                caches.set_index("cache"),
+                use_container_width=True,
+                column_config={
+                    "size_mb": st.column_config.NumberColumn("MB", format="%.1f"),
+                    "hit_rate": st.column_config.ProgressColumn("Hit Rate", min_value=0.0, max_value=1.0),
+                },
+            )
+
     st.markdown(
         "<h1 style='text-align:center;'>Screenprint QC Dashboard</h1>",
         unsafe_allow_html=True,
@@ -609,22 +480,107 @@ def main():
     )
     st.markdown("---")
 
+    if not db_online and menu != "📝 Job Data Submission":
+        st.info("📡 This page needs the database. Job Data Submission is still available.")
+        return
+
     # ========================================================================
     # JOB DATA SUBMISSION PAGE
     # ========================================================================
     if menu == "📝 Job Data Submission":
         st.header("Job Data Submission")
 
+        try:
+            get_customer_directory()
+        except Exception:
+            st.error("❌ The customer list has not been loaded yet, so jobs cannot be entered until the database is back.")
+            return
+
         if "job_saved" in st.session_state:
             st.success(st.session_state["job_saved"])
             del st.session_state["job_saved"]
 
-        customers_df = get_all_customers()
-        customer_options = customers_df["customer_name"].tolist()
+        _parked_jobs_panel()
+
+        entry_mode = st.radio(
+            "Entry mode",
+            ["Single Job", "Batch Grid"],
+            horizontal=True,
+            key="submit_entry_mode",
+        )
+
+        if entry_mode == "Batch Grid":
+            st.caption("Enter one job per row. All rows are checked together and saved in one step.")
+            directory = get_customer_directory()
+
+            blank_grid = pd.DataFrame(
+                {
+                    "customer_name": pd.Series(dtype="object"),
+                    "job_number": pd.Series(dtype="object"),
+                    "production_date": pd.Series(dtype="datetime64[ns]"),
+                    "total_pieces": pd.Series(dtype="Int64"),
+                    "total_impressions": pd.Series(dtype="Int64"),
+                    "total_damages": pd.Series(dtype="Int64"),
+                    "notes": pd.Series(dtype="object"),
+                }
+            )
+
+            grid = st.data_editor(
+                blank_grid,
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                key="batch_job_grid",
+                column_config={
+                    "customer_name": st.column_config.SelectboxColumn(
+                        "Customer *", options=list(directory.options), required=True, width="large"
+                    ),
+                    "job_number": st.column_config.TextColumn("Job Number *", required=True),
+                    "production_date": st.column_config.DateColumn(
+                        "Production Date *", format="MM/DD/YYYY", default=datetime.today().date(), required=True
+                    ),
+                    "total_pieces": st.column_config.NumberColumn("Total Pieces *", min_value=0, step=1, default=0),
+                    "total_impressions": st.column_config.NumberColumn("Total Impressions *", min_value=0, step=1, default=0),
+                    "total_damages": st.column_config.NumberColumn("Total Damages *", min_value=0, step=1, default=0),
+                    "notes": st.column_config.TextColumn("Notes"),
+                },
+            )
+
+            rows = grid.dropna(how="all").reset_index(drop=True)
+            st.markdown(f"**Rows entered:** {len(rows)}")
+            st.markdown("---")
+
+            if st.button("💾 Save All Rows", type="primary", use_container_width=True):
+                rows["customer_id"] = rows["customer_name"].map(directory.name_to_id)
+                errors = validate_job_rows(rows, unique_job_numbers=True)
+                if errors:
+                    st.error("❌ Nothing was saved. Fix these rows and try again:\n\n" + "\n".join(f"- {e}" for e in errors))
+                else:
+                    get_write_queue().enqueue(
+                        [
+                            job_payload(
+                                r.customer_id,
+                                r.job_number,
+                                r.production_date,
+                                r.total_pieces,
+                                r.total_impressions,
+                                r.total_damages,
+                                "" if pd.isna(r.notes) else r.notes,
+                            )
+                            for r in rows.itertuples(index=False)
+                        ]
+                    )
+                    del st.session_state["batch_job_grid"]
+                    st.session_state["job_saved"] = (
+                        f"✅ {len(rows)} jobs queued; they sync to the database in the background."
+                    )
+                    st.rerun()
+            return
 
-        selected_customer = st.selectbox(
+        selected_customer = _customer_picker(
             "Select Customer *",
-            ["-- Select Customer --"] + customer_options,
+            "-- Select Customer --",
+            key="submit_customer",
             help="Choose the customer for this job",
         )
 
@@ -632,9 +588,7 @@ def main():
             st.info("👆 Please select a customer to continue")
             return
 
-        customer_id = int(
-            customers_df[customers_df["customer_name"] == selected_customer]["id"].values[0]
-        )
+        customer_id = int(get_customer_directory().id_for(selected_customer))
 
         st.markdown("---")
         col1, col2 = st.columns(2)
@@ -672,23 +626,23 @@ def main():
         st.markdown("---")
 
         if st.button("💾 Save Job Data", type="primary", use_container_width=True):
-            if not job_number:
-                st.error("❌ Job Number is required!")
-            elif total_pieces <= 0:
-                st.error("❌ Total Pieces must be greater than 0!")
-            elif total_impressions <= 0:
-                st.error("❌ Total Impressions must be greater than 0!")
+            job = job_payload(
+                customer_id,
+                job_number,
+                production_date,
+                total_pieces,
+                total_impressions,
+                total_damages,
+                notes,
+            )
+            errors = validate_job_rows(pd.DataFrame([job]))
+            if errors:
+                st.error("\n\n".join(f"❌ {e.message}" for e in errors))
             else:
-                add_job(
-                    customer_id,
-                    job_number,
-                    production_date,
-                    total_pieces,
-                    total_impressions,
-                    total_damages,
-                    notes,
+                get_write_queue().enqueue([job])
+                st.session_state["job_saved"] = (
+                    f"✅ Job {job_number} for {selected_customer} queued; it syncs to the database in the background."
                 )
-                st.session_state["job_saved"] = f"✅ Job {job_number} for {selected_customer} saved successfully!"
                 st.rerun()
 
     # ========================================================================
@@ -697,9 +651,8 @@ def main():
     elif menu == "📈 Customer Analytics":
         st.header("Quality Control Metrics by Customer")
 
-        customers_df = get_all_customers()
-        customer_options = ["-- All Customers --"] + customers_df["customer_name"].tolist()
-        selected_customer = st.selectbox("Select Customer", customer_options)
+        directory = get_customer_directory()
+        selected_customer = _customer_picker("Select Customer", "-- All Customers --", key="analytics_customer")
 
         col1, col2, col3 = st.columns([2, 2, 1])
         with col1:
@@ -715,35 +668,30 @@ def main():
                 format="MM/DD/YYYY",
             )
         with col3:
-            if st.button("🔄 Refresh", use_container_width=True):
-                st.rerun()
+            refresh = st.button("🔄 Refresh", use_container_width=True)
 
-        start_disp = _fmt_mmddyyyy(start_date)
-        end_disp = _fmt_mmddyyyy(end_date)
+        start_disp = fmt_mmddyyyy(start_date)
+        end_disp = fmt_mmddyyyy(end_date)
+
+        job_store = get_job_store()
+        job_store.sync(force=refresh)
 
         if selected_customer == "-- All Customers --":
-            df = get_jobs_by_date_range(start_date, end_date)
+            df = job_store.jobs_by_date_range(start_date, end_date)
             st.subheader(f"All Customers - {start_disp} to {end_disp}")
+            customer_id = None
             target_rate = 2.0
         else:
-            customer_row = customers_df[customers_df["customer_name"] == selected_customer].iloc[0]
-            customer_id = int(customer_row["id"])
-            target_rate = float(customer_row.get("target_error_rate", 2.0) or 2.0)
-            df = get_jobs_by_customer(customer_id, start_date, end_date)
+            customer_id = int(directory.id_for(selected_customer))
+            target_rate = directory.target_for(customer_id) or 2.0
+            df = job_store.jobs_by_customer(customer_id, start_date, end_date)
             st.subheader(f"{selected_customer} - {start_disp} to {end_disp}")
 
         if df.empty:
             st.warning("📭 No jobs found for this selection.")
             return
 
-        df = df.copy()
-
-        df["damages_per_1000_impressions"] = df.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 1000.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
+        df["damages_per_1000_impressions"] = safe_rate(df["total_damages"], df["total_impressions"], 1000.0)
 
         rate_basis = st.radio(
             "Error rate basis",
@@ -753,6 +701,19 @@ def main():
         rate_col = "error_rate_impressions" if rate_basis.startswith("Per Impressions") else "error_rate"
         rate_label = "Error Rate (% of impressions)" if rate_col == "error_rate_impressions" else "Error Rate (% of pieces)"
 
+        # Previous period of equal length, for metric deltas
+        comparison = get_period_comparison(start_date, end_date)
+        if customer_id is None:
+            comparison_row = comparison[comparison["customer_id"].isna()]
+        else:
+            comparison_row = comparison[comparison["customer_id"] == customer_id]
+        comparison_row = comparison_row.iloc[0] if not comparison_row.empty else None
+
+        def _delta(col, fmt):
+            if comparison_row is None or pd.isna(comparison_row[f"{col}_delta"]):
+                return None
+            return fmt.format(comparison_row[f"{col}_delta"])
+
         # KPIs
         st.markdown("### 📊 Key Performance Metrics")
         top1, top2, top3 = st.columns(3)
@@ -763,14 +724,19 @@ def main():
         total_damages = int(df["total_damages"].sum())
 
         with top1:
-            st.metric("Total Jobs", len(df))
+            st.metric("Total Jobs", len(df), delta=_delta("jobs", "{:+,.0f} vs prev."))
         with top2:
             st.metric("Total Pieces", f"{total_pieces:,}")
         with top3:
             st.metric("Total Impressions", f"{total_impressions:,}")
 
         with bot1:
-            st.metric("Total Damages", f"{total_damages:,}")
+            st.metric(
+                "Total Damages",
+                f"{total_damages:,}",
+                delta=_delta("total_damages", "{:+,.0f} vs prev."),
+                delta_color="inverse",
+            )
         with bot2:
             overall_rate = (
                 (total_damages / total_impressions) * 100
@@ -779,132 +745,129 @@ def main():
             )
             st.metric(
                 f"Error Rate ({'Impressions' if rate_col == 'error_rate_impressions' else 'Pieces'})",
-                f"{overall_rate:.2f}%"
+                f"{overall_rate:.2f}%",
+                delta=_delta(rate_col, "{:+.2f} pts vs prev."),
+                delta_color="inverse",
             )
 
         st.caption(
             f"Target error rate: {target_rate:.1f}% (this target was originally set per pieces; you can still use it as a benchmark when viewing per impressions)"
         )
-        st.markdown("---")
+        period_days = (end_date - start_date).days + 1
+        prev_start = start_date - timedelta(days=period_days)
+        prev_end = start_date - timedelta(days=1)
+        st.caption(f"Deltas compare against the previous {period_days} days ({fmt_mmddyyyy(prev_start)} to {fmt_mmddyyyy(prev_end)}).")
+
+        distribution = get_damage_distribution(start_date, end_date)
+        company_dist = distribution[distribution["customer_id"].isna()]
+        selected_dist = company_dist if customer_id is None else distribution[distribution["customer_id"] == customer_id]
+        if not selected_dist.empty:
+            st.markdown("### 📐 Damages per 1,000 Impressions — Job Distribution")
+            _distribution_metrics(selected_dist.iloc[0])
+            if customer_id is not None and not company_dist.empty:
+                company_row = company_dist.iloc[0]
+                st.caption(
+                    f"Company-wide: P50 {company_row['p50_damages_per_1000']:.2f} · "
+                    f"P90 {company_row['p90_damages_per_1000']:.2f} · "
+                    f"P99 {company_row['p99_damages_per_1000']:.2f}"
+                )
 
-        # Ensure impressions-based rate exists
-        df["error_rate_impressions"] = df.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
+        st.markdown("### ↔️ Period-over-Period Comparison")
+        comparison_columns = [
+            "customer_name",
+            "jobs",
+            "prev_jobs",
+            "jobs_delta",
+            "total_damages",
+            "prev_total_damages",
+            "total_damages_delta",
+            "error_rate",
+            "prev_error_rate",
+            "error_rate_delta",
+            "error_rate_impressions",
+            "prev_error_rate_impressions",
+            "error_rate_impressions_delta",
+        ]
+        comparison_config = _display_column_config(comparison_columns)
+        for col in ["prev_error_rate", "prev_error_rate_impressions"]:
+            comparison_config[col] = st.column_config.NumberColumn(format="%.2f%%")
+        for col in ["error_rate_delta", "error_rate_impressions_delta"]:
+            comparison_config[col] = st.column_config.NumberColumn(format="%+.2f pts")
+
+        headline = comparison[comparison["customer_id"].isna()]
+        if customer_id is not None:
+            headline = pd.concat([comparison[comparison["customer_id"] == customer_id], headline])
+        st.dataframe(
+            headline[comparison_columns],
+            use_container_width=True,
+            hide_index=True,
+            column_config=comparison_config,
         )
-
-        df["production_date"] = pd.to_datetime(df["production_date"], errors="coerce")
-        df = df.dropna(subset=["production_date"]).copy()
-        df["production_month"] = df["production_date"].dt.to_period("M").dt.to_timestamp()
-
-        monthly = (
-            df.groupby("production_month", as_index=False)
-            .agg(
-                total_damages=("total_damages", "sum"),
-                total_pieces=("total_pieces", "sum"),
-                total_impressions=("total_impressions", "sum"),
-                jobs=("job_number", "count"),
+        with st.expander("All customers, current vs previous period"):
+            st.dataframe(
+                comparison[comparison["customer_id"].notna()][comparison_columns],
+                use_container_width=True,
+                hide_index=True,
+                column_config=comparison_config,
             )
-            .sort_values("production_month")
-        )
 
-        monthly["error_rate"] = monthly.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_pieces"]) * 100.0)
-            if float(r.get("total_pieces", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
-        monthly["error_rate_impressions"] = monthly.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
+        st.markdown("---")
 
-        # NEW: stacked bar components
-        monthly["good_pieces"] = (monthly["total_pieces"] - monthly["total_damages"]).clip(lower=0)
+        # Ensure impressions-based rate exists
+        df["error_rate_impressions"] = safe_rate(df["total_damages"], df["total_impressions"], 100.0)
+
+        grain = _grain_selector(start_date, end_date, key="analytics_grain")
+        rollup = get_rollup(customer_id, grain, start_date, end_date)
 
         left, right = st.columns(2)
 
         with left:
-            st.markdown("### 📉 Error Rate Trend (by Production Month)")
-
-            fig = px.line(
-                monthly,
-                x="production_month",
-                y=rate_col,
-                markers=True,
-                title=None,
-                hover_data={
-                    "jobs": True,
-                    "total_pieces": True,
-                    "total_impressions": True,
-                    "total_damages": True,
-                },
-            )
-            fig.update_traces(marker=dict(size=10))
-            fig.update_layout(
-                xaxis_title="Production Month",
-                yaxis_title=rate_label,
-                hovermode="x unified",
-                margin=dict(l=10, r=10, t=10, b=10),
-            )
-            fig.update_xaxes(dtick="M1", tickformat="%b %Y")
-            fig.add_hline(
-                y=target_rate,
-                line_dash="dash",
-                annotation_text=f"Target {target_rate:.1f}%",
-                annotation_position="top left",
+            st.markdown(f"### 📉 Error Rate Trend (by Production {grain})")
+            fig = _figure(
+                _trend_figure,
+                rollup,
+                rate_col=rate_col,
+                rate_label=rate_label,
+                grain=grain,
+                target_rate=float(target_rate),
             )
             st.plotly_chart(fig, use_container_width=True)
 
         with right:
-            st.markdown("### 🧱 Production vs Damages (Stacked by Month)")
-
-            fig = go.Figure()
-
-            # Bottom: Damages (Red)
-            fig.add_bar(
-                x=monthly["production_month"],
-                y=monthly["total_damages"],
-                name="Damaged Pieces",
-                marker_color="#d62728",
-                hovertemplate="%{y:,} damaged<extra></extra>",
-            )
-
-            # Top: Good pieces (Blue)
-            fig.add_bar(
-                x=monthly["production_month"],
-                y=monthly["good_pieces"],
-                name="Good Pieces",
-                marker_color="#1f77b4",
-                hovertemplate="%{y:,} good<extra></extra>",
-            )
-
-            fig.update_layout(
-                barmode="stack",
-                xaxis_title="Production Month",
-                yaxis_title="Total Pieces",
-                hovermode="x unified",
-                margin=dict(l=10, r=10, t=10, b=10),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            )
-            fig.update_xaxes(dtick="M1", tickformat="%b %Y")
-
-            st.plotly_chart(fig, use_container_width=True)
+            st.markdown(f"### 🧱 Production vs Damages (Stacked by {grain})")
+            st.plotly_chart(_figure(_production_figure, rollup, grain=grain), use_container_width=True)
 
         st.markdown("---")
 
         csv = df.to_csv(index=False)
         safe_name = "all_customers" if selected_customer == "-- All Customers --" else selected_customer.replace(" ", "_")
-        st.download_button(
-            label="📊 Download Report (CSV)",
-            data=csv,
-            file_name=f"qc_report_{safe_name}_{start_date}_{end_date}.csv",
-            mime="text/csv",
-        )
+        e1, e2 = st.columns(2)
+        with e1:
+            st.download_button(
+                label="📊 Download Report (CSV)",
+                data=csv,
+                file_name=f"qc_report_{safe_name}_{start_date}_{end_date}.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+        with e2:
+            # Built on demand from the rows already loaded above, then kept for this selection
+            workbook_key = (selected_customer, start_date, end_date, len(df))
+            if st.session_state.get("excel_report", (None, None))[0] != workbook_key:
+                if st.button("📗 Build Excel Workbook", use_container_width=True):
+                    title = "All Customers" if customer_id is None else selected_customer
+                    with st.spinner("Building workbook..."):
+                        data = build_job_workbook(df, title, start_date, end_date, target_rate)
+                    st.session_state["excel_report"] = (workbook_key, data)
+                    st.rerun()
+            else:
+                st.download_button(
+                    label="📗 Download Workbook (Excel)",
+                    data=st.session_state["excel_report"][1],
+                    file_name=f"qc_report_{safe_name}_{start_date}_{end_date}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True,
+                )
 
     # ========================================================================
     # ALL CUSTOMERS OVERVIEW
@@ -917,7 +880,7 @@ def main():
         with cA:
             start_date = st.date_input(
                 "Start Date",
-                value=datetime.today() - timedelta(days=90),
+                value=datetime.today() - timedelta(days=OVERVIEW_DEFAULT_DAYS),
                 key="all_overview_start",
                 format="MM/DD/YYYY",
             )
@@ -929,8 +892,10 @@ def main():
                 format="MM/DD/YYYY",
             )
         with cC:
-            if st.button("🔄 Refresh", use_container_width=True, key="all_overview_refresh"):
-                st.rerun()
+            refresh = st.button("🔄 Refresh", use_container_width=True, key="all_overview_refresh")
+
+        job_store = get_job_store()
+        job_store.sync(force=refresh)
 
         stats_df = get_customer_stats()
         if stats_df.empty:
@@ -938,55 +903,18 @@ def main():
             return
 
         # Pull job-level data for the trendline + scatter (all customers, date filtered)
-        jobs_df = get_jobs_by_date_range(start_date, end_date)
+        jobs_df = job_store.jobs_by_date_range(start_date, end_date)
         if jobs_df.empty:
             st.warning("📭 No jobs found for this date range.")
             return
 
-        # Derived fields for overview charts
-        jobs_df = jobs_df.copy()
+        # Derived fields for overview charts; columns are replaced, never written in place, so no copy first
         jobs_df["production_date"] = pd.to_datetime(jobs_df["production_date"], errors="coerce")
-        jobs_df = jobs_df.dropna(subset=["production_date"]).copy()
-        jobs_df["production_month"] = jobs_df["production_date"].dt.to_period("M").dt.to_timestamp()
-
-        jobs_df["damages_per_1000_impressions"] = jobs_df.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 1000.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
+        jobs_df = jobs_df.dropna(subset=["production_date"])
 
-        jobs_df["error_rate_impressions"] = jobs_df.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
+        jobs_df["damages_per_1000_impressions"] = safe_rate(jobs_df["total_damages"], jobs_df["total_impressions"], 1000.0)
 
-        # Monthly rollup for ALL customers trend
-        monthly_all = (
-            jobs_df.groupby("production_month", as_index=False)
-            .agg(
-                total_damages=("total_damages", "sum"),
-                total_pieces=("total_pieces", "sum"),
-                total_impressions=("total_impressions", "sum"),
-                jobs=("job_number", "count"),
-            )
-            .sort_values("production_month")
-        )
-
-        monthly_all["error_rate"] = monthly_all.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_pieces"]) * 100.0)
-            if float(r.get("total_pieces", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
-        monthly_all["error_rate_impressions"] = monthly_all.apply(
-            lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-            if float(r.get("total_impressions", 0) or 0) > 0
-            else 0.0,
-            axis=1,
-        )
+        jobs_df["error_rate_impressions"] = safe_rate(jobs_df["total_damages"], jobs_df["total_impressions"], 100.0)
 
         rate_basis = st.radio(
             "Customer ranking basis",
@@ -1025,99 +953,116 @@ def main():
         st.markdown("---")
 
         # NEW: Add all-customers trendline + scatter (side by side)
+        grain = _grain_selector(start_date, end_date, key="overview_grain")
+        rollup_all = get_rollup(None, grain, start_date, end_date)
+        # Weeks start on Monday in both Postgres date_trunc and the pandas W-SUN period
+        jobs_df["production_period"] = jobs_df["production_date"].dt.to_period(TIME_GRAINS[grain][1]).dt.start_time
         lc, rc = st.columns(2)
 
         with lc:
-            st.markdown("### 📉 All Customers Error Rate Trend (by Production Month)")
-            fig = px.line(
-                monthly_all,
-                x="production_month",
-                y=rate_col,
-                markers=True,
-                title=None,
-                hover_data={
-                    "jobs": True,
-                    "total_pieces": True,
-                    "total_impressions": True,
-                    "total_damages": True,
-                },
-            )
-            fig.update_traces(marker=dict(size=10))
-            fig.update_layout(
-                xaxis_title="Production Month",
-                yaxis_title=rate_title,
-                hovermode="x unified",
-                margin=dict(l=10, r=10, t=10, b=10),
-            )
-            fig.update_xaxes(dtick="M1", tickformat="%b %Y")
+            st.markdown(f"### 📉 All Customers Error Rate Trend (by Production {grain})")
+            fig = _figure(_trend_figure, rollup_all, rate_col=rate_col, rate_label=rate_title, grain=grain)
             st.plotly_chart(fig, use_container_width=True)
 
         with rc:
             st.markdown("### 🎯 Damages per 1,000 Impressions (by Job)")
-            fig = px.scatter(
-                jobs_df.sort_values("production_date"),
-                x="production_month",
-                y="damages_per_1000_impressions",
-                hover_name="job_number",
-                hover_data={
-                    "customer_name": True,
-                    "total_pieces": True,
-                    "total_impressions": True,
-                    "total_damages": True,
-                    "production_date": True,  # hover formatting is Plotly; leaving raw is fine
-                },
-                title=None,
-            )
-            fig.update_traces(marker=dict(size=10, opacity=0.85))
-            fig.update_layout(
-                xaxis_title="Production Month",
-                yaxis_title="Damages per 1,000 Impressions",
-                margin=dict(l=10, r=10, t=10, b=10),
-            )
-            fig.update_xaxes(dtick="M1", tickformat="%b %Y")
+            fig = _figure(_scatter_figure, jobs_df[SCATTER_COLUMNS], grain=grain)
             st.plotly_chart(fig, use_container_width=True)
 
         st.markdown("---")
 
+        basis = "impressions" if rate_col == "error_rate_impressions" else "pieces"
+
+        st.markdown("### 🗺️ Error Rate by Customer and Month")
+        top_k = st.select_slider(
+            f"Customers shown (by {basis})",
+            options=[10, 25, 50, 100],
+            value=MATRIX_TOP_K,
+            key="overview_matrix_top_k",
+            help="Every other customer is combined into one row at the bottom.",
+        )
+        matrix = get_customer_month_matrix(start_date, end_date, basis, top_k)
+        if matrix.empty:
+            st.info("No customer volume in this date range.")
+        else:
+            st.plotly_chart(_figure(_heatmap_figure, matrix, rate_title=rate_title), use_container_width=True)
+        st.markdown("---")
+
+        distribution = get_damage_distribution(start_date, end_date)
+        company_dist = distribution[distribution["customer_id"].isna()]
+        if not company_dist.empty:
+            st.markdown("### 📐 Damages per 1,000 Impressions — Job Distribution")
+            _distribution_metrics(company_dist.iloc[0])
+            with st.expander("Per-customer distribution (sorted by P90)"):
+                st.dataframe(
+                    distribution[distribution["customer_id"].notna()][list(DISTRIBUTION_COLUMN_CONFIG)],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config=DISTRIBUTION_COLUMN_CONFIG,
+                )
+            st.markdown("---")
+
+        min_volume = st.number_input(
+            f"Minimum {basis} to be ranked",
+            min_value=0,
+            value=RANKING_MIN_VOLUME,
+            step=500,
+            key="overview_min_volume",
+            help=(
+                "Rankings use a smoothed error rate: each customer's rate is pulled toward the company rate "
+                f"until they have about {RANKING_PRIOR_WEIGHT:,} {basis}, so one small clean job can't top the list."
+            ),
+        )
+
         c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("### 🏆 Top 10 Best Customers (Lowest Error Rate)")
-            best = stats_df.nsmallest(10, rate_col)
-            fig = px.bar(best, x="customer_name", y=rate_col, title=None)
-            fig.update_layout(
-                xaxis_title="Customer",
-                yaxis_title=rate_title,
-                showlegend=False,
-                margin=dict(l=10, r=10, t=10, b=10),
+        for column, worst, heading in [
+            (c1, False, "### 🏆 Top 10 Best Customers (Lowest Error Rate)"),
+            (c2, True, "### ⚠️ Top 10 Customers Needing Attention (Highest Error Rate)"),
+        ]:
+            with column:
+                st.markdown(heading)
+                ranked = get_customer_ranking(start_date, end_date, basis, worst=worst, min_volume=min_volume)
+                if ranked.empty:
+                    st.info("No customers meet the minimum volume in this date range.")
+                    continue
+                fig = _figure(_ranking_figure, ranked, basis=basis, rate_col=rate_col, rate_title=rate_title)
+                st.plotly_chart(fig, use_container_width=True)
+
+        next_month = (pd.Timestamp.today().replace(day=1) + pd.DateOffset(months=1)).strftime("%B %Y")
+        st.markdown(f"### 🔮 Projected vs Target — {next_month}")
+        st.caption(
+            f"Exponentially weighted average of each customer's last {FORECAST_HISTORY_MONTHS} months "
+            f"of damages per {basis}; recent months count most. Independent of the date range above."
+        )
+        forecast = get_customer_forecast(basis)
+        if forecast.empty:
+            st.info("No jobs in the forecast window yet.")
+        else:
+            at_risk_only = st.checkbox(
+                "Only customers projected to miss target", value=True, key="overview_forecast_at_risk"
             )
-            fig.update_xaxes(tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
-
-        with c2:
-            st.markdown("### ⚠️ Top 10 Customers Needing Attention (Highest Error Rate)")
-            worst = stats_df.nlargest(10, rate_col)
-            fig = px.bar(worst, x="customer_name", y=rate_col, title=None)
-            fig.update_layout(
-                xaxis_title="Customer",
-                yaxis_title=rate_title,
-                showlegend=False,
-                margin=dict(l=10, r=10, t=10, b=10),
+            shown = forecast[forecast["likely_to_miss"]] if at_risk_only else forecast
+            st.metric(
+                "Customers projected to miss target",
+                f"{int(forecast['likely_to_miss'].sum())} of {len(forecast)}",
             )
-            fig.update_xaxes(tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
+            if shown.empty:
+                st.success("✅ Every customer is projected to stay within target.")
+            else:
+                st.dataframe(
+                    shown[list(FORECAST_COLUMN_CONFIG)],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config=FORECAST_COLUMN_CONFIG,
+                )
 
         st.markdown("### 📋 All Customer Statistics")
-        display_df = stats_df.copy()
-        display_df["error_rate"] = display_df["error_rate"].apply(lambda x: f"{x:.2f}%")
-        if "error_rate_impressions" in display_df.columns:
-            display_df["error_rate_impressions"] = display_df["error_rate_impressions"].apply(lambda x: f"{x:.2f}%")
-        display_df["target_error_rate"] = display_df["target_error_rate"].apply(lambda x: f"{x:.1f}%")
-        display_df["total_pieces"] = display_df["total_pieces"].apply(lambda x: f"{int(x):,}")
-        if "total_impressions" in display_df.columns:
-            display_df["total_impressions"] = display_df["total_impressions"].apply(lambda x: f"{int(x):,}")
-        display_df["total_damages"] = display_df["total_damages"].apply(lambda x: f"{int(x):,}")
-        display_df["total_jobs"] = display_df["total_jobs"].apply(int)
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        st.dataframe(
+            stats_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config=_display_column_config(stats_df.columns),
+        )
 
         csv = stats_df.to_csv(index=False)
         st.download_button(
@@ -1132,44 +1077,35 @@ def main():
     # ========================================================================
     elif menu == "📋 View All Jobs":
         st.header("All Jobs")
-        df = get_all_jobs()
+        job_store = get_job_store()
+        job_store.sync()
+        df = job_store.all_jobs()
 
         if df.empty:
             st.info("📭 No jobs in the database yet.")
             return
 
         st.markdown(f"### Total Jobs: {len(df)}")
-        display_df = df.copy()
         # Ensure impressions-based error rate exists for display (older rows may not have it)
-        if "error_rate_impressions" not in display_df.columns:
-            display_df["error_rate_impressions"] = display_df.apply(
-                lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-                if float(r.get("total_impressions", 0) or 0) > 0
-                else 0.0,
-                axis=1,
-            )
-
-        display_df["error_rate"] = display_df["error_rate"].apply(_fmt_percent)
-        if "error_rate_impressions" in display_df.columns:
-            display_df["error_rate_impressions"] = display_df["error_rate_impressions"].apply(_fmt_percent)
-        display_df["production_date"] = pd.to_datetime(display_df["production_date"], errors="coerce").dt.strftime("%m/%d/%Y")
-
+        if "error_rate_impressions" not in df.columns:
+            df["error_rate_impressions"] = safe_rate(df["total_damages"], df["total_impressions"], 100.0)
+
+        job_columns = [
+            "customer_name",
+            "job_number",
+            "production_date",
+            "total_pieces",
+            "total_impressions",
+            "total_damages",
+            "error_rate",
+            "error_rate_impressions",
+            "notes",
+        ]
         st.dataframe(
-            display_df[
-                [
-                    "customer_name",
-                    "job_number",
-                    "production_date",
-                    "total_pieces",
-                    "total_impressions",
-                    "total_damages",
-                    "error_rate",
-                    "error_rate_impressions",
-                    "notes",
-                ]
-            ],
+            df[job_columns],
             use_container_width=True,
             hide_index=True,
+            column_config=_display_column_config(job_columns),
         )
 
         st.markdown("---")
@@ -1184,7 +1120,7 @@ def main():
                 ["-- All --"] + df["customer_name"].unique().tolist(),
             )
 
-        filtered = df.copy()
+        filtered = df
         if search_term:
             filtered = filtered[filtered["job_number"].astype(str).str.contains(search_term, case=False, na=False)]
         if customer_filter != "-- All --":
@@ -1192,37 +1128,11 @@ def main():
 
         if not filtered.empty and (search_term or customer_filter != "-- All --"):
             st.markdown(f"#### Found {len(filtered)} result(s)")
-            display_filtered = filtered.copy()
-            # Ensure impressions-based error rate exists for display (older rows may not have it)
-            if "error_rate_impressions" not in display_filtered.columns:
-                display_filtered["error_rate_impressions"] = display_filtered.apply(
-                    lambda r: (float(r["total_damages"]) / float(r["total_impressions"]) * 100.0)
-                    if float(r.get("total_impressions", 0) or 0) > 0
-                    else 0.0,
-                    axis=1,
-                )
-
-            display_filtered["error_rate"] = display_filtered["error_rate"].apply(_fmt_percent)
-            if "error_rate_impressions" in display_filtered.columns:
-                display_filtered["error_rate_impressions"] = display_filtered["error_rate_impressions"].apply(_fmt_percent)
-            display_filtered["production_date"] = pd.to_datetime(display_filtered["production_date"], errors="coerce").dt.strftime("%m/%d/%Y")
-
             st.dataframe(
-                display_filtered[
-                    [
-                        "customer_name",
-                        "job_number",
-                        "production_date",
-                        "total_pieces",
-                        "total_impressions",
-                        "total_damages",
-                        "error_rate",
-                        "error_rate_impressions",
-                        "notes",
-                    ]
-                ],
+                filtered[job_columns],
                 use_container_width=True,
                 hide_index=True,
+                column_config=_display_column_config(job_columns),
             )
 
     # ========================================================================
@@ -1231,7 +1141,7 @@ def main():
     elif menu == "👥 Manage Customers":
         st.header("Manage Customers")
 
-        tab1, tab2 = st.tabs(["➕ Add New Customer", "📋 View & Set Targets"])
+        tab1, tab2, tab3 = st.tabs(["➕ Add New Customer", "📋 View & Set Targets", "🔀 Merge & Deactivate"])
 
         with tab1:
             st.markdown("### Add New Customer")
@@ -1250,47 +1160,227 @@ def main():
             customers_df = get_all_customers()
             st.markdown(f"**Total Customers:** {len(customers_df)}")
 
-            display_df = customers_df.copy()
-            display_df["target_error_rate"] = display_df["target_error_rate"].apply(lambda x: f"{x:.1f}%")
-            display_df["date_added"] = _fmt_mmddyyyy(display_df["date_added"])
-
+            customer_columns = ["customer_name", "date_added", "target_error_rate"]
             st.dataframe(
-                display_df[["customer_name", "date_added", "target_error_rate"]],
+                customers_df[customer_columns],
                 use_container_width=True,
                 hide_index=True,
+                column_config=_display_column_config(customer_columns),
             )
 
             st.markdown("---")
             st.markdown("### Set Target Error Rate by Customer")
 
             if not customers_df.empty:
-                cust_name_for_target = st.selectbox("Select Customer", customers_df["customer_name"].tolist())
+                directory = get_customer_directory()
+                cust_name_for_target = st.selectbox("Select Customer", list(directory.options))
                 target_choice = st.selectbox("Target Error Rate", ["3.0%", "2.0%", "1.0%"])
                 target_value = float(target_choice.replace("%", ""))
 
                 if st.button("💾 Update Target Error Rate", type="primary"):
-                    cust_id = int(customers_df[customers_df["customer_name"] == cust_name_for_target]["id"].values[0])
+                    cust_id = int(directory.id_for(cust_name_for_target))
                     update_customer_target(cust_id, target_value)
                     st.success(f"✅ Updated target error rate for {cust_name_for_target} to {target_value:.1f}%")
                     st.rerun()
 
+        with tab3:
+            if "customer_message" in st.session_state:
+                st.success(st.session_state["customer_message"])
+                del st.session_state["customer_message"]
+
+            directory = get_customer_directory()
+
+            st.markdown("### Merge Duplicate Customers")
+            st.caption(
+                "Moves every job from the duplicate to the customer you keep, then deactivates the duplicate. "
+                "Where both have the same job number, the older entry is deleted."
+            )
+            merge_source = _customer_picker("Duplicate (merged away)", "-- Select --", key="merge_source")
+            merge_target = _customer_picker("Keep", "-- Select --", key="merge_target")
+
+            if merge_source != "-- Select --" and merge_target != "-- Select --":
+                if merge_source == merge_target:
+                    st.error("❌ Pick two different customers.")
+                else:
+                    st.warning(f"⚠️ All jobs for **{merge_source}** will move to **{merge_target}**. This cannot be undone.")
+                    if st.button("🔀 Merge Customers", type="primary"):
+                        try:
+                            result = merge_customers(directory.id_for(merge_source), directory.id_for(merge_target))
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+                        else:
+                            message = f"✅ Merged {merge_source} into {merge_target}: {result['jobs_moved']:,} jobs moved."
+                            if result["duplicates_deleted"]:
+                                message += f" {result['duplicates_deleted']:,} duplicate job numbers removed."
+                            st.session_state["customer_message"] = message
+                            st.rerun()
+
+            st.markdown("---")
+            st.markdown("### Deactivate Customer")
+            st.caption("Hides the customer from dropdowns, rankings and stats. Jobs are kept.")
+            deactivate_name = _customer_picker("Customer", "-- Select --", key="deactivate_customer")
+            if deactivate_name != "-- Select --" and st.button("🚫 Deactivate"):
+                set_customer_active(directory.id_for(deactivate_name), False)
+                st.session_state["customer_message"] = f"✅ {deactivate_name} deactivated."
+                st.rerun()
+
+            inactive = get_inactive_customers()
+            if not inactive.empty:
+                reactivate_name = st.selectbox(
+                    "Reactivate Customer", ["-- Select --"] + inactive["customer_name"].tolist(), key="reactivate_customer"
+                )
+                if reactivate_name != "-- Select --" and st.button("✅ Reactivate"):
+                    reactivate_id = int(inactive.loc[inactive["customer_name"] == reactivate_name, "id"].iloc[0])
+                    set_customer_active(reactivate_id, True)
+                    st.session_state["customer_message"] = f"✅ {reactivate_name} reactivated."
+                    st.rerun()
+
     # ========================================================================
     # MANAGE DATA
     # ========================================================================
     elif menu == "⚙️ Manage Data":
         st.header("Manage Data")
 
-        df = get_all_jobs()
+        if "bulk_message" in st.session_state:
+            st.success(st.session_state["bulk_message"])
+            del st.session_state["bulk_message"]
+
+        job_store = get_job_store()
+        job_store.sync(force=True)
+        df = job_store.all_jobs(include_archive=False)
+
+        st.markdown("### 🧹 Bulk Delete / Correct")
+        st.caption(
+            f"Filter the jobs to change. Deleted jobs can be restored from Recent Deletions for {JOB_UNDO_WINDOW_HOURS} hours."
+        )
+
+        directory = get_customer_directory()
+        f1, f2 = st.columns(2)
+        with f1:
+            bulk_customer = _customer_picker("Customer", "-- Any Customer --", key="bulk_customer")
+            bulk_pattern = st.text_input(
+                "Job Number",
+                placeholder="e.g. IMPORT-0412-* (* matches anything)",
+                key="bulk_job_number",
+            )
+            bulk_ids_text = st.text_input("Job IDs", placeholder="e.g. 101, 102, 230", key="bulk_ids")
+        with f2:
+            bulk_start = st.date_input("From Production Date", value=None, format="MM/DD/YYYY", key="bulk_start")
+            bulk_end = st.date_input("To Production Date", value=None, format="MM/DD/YYYY", key="bulk_end")
+
+        id_tokens = bulk_ids_text.replace(",", " ").split()
+        bad_ids = [t for t in id_tokens if not t.isdigit()]
+        if bad_ids:
+            st.error(f"❌ Job IDs must be numbers: {', '.join(bad_ids)}")
+
+        job_filter = JobFilter(
+            customer_id=directory.id_for(bulk_customer),
+            start_date=bulk_start,
+            end_date=bulk_end,
+            job_number_pattern=bulk_pattern,
+            ids=tuple(int(t) for t in id_tokens if t.isdigit()),
+        )
+
+        if job_filter.is_empty() or bad_ids:
+            st.info("Set at least one filter to preview matching jobs.")
+        else:
+            match_count, sample = preview_job_filter(job_filter)
+            st.metric("Matching Jobs", f"{match_count:,}")
+            if match_count:
+                st.dataframe(
+                    sample,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config=_display_column_config(sample.columns),
+                )
+                if match_count > len(sample):
+                    st.caption(f"Showing the {len(sample)} most recent of {match_count:,} matching jobs.")
+
+                action = st.radio("Action", ["Delete", "Correct"], horizontal=True, key="bulk_action")
+                if action == "Delete":
+                    confirm = st.checkbox(f"Delete all {match_count:,} matching jobs", key="bulk_delete_confirm")
+                    if st.button("🗑️ Delete Matching Jobs", type="primary", disabled=not confirm):
+                        result = soft_delete_jobs(job_filter)
+                        st.session_state["bulk_message"] = f"✅ {result['deleted']:,} jobs deleted. Undo below if needed."
+                        st.rerun()
+                else:
+                    field_labels = {
+                        "Customer": "customer_id",
+                        "Production Date": "production_date",
+                        "Total Pieces": "total_pieces",
+                        "Total Impressions": "total_impressions",
+                        "Total Damages": "total_damages",
+                        "Notes": "notes",
+                    }
+                    fields = st.multiselect("Fields to set", list(field_labels), key="bulk_fields")
+                    changes = {}
+                    for label in fields:
+                        col = field_labels[label]
+                        if col == "customer_id":
+                            new_customer = st.selectbox("New Customer", list(directory.options), key="bulk_set_customer")
+                            changes[col] = directory.id_for(new_customer)
+                        elif col == "production_date":
+                            changes[col] = st.date_input("New Production Date", format="MM/DD/YYYY", key="bulk_set_date")
+                        elif col == "notes":
+                            changes[col] = st.text_input("New Notes", key="bulk_set_notes")
+                        else:
+                            minimum = 0 if col == "total_damages" else 1
+                            changes[col] = int(
+                                st.number_input(f"New {label}", min_value=minimum, step=1, key=f"bulk_set_{col}")
+                            )
+
+                    if st.button(f"✏️ Apply to {match_count:,} Jobs", type="primary", disabled=not changes):
+                        try:
+                            updated = correct_jobs(job_filter, changes)
+                        except IntegrityError:
+                            st.error("❌ The correction would give two jobs the same customer and job number.")
+                        except JobValidationError as e:
+                            shown = e.errors[:BULK_ERRORS_SHOWN]
+                            more = len(e.errors) - len(shown)
+                            st.error(
+                                "❌ Nothing was changed. The correction breaks these rules:\n\n"
+                                + "\n".join(f"- {err}" for err in shown)
+                                + (f"\n- ...and {more:,} more" if more else "")
+                            )
+                        else:
+                            st.session_state["bulk_message"] = f"✅ {updated:,} jobs corrected."
+                            st.rerun()
+
+        deletions = get_recent_deletions()
+        if not deletions.empty:
+            st.markdown("### ↩️ Recent Deletions")
+            for row in deletions.itertuples(index=False):
+                c1, c2 = st.columns([4, 1])
+                with c1:
+                    st.write(
+                        f"**{int(row.jobs):,} jobs** ({row.customers}) deleted "
+                        f"{pd.to_datetime(row.deleted_at).strftime('%m/%d/%Y %I:%M %p')}"
+                    )
+                with c2:
+                    if st.button("↩️ Undo", key=f"undo_{row.batch}", use_container_width=True):
+                        restored = restore_jobs(row.batch)
+                        skipped = int(row.jobs) - restored
+                        message = f"✅ {restored:,} jobs restored."
+                        if skipped:
+                            message += f" {skipped:,} were re-entered since and stay deleted."
+                        st.session_state["bulk_message"] = message
+                        st.rerun()
+
         if df.empty:
             st.info("📭 No jobs to manage yet.")
             return
 
         st.markdown("### 🗑️ Delete Job")
-        st.warning("⚠️ Warning: Deleting a job is permanent!")
 
-        job_options = df.apply(
-            lambda row: f"{row['customer_name']} - {row['job_number']} - {pd.to_datetime(row['production_date']).strftime('%m/%d/%Y')} (ID: {row['id']})",
-            axis=1,
+        job_options = (
+            df["customer_name"].astype(str)
+            + " - "
+            + df["job_number"].astype(str)
+            + " - "
+            + fmt_mmddyyyy(df["production_date"]).fillna("")
+            + " (ID: "
+            + df["id"].astype(str)
+            + ")"
         ).tolist()
 
         selected_job = st.selectbox("Select Job to Delete", ["-- Select --"] + job_options)
@@ -1311,9 +1401,8 @@ def main():
 
             if st.button("🗑️ Delete This Job", type="primary"):
                 delete_job(job_id)
-                st.success("✅ Job deleted successfully!")
+                st.session_state["bulk_message"] = "✅ Job deleted. Undo it under Recent Deletions."
                 st.rerun()
 
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,245 @@
+"""Query-plan regression checker for the dashboard's SQL layer.
+
+Runs EXPLAIN for every registered query against a seeded local Postgres and
+compares each plan to a recorded baseline. It checks scan types per table,
+estimated total cost and median wall-clock time. A new sequential scan or a
+cost jump beyond the tolerance is a regression and makes the run exit 1, so
+it can gate a CI job.
+
+    python query_plans.py --url postgresql://qc:qc@localhost/qc_plans --seed-jobs 200000 --record
+    python query_plans.py --url postgresql://qc:qc@localhost/qc_plans
+
+Record baselines on the same database size you check against; seeding only
+adds rows to an empty database, so point it at a throwaway database.
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+import load_harness
+import qc_core as qc
+
+DEFAULT_BASELINE_PATH = "query_plan_baselines.json"
+PLANNED_TABLES = ("jobs", "customers", "job_changes", "jobs_archive_daily", "dashboard_snapshots")
+
+
+# ----------------------------------------------------------------------------
+# Registered queries
+# ----------------------------------------------------------------------------
+def registered_queries(conn) -> dict:
+    """name -> (sql, params), with parameters picked the way the pages pick them."""
+    today = date.today()
+    last_30, last_90 = today - timedelta(days=30), today - timedelta(days=90)
+    busiest = conn.execute(
+        text("SELECT customer_id FROM live_jobs GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1")
+    ).scalar()
+    cid = int(busiest or 0)
+    max_id = int(conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM jobs")).scalar_one())
+    max_seq = int(conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM job_changes")).scalar_one())
+    # A write-queue batch worth of keys, all taken: the lookup's worst case
+    taken = conn.execute(
+        text("SELECT job_number FROM live_jobs WHERE customer_id = :cid ORDER BY id DESC LIMIT :n"),
+        {"cid": cid, "n": qc.WRITE_QUEUE_BATCH_SIZE},
+    ).scalars().all()
+    ranking = {"weight": qc.RANKING_PRIOR_WEIGHT, "min_volume": qc.RANKING_MIN_VOLUME, "limit": 10}
+
+    return {
+        "customer_stats": (qc.CUSTOMER_STATS_SQL, {}),
+        "all_jobs": (qc.ALL_JOBS_SQL, {}),
+        "jobs_by_customer": (qc.JOBS_BY_CUSTOMER_SQL, {"cid": cid}),
+        "jobs_by_customer_range": (qc.JOBS_BY_CUSTOMER_RANGE_SQL, {"cid": cid, "sd": last_30, "ed": today}),
+        "jobs_by_date_range": (qc.JOBS_BY_DATE_RANGE_SQL, {"sd": last_90, "ed": today}),
+        "rollup_customer_day": (qc.ROLLUP_SQL, {"unit": "day", "cid": cid, "sd": last_30, "ed": today}),
+        "rollup_all_week": (qc.ROLLUP_SQL, {"unit": "week", "cid": None, "sd": last_90, "ed": today}),
+        "period_comparison": (qc.PERIOD_COMPARISON_SQL, {"sd": last_30, "ed": today}),
+        "damage_distribution": (qc.DAMAGE_DISTRIBUTION_SQL, {"sd": last_90, "ed": today}),
+        "customer_ranking": (
+            qc.CUSTOMER_RANKING_SQL.format(volume="total_impressions", direction="ASC"),
+            {"sd": last_90, "ed": today, **ranking},
+        ),
+        "customer_month_matrix": (
+            qc.CUSTOMER_MONTH_MATRIX_SQL.format(volume="total_impressions"),
+            {"sd": today - timedelta(days=365), "ed": today, "top_k": qc.MATRIX_TOP_K, "other": qc.MATRIX_OTHER_LABEL},
+        ),
+        "forecast_history": (
+            qc.FORECAST_HISTORY_SQL.format(volume="total_impressions"),
+            {"sd": today.replace(day=1) - timedelta(days=31 * (qc.FORECAST_HISTORY_MONTHS - 1))},
+        ),
+        "existing_jobs": (
+            qc.EXISTING_JOBS_SQL,
+            {"customer_ids": [cid] * len(taken), "job_numbers": list(taken), "idempotency_keys": [None] * len(taken)},
+        ),
+        "job_data_version": (qc.JOB_DATA_VERSION_SQL, {}),
+        "snapshot_version": (qc.SNAPSHOT_VERSION_SQL, {}),
+        "job_store_delta": (
+            qc.JOB_STORE_READ_SQL.format(where_sql="j.id > :last_id"),
+            {"last_id": max(max_id - qc.JOB_SYNC_OVERLAP, 0)},
+        ),
+        "job_changes": (qc.JOB_CHANGES_SQL, {"seq": max(max_seq - qc.JOB_SYNC_OVERLAP, 0)}),
+    }
+
+
+# ----------------------------------------------------------------------------
+# Plans
+# ----------------------------------------------------------------------------
+def _normalize(name: str) -> str:
+    """Fold partition names (jobs_2024, jobs_2024q3, jobs_default) so plans compare across years."""
+    return re.sub(r"^jobs_(\d{4}(q[1-4])?|default)(?=_|$)", "jobs_<partition>", name)
+
+
+def summarize_plan(plan: dict) -> dict:
+    scans = set()
+
+    def walk(node):
+        relation = node.get("Relation Name")
+        if relation and "Scan" in node["Node Type"]:
+            scan = f"{node['Node Type']} on {_normalize(relation)}"
+            if node.get("Index Name"):
+                scan += f" using {_normalize(node['Index Name'])}"
+            scans.add(scan)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    root = plan["Plan"]
+    walk(root)
+    return {"total_cost": float(root["Total Cost"]), "plan_rows": int(root["Plan Rows"]), "scans": sorted(scans)}
+
+
+def measure(conn, sql: str, params: dict, runs: int) -> dict:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    summary = summarize_plan(plan[0])
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    summary["median_ms"] = round(statistics.median(timings), 2)
+    return summary
+
+
+def compare(current: dict, baseline: dict, cost_tolerance: float, time_tolerance: float) -> tuple:
+    """(status, notes) for one query; status is ok, new, slower or REGRESSED."""
+    if baseline is None:
+        return "new", ["no baseline recorded"]
+
+    notes, regressed = [], False
+    new_scans = set(current["scans"]) - set(baseline["scans"])
+    lost_scans = set(baseline["scans"]) - set(current["scans"])
+    for scan in sorted(new_scans):
+        if scan.startswith("Seq Scan"):
+            regressed = True
+            notes.append(f"new {scan}")
+    for scan in sorted(lost_scans):
+        if "Index" in scan:
+            notes.append(f"no longer uses {scan}")
+
+    if baseline["total_cost"] and current["total_cost"] > baseline["total_cost"] * cost_tolerance:
+        regressed = True
+        notes.append(f"cost x{current['total_cost'] / baseline['total_cost']:.1f}")
+
+    slower = baseline.get("median_ms") and current["median_ms"] > baseline["median_ms"] * time_tolerance
+    if slower:
+        notes.append(f"time x{current['median_ms'] / baseline['median_ms']:.1f}")
+
+    if regressed:
+        return "REGRESSED", notes
+    return ("slower" if slower else "ok"), notes
+
+
+def run_checks(runs: int) -> tuple:
+    eng = qc.get_engine()
+    # Fresh statistics, committed, so plans reflect the data actually there
+    with eng.begin() as conn:
+        for table in PLANNED_TABLES:
+            conn.execute(text(f"ANALYZE {table}"))
+
+    with eng.connect() as conn:
+        job_count = int(conn.execute(text("SELECT COUNT(*) FROM jobs")).scalar_one())
+        results = {name: measure(conn, sql, params, runs) for name, (sql, params) in registered_queries(conn).items()}
+    return job_count, results
+
+
+# ----------------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of a local Postgres test database")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--record", action="store_true", help="write current plans as the new baseline")
+    parser.add_argument("--seed-jobs", type=int, default=0, help="seed this many jobs into an empty database first")
+    parser.add_argument("--seed-years", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5, help="timed executions per query")
+    parser.add_argument("--cost-tolerance", type=float, default=2.0, help="flag estimated cost above baseline x this")
+    parser.add_argument("--time-tolerance", type=float, default=3.0, help="warn when median time exceeds baseline x")
+    parser.add_argument("--fail-on-slower", action="store_true", help="treat wall-clock slowdowns as regressions")
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    qc.use_engine(qc.create_pooled_engine(args.url, "default", pool_size=1, max_overflow=0))
+    if args.seed_jobs:
+        load_harness.seed(args.seed_jobs, args.seed_years, random.Random(args.random_seed))
+    else:
+        qc.init_db()
+
+    job_count, results = run_checks(args.runs)
+
+    if args.record:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {"recorded_at": datetime.now().isoformat(timespec="seconds"), "jobs": job_count, "queries": results},
+                f,
+                indent=2,
+            )
+        print(f"Recorded {len(results)} query plans at {job_count:,} jobs to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        raise SystemExit(f"No baseline at {args.baseline}; run once with --record.")
+
+    if baseline["jobs"] and not 0.5 <= job_count / baseline["jobs"] <= 2.0:
+        print(
+            f"Warning: baseline was recorded at {baseline['jobs']:,} jobs, this database has {job_count:,}; "
+            "costs and timings are not comparable.\n"
+        )
+
+    rows, failed = [], False
+    for name, current in results.items():
+        base = baseline["queries"].get(name)
+        status, notes = compare(current, base, args.cost_tolerance, args.time_tolerance)
+        failed |= status == "REGRESSED" or (args.fail_on_slower and status == "slower")
+        rows.append(
+            {
+                "query": name,
+                "status": status,
+                "cost": round(current["total_cost"], 1),
+                "baseline_cost": round(base["total_cost"], 1) if base else None,
+                "median_ms": current["median_ms"],
+                "baseline_ms": base.get("median_ms") if base else None,
+                "notes": "; ".join(notes),
+            }
+        )
+
+    print(pd.DataFrame(rows).set_index("query").to_string())
+    if failed:
+        print("\nQuery plan regressions found.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
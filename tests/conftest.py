@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app and qc_core live at the repository root, which is not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
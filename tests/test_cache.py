@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from qc_core.cache import RESULT_STORE, cache_data  # noqa: E402
+
+
+def test_result_computed_across_a_clear_is_not_kept():
+    calls = []
+
+    @cache_data(ttl=60)
+    def read(n):
+        calls.append(n)
+        if len(calls) == 1:
+            # A write lands and invalidates while the first read is still running
+            read.clear()
+        return len(calls)
+
+    assert read(1) == 1
+    assert read(1) == 2
+    assert read(1) == 2
+    assert calls == [1, 1]
+    read.clear()
+
+
+def test_clear_drops_stored_results():
+    @cache_data(ttl=60)
+    def read(n):
+        return [n]
+
+    read(1)
+    read.clear()
+
+    assert RESULT_STORE.get(read, ((1,), ())) is None
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("plotly")
+
+import quality_control_dashboard as app  # noqa: E402
+from qc_core.customers import CustomerDirectory  # noqa: E402
+
+
+def _directory(names):
+    keyed = sorted((n.casefold(), n) for n in names)
+    return CustomerDirectory(
+        options=tuple(names),
+        name_to_id={n: i for i, n in enumerate(names, start=1)},
+        id_to_target={i: 2.0 for i in range(1, len(names) + 1)},
+        _search_keys=tuple(k for k, _ in keyed),
+        _search_names=tuple(n for _, n in keyed),
+    )
+
+
+@pytest.fixture
+def selectbox(monkeypatch):
+    calls = []
+
+    def fake_selectbox(label, options, help=None, key=None):
+        calls.append({"label": label, "options": options, "key": key})
+        return options[-1]
+
+    monkeypatch.setattr(app.st, "selectbox", fake_selectbox)
+    return calls
+
+
+def test_picker_returns_chosen_customer(monkeypatch, selectbox):
+    monkeypatch.setattr(app, "get_customer_directory", lambda: _directory(["Acme", "SanMar"]))
+
+    chosen = app._customer_picker("Select Customer *", "-- Select Customer --", key="submit_customer")
+
+    assert chosen == "SanMar"
+    assert selectbox[0]["options"] == ["-- Select Customer --", "Acme", "SanMar"]
+    assert selectbox[0]["key"] == "submit_customer"
+
+
+def test_picker_searches_large_directories(monkeypatch, selectbox):
+    names = [f"Customer {i:04d}" for i in range(app.CUSTOMER_PICKER_SEARCH_THRESHOLD + 10)]
+    monkeypatch.setattr(app, "get_customer_directory", lambda: _directory(names))
+    monkeypatch.setattr(app.st, "text_input", lambda *args, **kwargs: "customer 0009")
+
+    chosen = app._customer_picker("Select Customer", "-- All Customers --", key="analytics_customer")
+
+    assert chosen == "Customer 0009"
+    assert selectbox[0]["options"] == ["-- All Customers --", "Customer 0009"]
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+from qc_core.jobs import validate_job_rows  # noqa: E402
+
+TODAY = date(2024, 5, 1)
+
+
+def _jobs(*production_dates, **overrides):
+    rows = [
+        {
+            "customer_id": 1,
+            "job_number": f"A-{i}",
+            "production_date": production_date,
+            "total_pieces": 100,
+            "total_impressions": 200,
+            "total_damages": 2,
+            "notes": "",
+        }
+        for i, production_date in enumerate(production_dates)
+    ]
+    jobs = pd.DataFrame(rows)
+    for column, value in overrides.items():
+        jobs[column] = value
+    return jobs
+
+
+def test_valid_rows_pass():
+    assert validate_job_rows(_jobs("2024-04-30", "2024-05-01"), today=TODAY) == []
+
+
+def test_same_day_timestamp_is_not_future():
+    assert validate_job_rows(_jobs("2024-05-01T23:59:00"), today=TODAY) == []
+
+
+def test_tz_aware_timestamps_use_the_date_as_written():
+    # Late evening west of UTC is already the next day in UTC; mixed offsets in one batch
+    jobs = _jobs("2024-05-01T23:30:00-07:00", "2024-05-01T08:00:00+09:00", "2024-05-02T00:30:00+02:00")
+
+    errors = validate_job_rows(jobs, today=TODAY)
+
+    assert [(e.row, e.field) for e in errors] == [(3, "production_date")]
+    assert errors[0].message == "Production Date cannot be in the future"
+
+
+def test_tz_aware_datetime_column():
+    jobs = _jobs(*pd.to_datetime(["2024-05-01 20:00", "2024-05-02 01:00"]).tz_localize("America/Denver"))
+
+    assert [e.row for e in validate_job_rows(jobs, today=TODAY)] == [2]
+
+
+def test_unreadable_date_is_required_error():
+    errors = validate_job_rows(_jobs("not a date"), today=TODAY)
+
+    assert [str(e) for e in errors] == ["Row 1: Production Date is required"]
+
+
+def test_damages_above_pieces_rejected():
+    errors = validate_job_rows(_jobs("2024-04-30", total_damages=101), today=TODAY)
+
+    assert [(e.row, e.field) for e in errors] == [(1, "total_damages")]
+
+
+def test_fractional_counts_rejected():
+    jobs = _jobs("2024-04-30", "2024-04-30", "2024-04-30")
+    jobs["total_pieces"] = [10.7, 0.5, 100]
+    jobs["total_impressions"] = [5.5, 200, 200.0]
+    jobs["total_damages"] = [0.4, 0, 2]
+
+    errors = validate_job_rows(jobs, today=TODAY)
+
+    assert [(e.row, e.field) for e in errors] == [
+        (1, "total_pieces"),
+        (1, "total_impressions"),
+        (1, "total_damages"),
+        (2, "total_pieces"),
+    ]
+    assert str(errors[-1]) == "Row 2: Total Pieces must be a whole number"
+
+
+def test_repeated_job_numbers_only_when_asked():
+    jobs = _jobs("2024-04-30", "2024-04-30", job_number="A-1")
+
+    assert validate_job_rows(jobs, today=TODAY) == []
+    assert [e.row for e in validate_job_rows(jobs, today=TODAY, unique_job_numbers=True)] == [2]
@@ -0,0 +1,77 @@
+"""Needs a throwaway Postgres database in QC_TEST_DATABASE_URL; its jobs table gets partitioned."""
+
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+import qc_core as qc  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+TEST_DATABASE_URL = os.environ.get("QC_TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="QC_TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture(scope="module")
+def partitioned_db():
+    qc.configure(TEST_DATABASE_URL)
+    qc.init_db()
+    qc.load_default_customers()
+    qc.jobs_partitioned.clear()
+    if not qc.jobs_partitioned():
+        qc.partition_jobs_table("year")
+    return int(qc.get_all_customers()["id"].iloc[0])
+
+
+def _job(customer_id: int, job_number: str, production_date: date, damages: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "customer_id": customer_id,
+                "job_number": job_number,
+                "production_date": production_date,
+                "total_pieces": 100,
+                "total_impressions": 200,
+                "total_damages": damages,
+                "notes": "",
+            }
+        ]
+    )
+
+
+def _live_rows(customer_id: int, job_number: str) -> list:
+    with qc.get_engine().connect() as conn:
+        return conn.execute(
+            text(
+                """
+                SELECT production_date, total_damages FROM live_jobs
+                WHERE customer_id = :cid AND job_number = :job
+                """
+            ),
+            {"cid": customer_id, "job": job_number},
+        ).fetchall()
+
+
+def test_resend_with_corrected_date_updates_the_live_row(partitioned_db):
+    job_number = f"TEST-{uuid.uuid4().hex[:12]}"
+    # Different years land in different partitions
+    qc.upsert_jobs(_job(partitioned_db, job_number, date(2023, 12, 30), 1))
+    qc.upsert_jobs(_job(partitioned_db, job_number, date(2024, 1, 2), 3))
+
+    assert [tuple(row) for row in _live_rows(partitioned_db, job_number)] == [(date(2024, 1, 2), 3)]
+
+
+def test_repeated_job_in_one_batch_keeps_the_last_copy(partitioned_db):
+    job_number = f"TEST-{uuid.uuid4().hex[:12]}"
+    batch = pd.concat(
+        [_job(partitioned_db, job_number, date(2024, 3, 1), 1), _job(partitioned_db, job_number, date(2024, 3, 2), 2)],
+        ignore_index=True,
+    )
+    qc.upsert_jobs(batch)
+
+    assert [tuple(row) for row in _live_rows(partitioned_db, job_number)] == [(date(2024, 3, 2), 2)]
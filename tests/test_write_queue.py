@@ -0,0 +1,70 @@
+import json
+from contextlib import nullcontext
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy.exc import IntegrityError  # noqa: E402
+
+from qc_core import store  # noqa: E402
+
+
+class _Engine:
+    def begin(self):
+        return nullcontext()
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    batches = []
+
+    def fake_upsert(conn, jobs, replace_existing=True):
+        batches.append(jobs["job_number"].tolist())
+        if "BAD" in batches[-1]:
+            raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+        return len(jobs)
+
+    monkeypatch.setattr(store, "upsert_job_rows", fake_upsert)
+    q = store.WriteBehindQueue(str(tmp_path / "queue.sqlite3"), _Engine(), batch_size=10)
+    # Straight into the table: enqueue() would wake the background flusher
+    with q._db() as db:
+        db.executemany(
+            "INSERT INTO pending_jobs (idempotency_key, payload, enqueued_at) VALUES (?, ?, 0)",
+            [(f"key-{n}", json.dumps({"job_number": n})) for n in ("A", "BAD", "B")],
+        )
+    q.batches = batches
+    return q
+
+
+def _attempts(q) -> dict:
+    with q._db() as db:
+        return dict(db.execute("SELECT json_extract(payload, '$.job_number'), attempts FROM pending_jobs"))
+
+
+def test_flush_counts_rows_written_not_rows_tried(queue):
+    assert queue.flush_once() == 2
+    assert _attempts(queue) == {"BAD": 1}
+
+
+def test_failed_row_is_retried_alone(queue):
+    queue.flush_once()
+    queue.batches.clear()
+
+    assert queue.flush_once() == 0
+    assert queue.batches == [["BAD"]]
+    assert _attempts(queue) == {"BAD": 2}
+
+
+def test_parked_rows_can_be_retried_or_discarded(queue):
+    with queue._db() as db:
+        db.execute("UPDATE pending_jobs SET failed = 1, attempts = 5, last_error = 'duplicate key'")
+
+    parked = queue.parked()
+    assert parked["job_number"].tolist() == ["A", "BAD", "B"]
+    assert set(parked["last_error"]) == {"duplicate key"}
+
+    assert queue.retry(parked["seq"].iloc[:1]) == 1
+    assert queue.discard(parked["seq"].iloc[1:2]) == 1
+    assert queue.parked()["job_number"].tolist() == ["B"]